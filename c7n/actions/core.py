@@ -47,6 +47,10 @@ class Action(Element):
 
     log = logging.getLogger("custodian.actions")
 
+    # Augmented resource keys the action reads, None means all of them.
+    # see Filter.augment_keys
+    augment_keys = None
+
     def __init__(self, data=None, manager=None, log_dir=None):
         self.data = data or {}
         self.manager = manager
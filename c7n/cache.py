@@ -5,10 +5,25 @@ multiple policies on the same resource type.
 """
 import pickle  # nosec nosemgrep
 
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 import os
 import logging
+import re
 import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover
+    lz4 = None
 
 log = logging.getLogger('custodian.cache')
 
@@ -32,11 +47,16 @@ def factory(config):
             log.debug("Using in-memory cache")
             CACHE_NOTIFY = True
         return InMemoryCache(config)
+    elif str(config.cache).startswith(ShardedCache.scheme):
+        return ShardedCache(config)
     return SqlKvCache(config)
 
 
 class Cache:
 
+    # resource attribute identifying cached resources, set by the resource manager.
+    id_key = None
+
     def __init__(self, config):
         self.config = config
 
@@ -46,12 +66,23 @@ class Cache:
     def get(self, key):
         pass
 
+    def get_resources(self, key, ids):
+        """Get the cached resources for key with the given ids."""
+        resources = self.get(key)
+        if resources is None:
+            return None
+        id_set = set(ids)
+        return [r for r in resources if r[self.id_key] in id_set]
+
     def save(self, key, data):
         pass
 
     def size(self):
         return 0
 
+    def get_stats(self):
+        return {}
+
     def close(self):
         pass
 
@@ -68,25 +99,56 @@ class NullCache(Cache):
 
 
 class InMemoryCache(Cache):
+    """Process wide in-memory cache, ie. for long lived lambda containers.
+
+    Entries expire after the configured cache period, and the least
+    recently used entries are evicted beyond max_entries or max_bytes.
+    """
     # Running in a temporary environment, so keep as a cache.
 
-    __shared_state = {}
+    max_entries = int(os.environ.get('C7N_MEMORY_CACHE_ENTRIES', 128))
+    max_bytes = int(os.environ.get('C7N_MEMORY_CACHE_BYTES', 256 * 1024 * 1024))
+
+    __shared_state = OrderedDict()
+    __lock = threading.Lock()
 
     def __init__(self, config):
         super().__init__(config)
         self.data = self.__shared_state
+        self.cache_period = getattr(config, 'cache_period', None)
 
     def load(self):
         return True
 
     def get(self, key):
-        return self.data.get(encode(key))
+        k = encode(key)
+        with self.__lock:
+            entry = self.data.get(k)
+            if entry is None:
+                return None
+            value, size, create_date = entry
+            if self.cache_period and time.time() - create_date > self.cache_period * 60:
+                del self.data[k]
+                return None
+            self.data.move_to_end(k)
+            return value
 
     def save(self, key, data):
-        self.data[encode(key)] = data
+        k = encode(key)
+        size = len(k) + len(encode(data))
+        with self.__lock:
+            self.data.pop(k, None)
+            self.data[k] = (data, size, time.time())
+            total = sum(e[1] for e in self.data.values())
+            while self.data and (
+                    len(self.data) > self.max_entries or total > self.max_bytes):
+                _, (_, evicted, _) = self.data.popitem(last=False)
+                total -= evicted
 
     def size(self):
-        return sum(map(len, self.data.values()))
+        """Approximate size in bytes of the cached values."""
+        with self.__lock:
+            return sum(e[1] for e in self.data.values())
 
 
 def encode(key):
@@ -100,6 +162,13 @@ def resolve_path(path):
 
 
 class SqlKvCache(Cache):
+    """Resource cache stored in a sqlite database.
+
+    Uses write ahead logging and a busy timeout to support concurrent
+    writers, ie. policies run in parallel threads or processes.
+    """
+
+    timeout = 30
 
     create_table = """
     create table if not exists c7n_cache (
@@ -125,8 +194,9 @@ class SqlKvCache(Cache):
                     os.remove(self.cache_path)
         elif not os.path.exists(os.path.dirname(self.cache_path)):
             # parent directory creation
-            os.makedirs(os.path.dirname(self.cache_path))
-        self.conn = sqlite3.connect(self.cache_path)
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.cache_path, timeout=self.timeout)
+        self.conn.execute('pragma journal_mode=wal')
         self.conn.execute(self.create_table)
         with self.conn as cursor:
             log.debug('expiring stale cache entries')
@@ -168,3 +238,226 @@ class SqlKvCache(Cache):
         if self.conn:
             self.conn.close()
             self.conn = None
+
+
+class Codec:
+    """Compression of cached values, preferring zstd, then lz4, then zlib.
+
+    The codec is recorded with each value, so caches written by a process
+    with a different set of compression libraries remain readable.
+    """
+
+    ZLIB, LZ4, ZSTD = b'z', b'l', b's'
+
+    def __init__(self):
+        if zstandard is not None:
+            self.codec = self.ZSTD
+        elif lz4 is not None:
+            self.codec = self.LZ4
+        else:
+            self.codec = self.ZLIB
+
+    def encode(self, data):
+        value = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)  # nosemgrep
+        if self.codec == self.ZSTD:
+            return self.codec + zstandard.ZstdCompressor().compress(value)
+        elif self.codec == self.LZ4:
+            return self.codec + lz4.frame.compress(value)
+        return self.codec + zlib.compress(value)
+
+    def decode(self, value):
+        codec, value = value[:1], value[1:]
+        if codec == self.ZSTD:
+            value = zstandard.ZstdDecompressor().decompress(value)
+        elif codec == self.LZ4:
+            value = lz4.frame.decompress(value)
+        else:
+            value = zlib.decompress(value)
+        return pickle.loads(value)  # nosec nosemgrep
+
+
+class ShardedCache(Cache):
+    """Resource cache sharded by account, region, resource type and source.
+
+    Configured with a cache location of ``sharded://path/to/dir``.
+
+    Each shard is a sqlite database in the cache directory. Resources
+    are stored compressed as individual rows keyed by resource id, so
+    looking up a few ids doesn't deserialize the whole population. Shards
+    use write ahead logging and a busy timeout to support concurrent
+    writers, ie. c7n-org worker processes sharing a cache directory.
+    """
+
+    scheme = 'sharded://'
+    shard_keys = ('account', 'region', 'resource', 'source')
+    timeout = 30
+    batch_size = 500
+
+    create_tables = (
+        """
+        create table if not exists c7n_query (
+            key blob primary key,
+            ids blob,
+            value blob,
+            create_date timestamp
+        )
+        """,
+        """
+        create table if not exists c7n_resource (
+            id text primary key,
+            value blob,
+            create_date timestamp
+        )
+        """,
+        "create index if not exists c7n_query_date on c7n_query (create_date)",
+        "create index if not exists c7n_resource_date on c7n_resource (create_date)",
+    )
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.cache_period = config.cache_period
+        self.cache_dir = resolve_path(str(config.cache)[len(self.scheme):])
+        self.codec = Codec()
+        self.conns = {}
+        self.stats = Counter()
+
+    def load(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        return True
+
+    def get_shard_path(self, key):
+        parts = ()
+        if isinstance(key, dict):
+            parts = [str(key[k]) for k in self.shard_keys if key.get(k)]
+        name = re.sub(r'[^\w.-]', '_', '-'.join(parts)) or 'default'
+        return os.path.join(self.cache_dir, '%s.db' % name)
+
+    def get_shard(self, key):
+        path = self.get_shard_path(key)
+        conn = self.conns.get(path)
+        if conn is None:
+            self.load()
+            conn = self.conns[path] = sqlite3.connect(path, timeout=self.timeout)
+            conn.execute('pragma journal_mode=wal')
+            with conn as cursor:
+                for stmt in self.create_tables:
+                    cursor.execute(stmt)
+                cutoff = datetime.utcnow() - timedelta(minutes=self.cache_period)
+                cursor.execute('delete from c7n_query where create_date < ?', [cutoff])
+                cursor.execute('delete from c7n_resource where create_date < ?', [cutoff])
+        return conn
+
+    def get(self, key):
+        row = self._get_query(key)
+        if row is None:
+            return None
+        return self._load(key, row)
+
+    def get_resources(self, key, ids):
+        row = self._get_query(key)
+        if row is None:
+            return None
+        members, by_id, value = row
+        if not by_id:
+            resources = self._load(key, row)
+            if resources is None:
+                return None
+            id_set = set(ids)
+            return [r for r in resources if r[self.id_key] in id_set]
+        members = set(members)
+        wanted = list(dict.fromkeys(str(i) for i in ids if str(i) in members))
+        resources = self._get_rows(key, wanted)
+        if len(resources) != len(wanted):
+            self.stats['CacheMisses'] += 1
+            return None
+        self.stats['CacheHits'] += 1
+        return list(resources.values())
+
+    def save(self, key, data, timestamp=None):
+        timestamp = timestamp or datetime.utcnow()
+        ids, rows, value = None, (), None
+        if isinstance(data, list) and all(isinstance(r, dict) for r in data):
+            by_id, members = self._get_ids(key, data)
+            rows = [(i, self.codec.encode(r), timestamp) for i, r in zip(members, data)]
+            self.stats['CacheBytesWritten'] += sum(len(r[1]) for r in rows)
+            ids = self.codec.encode({'by_id': by_id, 'ids': members})
+        else:
+            value = self.codec.encode(data)
+            self.stats['CacheBytesWritten'] += len(value)
+
+        with self.get_shard(key) as cursor:
+            cursor.executemany(
+                'replace into c7n_resource (id, value, create_date) values (?, ?, ?)',
+                rows)
+            cursor.execute(
+                'replace into c7n_query (key, ids, value, create_date) values (?, ?, ?, ?)',
+                (sqlite3.Binary(encode(key)), ids, value, timestamp))
+
+    def size(self):
+        if not os.path.exists(self.cache_dir):
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(self.cache_dir, f))
+            for f in os.listdir(self.cache_dir))
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def close(self):
+        for conn in self.conns.values():
+            conn.close()
+        self.conns = {}
+
+    def _get_ids(self, key, resources):
+        if self.id_key is not None:
+            ids = [str(r.get(self.id_key)) for r in resources]
+            if len(set(ids)) == len(ids):
+                return True, ids
+        # without unique ids, fall back to positional rows for the query.
+        prefix = hex(zlib.crc32(encode(key)))
+        return False, ['%s:%d' % (prefix, idx) for idx in range(len(resources))]
+
+    def _get_query(self, key):
+        row = self.get_shard(key).execute(
+            'select ids, value, create_date from c7n_query where key = ?',
+            [sqlite3.Binary(encode(key))]).fetchone()
+        if row is None:
+            self.stats['CacheMisses'] += 1
+            return None
+        ids, value, create_date = row
+        create_date = sqlite3.converters['TIMESTAMP'](create_date.encode('utf8'))
+        if (datetime.utcnow() - create_date).total_seconds() / 60.0 > self.cache_period:
+            self.stats['CacheMisses'] += 1
+            return None
+        if value is not None:
+            return None, False, value
+        self.stats['CacheBytesRead'] += len(ids)
+        ids = self.codec.decode(ids)
+        return ids['ids'], ids['by_id'], None
+
+    def _load(self, key, row):
+        ids, by_id, value = row
+        if value is not None:
+            self.stats['CacheHits'] += 1
+            self.stats['CacheBytesRead'] += len(value)
+            return self.codec.decode(value)
+        resources = self._get_rows(key, ids)
+        if len(resources) != len(ids):
+            # resource rows were expired or replaced by another writer
+            self.stats['CacheMisses'] += 1
+            return None
+        self.stats['CacheHits'] += 1
+        return [resources[i] for i in ids]
+
+    def _get_rows(self, key, ids):
+        conn = self.get_shard(key)
+        resources = {}
+        for idx in range(0, len(ids), self.batch_size):
+            batch = ids[idx:idx + self.batch_size]
+            for rid, value in conn.execute(
+                    'select id, value from c7n_resource where id in (%s)' % (  # nosec
+                        ', '.join('?' * len(batch))), batch):
+                self.stats['CacheBytesRead'] += len(value)
+                resources[rid] = self.codec.decode(value)
+        return resources
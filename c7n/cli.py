@@ -92,7 +92,8 @@ def _default_options(p, exclude=[]):
     if 'cache' not in exclude:
         p.add_argument(
             "-f", "--cache", default="~/.cache/cloud-custodian.cache",
-            help="Cache file (default %(default)s)")
+            help="Cache file, 'memory', or sharded://DIR for a per resource type "
+            "sharded cache directory (default %(default)s)")
         p.add_argument(
             "--cache-period", default=15, type=int,
             help="Cache validity in minutes (default %(default)i)")
@@ -192,6 +193,17 @@ def _key_val_pair(value):
     return value
 
 
+def _service_limit(value):
+    """
+    Type checker to ensure that --service-limit values are of the format service=count
+    """
+    service, _, count = value.partition('=')
+    if not service or not count.isdigit() or int(count) < 1:
+        msg = 'values must be of the form `service=count`'
+        raise argparse.ArgumentTypeError(msg)
+    return service, int(count)
+
+
 def setup_parser():
     c7n_desc = "Cloud Custodian - Cloud fleet management"
     parser = argparse.ArgumentParser(description=c7n_desc)
@@ -226,6 +238,30 @@ def setup_parser():
         "--skip-validation",
         action="store_true",
         help="Skips validation of policies (assumes you've run the validate command seperately).")
+    run.add_argument(
+        "--shared-fetch", action="store_true", default=False,
+        help="Fetch each resource population once and share it across policies "
+        "with the same resource type, source and query.")
+    run.add_argument(
+        "--stream-resources", action="store_true", default=False,
+        help="Augment and filter resources a page at a time, only retaining "
+        "matched resources, to bound memory usage on large populations.")
+    run.add_argument(
+        "--augment-on-demand", action="store_true", default=False,
+        help="Only fetch the resource augment data (ie. s3 bucket policies and acls) "
+        "a policy's filters and actions use, the rest is omitted from resource output.")
+    run.add_argument(
+        "--batch-metrics", action="store_true", default=False,
+        help="Retrieve metrics filter data with batched GetMetricData calls, "
+        "sharing identical metric queries across policies.")
+    run.add_argument(
+        "--parallel", type=int, default=0, metavar="N",
+        help="Execute up to N policies concurrently")
+    run.add_argument(
+        "--service-limit", action="append", default=[], dest="service_limits",
+        type=_service_limit, metavar="SERVICE=N",
+        help="Repeatable. Max policies concurrently querying a service "
+        "when running with --parallel")
 
     metrics_help = ("Emit metrics to provider metrics. Specify 'aws', 'gcp', or 'azure'. "
             "For more details on aws metrics options, see: "
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 from collections import Counter, defaultdict
+from concurrent.futures import as_completed
 from datetime import timedelta, datetime
 from functools import wraps
 import json
@@ -14,8 +15,12 @@ import yaml
 from yaml.constructor import ConstructorError
 
 from c7n import deprecated
+from c7n.credentials import credential_broker
 from c7n.exceptions import ClientError, PolicyValidationError
+from c7n.filters.related import related_index
+from c7n.executor import KeyedLimiter, ThreadPoolExecutor
 from c7n.loader import SourceLocator
+from c7n.planner import FetchPlanner
 from c7n.provider import clouds
 from c7n.policy import Policy, PolicyCollection, load as policy_load
 from c7n.schema import ElementSchema, StructureParser, generate
@@ -283,6 +288,42 @@ def validate(options):
         sys.exit(1)
 
 
+# Services with low api rate limits, where running many policies
+# concurrently only produces throttling.
+SERVICE_CONCURRENCY = {
+    'cloudfront': 2,
+    'config': 2,
+    'iam': 2,
+    'organizations': 1,
+    'route53': 1,
+    'support': 1,
+    'waf': 1,
+}
+
+
+def _policy_service(policy):
+    model = getattr(policy.resource_manager, 'resource_type', None)
+    return getattr(model, 'service', None)
+
+
+def _interleave_services(policies):
+    """Order policies round robin by service.
+
+    Avoids filling the worker pool with policies that are all waiting
+    on the same service concurrency limit.
+    """
+    by_service = {}
+    for p in policies:
+        by_service.setdefault(_policy_service(p), []).append(p)
+    return [p for p in itertools.chain(
+        *itertools.zip_longest(*by_service.values())) if p is not None]
+
+
+def _run_limited(limiter, policy):
+    with limiter.acquire(_policy_service(policy)):
+        return policy()
+
+
 @policy_command
 def run(options, policies: List[Policy]) -> None:
     exit_code = 0
@@ -296,18 +337,58 @@ def run(options, policies: List[Policy]) -> None:
             log.exception("Unable to assume role %s", options.assume_role)
             sys.exit(1)
 
+    planner = None
+    if getattr(options, 'shared_fetch', False):
+        planner = FetchPlanner(policies)
+        planner.plan()
+
     errored_policies: List[str] = []
-    for policy in policies:
-        try:
-            policy()
-        except Exception:
-            exit_code = 2
-            errored_policies.append(policy.name)
-            if options.debug:
-                raise
-            log.exception(
-                "Error while executing policy %s, continuing" % (
-                    policy.name))
+
+    def policy_error(policy, error):
+        errored_policies.append(policy.name)
+        if options.debug:
+            raise error
+        log.error(
+            "Error while executing policy %s, continuing" % (policy.name),
+            exc_info=error)
+
+    parallel = getattr(options, 'parallel', None) or 0
+    if parallel > 1:
+        limits = dict(SERVICE_CONCURRENCY)
+        limits.update(getattr(options, 'service_limits', None) or ())
+        limiter = KeyedLimiter(limits)
+        with ThreadPoolExecutor(max_workers=parallel) as w:
+            futures = {
+                w.submit(_run_limited, limiter, p): p for p in
+                _interleave_services(policies)}
+            for f in as_completed(futures):
+                if f.exception():
+                    exit_code = 2
+                    policy_error(futures[f], f.exception())
+    else:
+        for policy in policies:
+            try:
+                policy()
+            except Exception as e:
+                exit_code = 2
+                policy_error(policy, e)
+    if planner is not None:
+        stats = planner.get_stats()
+        log.info(
+            "shared fetch: %d policies in %d groups, %d api enumerations saved",
+            stats['policies'], stats['groups'], stats['saved'])
+    related_stats = related_index.get_stats()
+    if related_stats:
+        log.debug(
+            "related index: %d hits, %d misses, %d full loads",
+            related_stats.get('hits', 0), related_stats.get('misses', 0),
+            related_stats.get('loads', 0))
+    credential_stats = credential_broker.get_stats()
+    if credential_stats:
+        log.debug(
+            "assumed role credentials: %d hits, %d file hits, %d misses",
+            credential_stats.get('hit', 0), credential_stats.get('file-hit', 0),
+            credential_stats.get('miss', 0))
     if exit_code != 0:
         log.error("The following policies had errors while executing\n - %s" % (
             "\n - ".join(errored_policies)))
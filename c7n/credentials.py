@@ -3,15 +3,26 @@
 """
 Authentication utilities
 """
+from collections import Counter
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
 import os
+import tempfile
+import threading
 
 from botocore.credentials import RefreshableCredentials
 from botocore.session import get_session
 from boto3 import Session
+from dateutil.parser import parse as parse_date
+from dateutil.tz import tzutc
 
 from c7n.version import version
 from c7n.utils import get_retry
 
+log = logging.getLogger('custodian.credentials')
+
 
 # we still have some issues (see #5023) to work through to switch to
 # default regional endpoints, for now its opt-in.
@@ -63,6 +74,129 @@ class SessionFactory:
         self._subscribers = subscribers
 
 
+class CredentialBroker:
+    """Share sts assumed role credentials across sessions.
+
+    Credentials are cached by role, external id and session name, so
+    sessions for other regions and other threads reuse a single
+    AssumeRole call until shortly before the credentials expire.
+
+    Setting C7N_CREDENTIAL_CACHE to a directory also shares them across
+    processes via files only readable by the current user, c7n-org does
+    this for its worker processes. Credentials nearing expiry are
+    refreshed ahead of time in a background thread.
+    """
+
+    # botocore refreshes credentials within 15 minutes of expiry, anything
+    # we hand out needs to be valid for longer than that.
+    min_ttl = timedelta(minutes=16)
+    prefetch_ttl = timedelta(minutes=20)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.credentials = {}
+        self.key_locks = {}
+        self.prefetching = set()
+        self.stats = Counter()
+
+    @staticmethod
+    def get_key(role_arn, external_id, session_name):
+        return hashlib.sha256(json.dumps(
+            [role_arn, external_id, session_name]).encode('utf8')).hexdigest()
+
+    def get(self, key, fetch):
+        """Get credentials metadata for key, calling fetch on a miss."""
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            creds = self.credentials.get(key)
+            if self.get_ttl(creds) > self.min_ttl:
+                self.stats['hit'] += 1
+            else:
+                creds = self.load(key)
+                if self.get_ttl(creds) > self.min_ttl:
+                    self.stats['file-hit'] += 1
+                else:
+                    self.stats['miss'] += 1
+                    creds = self.fetch(key, fetch)
+                self.credentials[key] = creds
+        if self.min_ttl < self.get_ttl(creds) < self.prefetch_ttl:
+            self.prefetch(key, fetch)
+        return creds
+
+    def fetch(self, key, fetch):
+        creds = fetch()
+        self.credentials[key] = creds
+        self.save(key, creds)
+        return creds
+
+    def prefetch(self, key, fetch):
+        with self.lock:
+            if key in self.prefetching:
+                return
+            self.prefetching.add(key)
+
+        def refresh():
+            try:
+                with self.key_locks[key]:
+                    if self.get_ttl(self.credentials.get(key)) < self.prefetch_ttl:
+                        self.stats['prefetch'] += 1
+                        self.fetch(key, fetch)
+            except Exception as e:
+                log.debug("credential prefetch failed %s", e)
+            finally:
+                with self.lock:
+                    self.prefetching.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    @staticmethod
+    def get_ttl(creds):
+        if not creds:
+            return timedelta(0)
+        return parse_date(creds['expiry_time']) - datetime.now(tzutc())
+
+    def get_path(self, key):
+        cache_dir = os.environ.get('C7N_CREDENTIAL_CACHE')
+        if cache_dir:
+            return os.path.join(cache_dir, '%s.json' % key)
+
+    def load(self, key):
+        path = self.get_path(key)
+        if not path:
+            return None
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, creds):
+        path = self.get_path(key)
+        if not path:
+            return
+        try:
+            # temp files are created user readable only, and renamed into
+            # place so readers never see a partial file.
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=os.path.dirname(path), suffix='.tmp', delete=False) as fh:
+                json.dump(creds, fh)
+            os.replace(fh.name, path)
+        except OSError as e:
+            log.debug("unable to save credentials to cache %s", e)
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def clear(self):
+        with self.lock:
+            self.credentials = {}
+            self.stats = Counter()
+
+
+credential_broker = CredentialBroker()
+
+
 def assumed_session(role_arn, session_name, session=None, region=None, external_id=None):
     """STS Role assume a boto3.Session
 
@@ -82,8 +216,9 @@ def assumed_session(role_arn, session_name, session=None, region=None, external_
         session = Session()
 
     retry = get_retry(('Throttling',))
+    cache_key = credential_broker.get_key(role_arn, external_id, session_name)
 
-    def refresh():
+    def assume_role():
 
         parameters = {"RoleArn": role_arn, "RoleSessionName": session_name}
 
@@ -100,6 +235,9 @@ def assumed_session(role_arn, session_name, session=None, region=None, external_
             # Silly that we basically stringify so it can be parsed again
             expiry_time=credentials['Expiration'].isoformat())
 
+    def refresh():
+        return credential_broker.get(cache_key, assume_role)
+
     session_credentials = RefreshableCredentials.create_from_metadata(
         metadata=refresh(),
         refresh_using=refresh,
@@ -92,6 +92,7 @@ class ExecutionContext:
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
         if exc_type is not None and self.metrics:
             self.metrics.put_metric('PolicyException', 1, "Count")
+        self.put_cache_metrics()
         self.output.write_file('metadata.json', dumps(self.get_metadata(), indent=2))
         self.api_stats.__exit__(exc_type, exc_value, exc_traceback)
 
@@ -112,6 +113,14 @@ class ExecutionContext:
         if os.environ.get('C7N_TEST_RUN'):
             reset_session_cache()
 
+    def put_cache_metrics(self):
+        get_cache = getattr(self.policy, 'get_cache', None)
+        if get_cache is None:
+            return
+        for name, value in get_cache().get_stats().items():
+            self.metrics.put_metric(
+                name, value, name.startswith('CacheBytes') and 'Bytes' or 'Count')
+
     def get_metadata(self, include=('sys-stats', 'api-stats', 'metrics')):
         t = time.time()
         md = {
@@ -130,6 +139,12 @@ class ExecutionContext:
             md['sys-stats'] = self.sys_stats.get_metadata()
         if 'api-stats' in include and self.api_stats:
             md['api-stats'] = self.api_stats.get_metadata()
+            get_limit_metadata = getattr(self.api_stats, 'get_limit_metadata', None)
+            if get_limit_metadata:
+                md['api-limits'] = get_limit_metadata()
+            get_client_metadata = getattr(self.api_stats, 'get_client_metadata', None)
+            if get_client_metadata:
+                md['api-clients'] = get_client_metadata()
         if 'metrics' in include and self.metrics:
             md['metrics'] = self.metrics.get_metadata()
         return md
@@ -1,10 +1,24 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor)  # noqa
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor  # noqa
+from contextlib import contextmanager
 
+import contextvars
 import threading
 
 
+class ThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """Thread pool running tasks in a copy of the submitting thread's context.
+
+    Keeps context variables, ie. a parallel policy's log capture, with
+    work the policy hands off to worker threads.
+    """
+
+    def submit(self, fn, *args, **kw):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kw)
+
+
 class MainThreadExecutor:
     """ For running tests.
 
@@ -68,3 +82,24 @@ class MainThreadFuture:
 
     def add_done_callback(self, fn):
         return fn(self)
+
+
+class KeyedLimiter:
+    """Bound the concurrency of work sharing a key, ie. an api service.
+
+    Keys without a configured limit are not bounded.
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self.semaphores = {
+            k: threading.BoundedSemaphore(v) for k, v in self.limits.items()}
+
+    @contextmanager
+    def acquire(self, key):
+        semaphore = self.semaphores.get(key)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
@@ -7,6 +7,7 @@ import copy
 import datetime
 from datetime import timedelta
 import fnmatch
+import functools
 import ipaddress
 import logging
 import operator
@@ -22,7 +23,8 @@ from c7n.element import Element
 from c7n.exceptions import PolicyValidationError
 from c7n.registry import PluginRegistry
 from c7n.resolver import ValuesFrom
-from c7n.utils import set_annotation, type_schema, parse_cidr, parse_date
+from c7n.utils import (
+    set_annotation, type_schema, parse_cidr, parse_date, get_tag_value)
 from c7n.manager import iter_filters
 
 
@@ -181,6 +183,15 @@ class Filter(Element):
 
     log = logging.getLogger('custodian.filters')
 
+    # Filters that need the complete resource population at once, and
+    # so can't be evaluated over a stream of resource chunks.
+    barrier = False
+
+    # Augmented resource keys the filter reads, for resources which can
+    # skip fetching augment data a policy doesn't need. None means
+    # unknown, ie. all of them.
+    augment_keys = None
+
     def __init__(self, data, manager=None):
         self.data = data
         self.manager = manager
@@ -230,20 +241,7 @@ class BaseValueFilter(Filter):
     def get_resource_value(self, k, i, regex=None):
         r = None
         if k.startswith('tag:'):
-            tk = k.split(':', 1)[1]
-            if 'Tags' in i:
-                for t in i.get("Tags", []):
-                    if t.get('Key') == tk:
-                        r = t.get('Value')
-                        break
-            # GCP schema: 'labels': {'key': 'value'}
-            elif 'labels' in i:
-                r = i.get('labels', {}).get(tk, None)
-            # GCP has a secondary form of labels called tags
-            # as labels without values.
-            # Azure schema: 'tags': {'key': 'value'}
-            elif 'tags' in i:
-                r = i.get('tags', {}).get(tk, None)
+            r = get_tag_value(i, k.split(':', 1)[1])
         elif k in i:
             r = i.get(k)
         elif k not in self.expr:
@@ -256,6 +254,40 @@ class BaseValueFilter(Filter):
             r = ValueRegex(regex).get_resource_value(r)
         return r
 
+    def get_value_accessor(self, k, regex=None):
+        """Compile a key into a function returning a resource's value.
+
+        Semantically equivalent to :meth:`get_resource_value`, but with the
+        key parsing, expression and regex compilation done once up front.
+        """
+        if k.startswith('tag:'):
+            tk = k.split(':', 1)[1]
+
+            def accessor(i):
+                return get_tag_value(i, tk)
+        else:
+            try:
+                expr = jmespath.compile(k)
+            except jmespath.exceptions.JMESPathError:
+                # only an error if the key isn't a literal resource attribute
+                expr = None
+
+            def accessor(i):
+                if k in i:
+                    return i.get(k)
+                elif expr is None:
+                    return jmespath.search(k, i)
+                return expr.search(i)
+
+        if not regex:
+            return accessor
+
+        value_regex = ValueRegex(regex)
+
+        def regex_accessor(i):
+            return value_regex.get_resource_value(accessor(i))
+        return regex_accessor
+
     def _validate_value_regex(self, regex):
         """Specific validation for `value_regex` type
 
@@ -301,6 +333,9 @@ def union_list(a, b):
 
 class BooleanGroupFilter(Filter):
 
+    # the group's filters are visited on their own
+    augment_keys = ()
+
     def __init__(self, data, registry, manager):
         super(BooleanGroupFilter, self).__init__(data)
         self.registry = registry
@@ -345,22 +380,11 @@ class Or(BooleanGroupFilter):
         return False
 
     def process_set(self, resources, event):
-        rtype_id = self.get_resource_type_id()
-        compiled = None
-        if '.' in rtype_id:
-            compiled = jmespath.compile(rtype_id)
-            resource_map = {compiled.search(r): r for r in resources}
-        else:
-            resource_map = {r[rtype_id]: r for r in resources}
-        results = set()
+        index = ResourceIndex(resources, self.get_resource_type_id())
+        matched = set()
         for f in self.filters:
-            if compiled:
-                results = results.union([
-                    compiled.search(r) for r in f.process(resources, event)])
-            else:
-                results = results.union([
-                    r[rtype_id] for r in f.process(resources, event)])
-        return [resource_map[r_id] for r_id in results]
+            matched.update(index.get_positions(f.process(resources, event)))
+        return index.select(matched)
 
 
 class And(BooleanGroupFilter):
@@ -398,29 +422,61 @@ class Not(BooleanGroupFilter):
         return False
 
     def process_set(self, resources, event):
-        rtype_id = self.get_resource_type_id()
-        compiled = None
-        if '.' in rtype_id:
-            compiled = jmespath.compile(rtype_id)
-            resource_map = {compiled.search(r): r for r in resources}
-        else:
-            resource_map = {r[rtype_id]: r for r in resources}
-        sweeper = AnnotationSweeper(rtype_id, resources)
+        sweeper = AnnotationSweeper(self.get_resource_type_id(), resources)
+        index = sweeper.index
 
         for f in self.filters:
             resources = f.process(resources, event)
             if not resources:
                 break
 
-        before = set(resource_map.keys())
-        if compiled:
-            after = {compiled.search(r) for r in resources}
-        else:
-            after = {r[rtype_id] for r in resources}
-        results = before - after
+        results = set(range(len(index))).difference(index.get_positions(resources))
         sweeper.sweep([])
 
-        return [resource_map[r_id] for r_id in results]
+        return index.select(results)
+
+
+class ResourceIndex:
+    """Positional index over a resource population.
+
+    Boolean filter blocks evaluate their child filters against the same
+    population, the index maps the subsets returned back to stable
+    integer positions, so that block results are computed with set
+    operations, and returned in population order.
+
+    Lookups are by object identity, falling back to the resource id for
+    filters that return copies of the resources they were given.
+    """
+
+    def __init__(self, resources, id_key):
+        self.resources = list(resources)
+        self.id_key = id_key
+        self.positions = {id(r): idx for idx, r in enumerate(self.resources)}
+        self.id_positions = None
+
+    def __len__(self):
+        return len(self.resources)
+
+    def get_id(self, r):
+        if '.' in self.id_key:
+            return jmespath.search(self.id_key, r)
+        return r[self.id_key]
+
+    def get_positions(self, resources):
+        positions = set()
+        for r in resources:
+            idx = self.positions.get(id(r))
+            if idx is None:
+                if self.id_positions is None:
+                    self.id_positions = {
+                        self.get_id(ir): idx for idx, ir in enumerate(self.resources)}
+                idx = self.id_positions.get(self.get_id(r))
+            if idx is not None:
+                positions.add(idx)
+        return positions
+
+    def select(self, positions):
+        return [self.resources[idx] for idx in sorted(positions)]
 
 
 class AnnotationSweeper:
@@ -430,36 +486,36 @@ class AnnotationSweeper:
     """
     def __init__(self, id_key, resources):
         self.id_key = id_key
-        ra_map = {}
-        resource_map = {}
-        compiled = None
-        if '.' in id_key:
-            compiled = jmespath.compile(self.id_key)
-        for r in resources:
-            if compiled:
-                id_ = compiled.search(r)
-            else:
-                id_ = r[self.id_key]
-            ra_map[id_] = {k: v for k, v in r.items() if k.startswith('c7n')}
-            resource_map[id_] = r
-        # We keep a full copy of the annotation keys to allow restore.
-        self.ra_map = copy.deepcopy(ra_map)
-        self.resource_map = resource_map
+        self.index = ResourceIndex(resources, id_key)
+        # Snapshot the annotation keys to allow restore, only resources
+        # that carry annotations need tracking.
+        self.ra_map = {}
+        for idx, r in enumerate(self.index.resources):
+            annotations = {
+                k: self.snapshot(v) for k, v in r.items() if k.startswith('c7n')}
+            if annotations:
+                self.ra_map[idx] = annotations
+
+    @staticmethod
+    def snapshot(value):
+        """Copy an annotation value, sharing it where it can't be mutated."""
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return list(value)
+        return copy.deepcopy(value)
 
     def sweep(self, resources):
-        compiled = None
-        if '.' in self.id_key:
-            compiled = jmespath.compile(self.id_key)
-            diff = set(self.ra_map).difference([compiled.search(r) for r in resources])
-        else:
-            diff = set(self.ra_map).difference([r[self.id_key] for r in resources])
-        for rid in diff:
+        kept = self.index.get_positions(resources)
+        for idx, r in enumerate(self.index.resources):
+            if idx in kept:
+                continue
             # Clear annotations if the block filter didn't match
-            akeys = [k for k in self.resource_map[rid] if k.startswith('c7n')]
+            akeys = [k for k in r if k.startswith('c7n')]
             for k in akeys:
-                del self.resource_map[rid][k]
+                del r[k]
             # Restore annotations that may have existed prior to the block filter.
-            self.resource_map[rid].update(self.ra_map[rid])
+            r.update(self.ra_map.get(idx, ()))
 
 
 # The default LooseVersion will fail on comparing present strings, used
@@ -472,10 +528,136 @@ class ComparableVersion(version.LooseVersion):
             return False
 
 
+def convert_normalize(sentinel, value):
+    if isinstance(value, str):
+        return sentinel, value.strip().lower()
+    return sentinel, value
+
+
+def convert_integer(sentinel, value):
+    try:
+        value = int(str(value).strip())
+    except ValueError:
+        value = 0
+    return sentinel, value
+
+
+def convert_size(sentinel, value):
+    try:
+        return sentinel, len(value)
+    except TypeError:
+        return sentinel, 0
+
+
+def convert_unique_size(sentinel, value):
+    try:
+        return sentinel, len(set(value))
+    except TypeError:
+        return sentinel, 0
+
+
+def convert_swap(sentinel, value):
+    return value, sentinel
+
+
+def convert_date(sentinel, value):
+    return parse_date(sentinel), parse_date(value)
+
+
+def convert_age(sentinel, value):
+    if not isinstance(sentinel, datetime.datetime):
+        sentinel = datetime.datetime.now(tz=tzutc()) - timedelta(sentinel)
+    value = parse_date(value)
+    if value is None:
+        # compatiblity
+        value = 0
+    # Reverse the age comparison, we want to compare the value being
+    # greater than the sentinel typically. Else the syntax for age
+    # comparisons is intuitively wrong.
+    return value, sentinel
+
+
+def convert_cidr(sentinel, value):
+    s = parse_cidr(sentinel)
+    v = parse_cidr(value)
+    if (isinstance(s, ipaddress._BaseAddress) and isinstance(v, ipaddress._BaseNetwork)):
+        return v, s
+    return s, v
+
+
+def convert_cidr_size(sentinel, value):
+    cidr = parse_cidr(value)
+    if cidr:
+        return sentinel, cidr.prefixlen
+    return sentinel, 0
+
+
+def convert_expiration(sentinel, value):
+    # Allows for expiration filtering, for events in the future as opposed
+    # to events in the past which age filtering allows for.
+    if not isinstance(sentinel, datetime.datetime):
+        sentinel = datetime.datetime.now(tz=tzutc()) + timedelta(sentinel)
+    value = parse_date(value)
+    if value is None:
+        value = 0
+    return sentinel, value
+
+
+def convert_version(sentinel, value):
+    # Allows for comparing version numbers, for things that you expect a
+    # minimum version number.
+    return ComparableVersion(sentinel), ComparableVersion(value)
+
+
+# value_type conversions, each taking the filter value (sentinel) and
+# the resource value, returning the pair to compare. `expr` is handled by
+# the filter as it needs to evaluate against the resource.
+VALUE_TYPE_CONVERTERS = {
+    'normalize': convert_normalize,
+    'integer': convert_integer,
+    'size': convert_size,
+    'unique_size': convert_unique_size,
+    'swap': convert_swap,
+    'date': convert_date,
+    'age': convert_age,
+    'cidr': convert_cidr,
+    'cidr_size': convert_cidr_size,
+    'expiration': convert_expiration,
+    'version': convert_version,
+}
+
+# value types whose conversion never alters the filter value.
+STATIC_VALUE_TYPES = {'normalize', 'integer', 'size', 'unique_size', 'cidr_size'}
+
+# filter values with special meaning, rather than a literal comparison.
+VALUE_SENTINELS = ('absent', 'present', 'not-null', 'empty')
+
+
+def compare_value(r, v, op=None):
+    """Compare a resource value against a filter value."""
+    if r is None and v == 'absent':
+        return True
+    elif r is not None and v == 'present':
+        return True
+    elif v == 'not-null' and r:
+        return True
+    elif v == 'empty' and not r:
+        return True
+    elif op:
+        try:
+            return op(r, v)
+        except TypeError:
+            return False
+    elif r == v:
+        return True
+    return False
+
+
 class ValueFilter(BaseValueFilter):
     """Generic value filter using jmespath
     """
     op = v = vtype = None
+    accessor = matcher = compiled_data = None
 
     schema = {
         'type': 'object',
@@ -498,6 +680,10 @@ class ValueFilter(BaseValueFilter):
     annotate = True
     required_keys = {'value', 'key'}
 
+    @property
+    def barrier(self):
+        return self.data.get('value_type') == 'resource_count'
+
     def _validate_resource_count(self):
         """ Specific validation for `resource_count` type
 
@@ -558,8 +744,9 @@ class ValueFilter(BaseValueFilter):
                     raise PolicyValidationError(
                         "Invalid regex: %s %s" % (e, self.data))
         if 'value_regex' in self.data:
-            return self._validate_value_regex(self.data['value_regex'])
+            self._validate_value_regex(self.data['value_regex'])
 
+        self.compile()
         return self
 
     def __call__(self, i):
@@ -584,122 +771,113 @@ class ValueFilter(BaseValueFilter):
     def get_resource_value(self, k, i):
         return super(ValueFilter, self).get_resource_value(k, i, self.data.get('value_regex'))
 
-    def match(self, i):
-        if self.v is None and len(self.data) == 1:
+    def compile(self):
+        """Compile the filter's key accessor and value conversion.
+
+        Done once at validation, or on first match for filters that
+        are constructed and evaluated directly, so that evaluating a
+        resource doesn't re-parse the filter data.
+        """
+        if len(self.data) == 1:
             [(self.k, self.v)] = self.data.items()
-        elif self.v is None and not hasattr(self, 'content_initialized'):
+        else:
             self.k = self.data.get('key')
             self.op = self.data.get('op')
+            self.vtype = self.data.get('value_type')
+
+        # respect subclasses customizing value retrieval or conversion.
+        if type(self).get_resource_value is ValueFilter.get_resource_value:
+            self.accessor = self.get_value_accessor(
+                self.k, self.data.get('value_regex'))
+        else:
+            self.accessor = functools.partial(self.get_resource_value, self.k)
+        self.matcher = None
+        self.compiled_data = dict(self.data)
+        return self
+
+    def get_matcher(self):
+        """Build the resource match function, with the filter value resolved."""
+        # some filters finalize their data at runtime, after validation.
+        if self.compiled_data != self.data:
+            self.compile()
+        if len(self.data) != 1:
             if 'value_from' in self.data:
                 values = ValuesFrom(self.data['value_from'], self.manager)
                 self.v = values.get_values()
             else:
                 self.v = self.data.get('value')
-            self.content_initialized = True
-            self.vtype = self.data.get('value_type')
+        self.content_initialized = True
+
+        accessor, v = self.accessor, self.v
+        op = self.op and OPERATORS[self.op] or None
+        missing = () if self.op in ('in', 'not-in') else None
+
+        if self.vtype is None or (
+                self.vtype in STATIC_VALUE_TYPES and
+                type(self).process_value_type is ValueFilter.process_value_type):
+            convert = self.vtype and VALUE_TYPE_CONVERTERS[self.vtype] or None
+            if op and not (isinstance(v, str) and v in VALUE_SENTINELS):
+                # common case, a plain comparison
+                def matcher(i):
+                    r = accessor(i)
+                    if r is None:
+                        r = missing
+                    if convert is not None:
+                        r = convert(v, r)[1]
+                    try:
+                        return op(r, v)
+                    except TypeError:
+                        return False
+                return matcher
+
+            def matcher(i):
+                r = accessor(i)
+                if r is None:
+                    r = missing
+                if convert is not None:
+                    r = convert(v, r)[1]
+                return compare_value(r, v, op)
+            return matcher
+
+        if (self.vtype == 'cidr' and
+                type(self).process_value_type is ValueFilter.process_value_type):
+            # parse the filter's cidr(s) once, lists compile to a CidrSet
+            cidr = parse_cidr(v)
+
+            def matcher(i):
+                r = accessor(i)
+                if r is None:
+                    r = missing
+                r = parse_cidr(r)
+                if (isinstance(cidr, ipaddress._BaseAddress) and
+                        isinstance(r, ipaddress._BaseNetwork)):
+                    return compare_value(cidr, r, op)
+                return compare_value(r, cidr, op)
+            return matcher
+
+        def matcher(i):
+            r = accessor(i)
+            if r is None:
+                r = missing
+            rv, r = self.process_value_type(v, r, i)
+            return compare_value(r, rv, op)
+        return matcher
 
+    def match(self, i):
+        if self.matcher is None:
+            self.matcher = self.get_matcher()
         if i is None:
             return False
-
-        # value extract
-        r = self.get_resource_value(self.k, i)
-
-        if self.op in ('in', 'not-in') and r is None:
-            r = ()
-
-        # value type conversion
-        if self.vtype is not None:
-            v, r = self.process_value_type(self.v, r, i)
-        else:
-            v = self.v
-
-        # Value match
-        if r is None and v == 'absent':
-            return True
-        elif r is not None and v == 'present':
-            return True
-        elif v == 'not-null' and r:
-            return True
-        elif v == 'empty' and not r:
-            return True
-        elif self.op:
-            op = OPERATORS[self.op]
-            try:
-                return op(r, v)
-            except TypeError:
-                return False
-        elif r == v:
-            return True
-
-        return False
+        return self.matcher(i)
 
     def process_value_type(self, sentinel, value, resource):
-        if self.vtype == 'normalize' and isinstance(value, str):
-            return sentinel, value.strip().lower()
-
-        elif self.vtype == 'expr':
+        if self.vtype == 'expr':
             sentinel = self.get_resource_value(sentinel, resource)
             return sentinel, value
-
-        elif self.vtype == 'integer':
-            try:
-                value = int(str(value).strip())
-            except ValueError:
-                value = 0
-        elif self.vtype == 'size':
-            try:
-                return sentinel, len(value)
-            except TypeError:
-                return sentinel, 0
-        elif self.vtype == 'unique_size':
-            try:
-                return sentinel, len(set(value))
-            except TypeError:
-                return sentinel, 0
-        elif self.vtype == 'swap':
-            return value, sentinel
-        elif self.vtype == 'date':
-            return parse_date(sentinel), parse_date(value)
-        elif self.vtype == 'age':
-            if not isinstance(sentinel, datetime.datetime):
-                sentinel = datetime.datetime.now(tz=tzutc()) - timedelta(sentinel)
-            value = parse_date(value)
-            if value is None:
-                # compatiblity
-                value = 0
-            # Reverse the age comparison, we want to compare the value being
-            # greater than the sentinel typically. Else the syntax for age
-            # comparisons is intuitively wrong.
-            return value, sentinel
-        elif self.vtype == 'cidr':
-            s = parse_cidr(sentinel)
-            v = parse_cidr(value)
-            if (isinstance(s, ipaddress._BaseAddress) and isinstance(v, ipaddress._BaseNetwork)):
-                return v, s
-            return s, v
-        elif self.vtype == 'cidr_size':
-            cidr = parse_cidr(value)
-            if cidr:
-                return sentinel, cidr.prefixlen
-            return sentinel, 0
-
-        # Allows for expiration filtering, for events in the future as opposed
-        # to events in the past which age filtering allows for.
-        elif self.vtype == 'expiration':
-            if not isinstance(sentinel, datetime.datetime):
-                sentinel = datetime.datetime.now(tz=tzutc()) + timedelta(sentinel)
-            value = parse_date(value)
-            if value is None:
-                value = 0
+        convert = VALUE_TYPE_CONVERTERS.get(self.vtype)
+        if convert is None:
             return sentinel, value
-
-        # Allows for comparing version numbers, for things that you expect a minimum version number.
-        elif self.vtype == 'version':
-            s = ComparableVersion(sentinel)
-            v = ComparableVersion(value)
-            return s, v
-
-        return sentinel, value
+        return convert(sentinel, value)
 
 
 class AgeFilter(Filter):
@@ -755,6 +933,7 @@ class EventFilter(ValueFilter):
 
     schema = type_schema('event', rinherit=ValueFilter.schema)
     schema_alias = True
+    augment_keys = ()
 
     def validate(self):
         if 'mode' not in self.manager.data:
@@ -794,12 +973,13 @@ class ValueRegex:
 
     def __init__(self, expr):
         self.expr = expr
+        self.regex = re.compile(expr)
 
     def get_resource_value(self, resource):
         if resource is None:
             return resource
         try:
-            capture = re.match(self.expr, resource)
+            capture = self.regex.match(resource)
         except (ValueError, TypeError):
             return None
         if capture is None:  # regex didn't capture anything
@@ -844,6 +1024,7 @@ class ReduceFilter(BaseValueFilter):
 
     """
     annotate = False
+    barrier = True
 
     schema = {
         'type': 'object',
@@ -4,8 +4,9 @@
 CloudWatch Metrics suppport for resources
 """
 import re
+import threading
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from concurrent.futures import as_completed
 from datetime import datetime, timedelta
 
@@ -14,6 +15,40 @@ from c7n.filters.core import Filter, OPERATORS
 from c7n.utils import local_session, type_schema, chunks
 
 
+class MetricCache:
+    """Process wide cache of metric datapoints.
+
+    Keyed by account, region, namespace, metric, dimensions, statistic,
+    period and window, so that identical queries across filters and
+    policies in a run are only retrieved once. Metric windows are
+    aligned to retention boundaries, so keys naturally roll over as
+    time moves on, older entries are evicted past a fixed size.
+    """
+
+    max_entries = 100000
+
+    def __init__(self):
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.data.get(key)
+
+    def update(self, results):
+        with self.lock:
+            self.data.update(results)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+metric_cache = MetricCache()
+
+
 class MetricsFilter(Filter):
     """Supports cloud watch metrics filters on resources.
 
@@ -67,6 +102,10 @@ class MetricsFilter(Filter):
     policy to treat their request counts as 0.
 
     Note the default statistic for metrics is Average.
+
+    When running with ``--batch-metrics``, metrics are retrieved with
+    GetMetricData, up to 500 resources per api call, and identical
+    metric queries are shared across filters and policies in the run.
     """
 
     schema = type_schema(
@@ -91,6 +130,7 @@ class MetricsFilter(Filter):
     permissions = ("cloudwatch:GetMetricStatistics",)
 
     MAX_QUERY_POINTS = 50850
+    MAX_METRIC_DATA_QUERIES = 500
     MAX_RESULT_POINTS = 1440
 
     # Default per service, for overloaded services like ec2
@@ -143,6 +183,12 @@ class MetricsFilter(Filter):
             raise PolicyValidationError(
                 "metrics filter days value (%s) cannot exceed 455" % self.days)
 
+    def get_permissions(self):
+        perms = tuple(super(MetricsFilter, self).get_permissions())
+        if self.manager and getattr(self.manager.config, 'batch_metrics', False):
+            perms += ('cloudwatch:GetMetricData',)
+        return perms
+
     def get_metric_window(self):
         """Determine start and end times for the CloudWatch metric window
 
@@ -193,6 +239,9 @@ class MetricsFilter(Filter):
         self.namespace = ns
 
         self.log.debug("Querying metrics for %d", len(resources))
+        if getattr(self.manager.config, 'batch_metrics', False):
+            return self.process_batch(resources)
+
         matched = []
         with self.executor_factory(max_workers=3) as w:
             futures = []
@@ -220,25 +269,30 @@ class MetricsFilter(Filter):
             dims.append({'Name': k, 'Value': v})
         return dims
 
+    def get_annotation_key(self):
+        # Note this annotation cache is policy scoped, not across
+        # policies, still the lack of full qualification on the key
+        # means multiple filters within a policy using the same metric
+        # across different periods or dimensions would be problematic.
+        return "%s.%s.%s.%s" % (self.namespace, self.metric, self.statistics, str(self.days))
+
+    def get_resource_dimensions(self, resource):
+        # if we overload dimensions with multiple resources we get
+        # the statistics/average over those resources.
+        dimensions = self.get_dimensions(resource)
+        # Merge in any filter specified metrics, get_dimensions is
+        # commonly overridden so we can't do it there.
+        dimensions.extend(self.get_user_dimensions())
+        return dimensions
+
     def process_resource_set(self, resource_set):
         client = local_session(
             self.manager.session_factory).client('cloudwatch')
 
         matched = []
+        key = self.get_annotation_key()
         for r in resource_set:
-            # if we overload dimensions with multiple resources we get
-            # the statistics/average over those resources.
-            dimensions = self.get_dimensions(r)
-            # Merge in any filter specified metrics, get_dimensions is
-            # commonly overridden so we can't do it there.
-            dimensions.extend(self.get_user_dimensions())
-
             collected_metrics = r.setdefault('c7n.metrics', {})
-            # Note this annotation cache is policy scoped, not across
-            # policies, still the lack of full qualification on the key
-            # means multiple filters within a policy using the same metric
-            # across different periods or dimensions would be problematic.
-            key = "%s.%s.%s.%s" % (self.namespace, self.metric, self.statistics, str(self.days))
 
             params = dict(
                 Namespace=self.namespace,
@@ -246,7 +300,7 @@ class MetricsFilter(Filter):
                 StartTime=self.start,
                 EndTime=self.end,
                 Period=self.period,
-                Dimensions=dimensions
+                Dimensions=self.get_resource_dimensions(r)
             )
 
             stats_key = (self.statistics in self.standard_stats
@@ -257,31 +311,116 @@ class MetricsFilter(Filter):
                 collected_metrics[key] = client.get_metric_statistics(
                     **params)['Datapoints']
 
-            # In certain cases CloudWatch reports no data for a metric.
-            # If the policy specifies a fill value for missing data, add
-            # that here before testing for matches. Otherwise, skip
-            # matching entirely.
-            if len(collected_metrics[key]) == 0:
-                if 'missing-value' not in self.data:
+            if self.match_resource(r, collected_metrics[key]):
+                matched.append(r)
+        return matched
+
+    def process_batch(self, resources):
+        """Retrieve metrics with GetMetricData, sharing results via the metric cache."""
+        client = local_session(
+            self.manager.session_factory).client('cloudwatch')
+        key = self.get_annotation_key()
+        cache_prefix = (
+            getattr(self.manager.config, 'account_id', None), client.meta.region_name,
+            self.namespace, self.metric, self.statistics, self.period,
+            self.start, self.end)
+
+        resource_metrics, queries = [], {}
+        for r in resources:
+            collected_metrics = r.setdefault('c7n.metrics', {})
+            if key in collected_metrics:
+                resource_metrics.append((r, None))
+                continue
+            dimensions = self.get_resource_dimensions(r)
+            metric_key = cache_prefix + (tuple(
+                (d['Name'], d['Value']) for d in dimensions),)
+            resource_metrics.append((r, metric_key))
+            if metric_key not in queries and metric_cache.get(metric_key) is None:
+                queries[metric_key] = dimensions
+
+        with self.executor_factory(max_workers=3) as w:
+            futures = [
+                w.submit(self.get_metric_data, client, query_set)
+                for query_set in chunks(
+                    list(queries.items()), self.MAX_METRIC_DATA_QUERIES)]
+            for f in as_completed(futures):
+                if f.exception():
+                    self.log.warning(
+                        "CW Retrieval error: %s" % f.exception())
                     continue
-                collected_metrics[key].append({
-                    'Timestamp': self.start,
-                    self.statistics: self.data['missing-value'],
-                    'c7n:detail': 'Fill value for missing data'
-                })
-
-            if self.data.get('percent-attr'):
-                rvalue = r[self.data.get('percent-attr')]
-                if self.data.get('attr-multiplier'):
-                    rvalue = rvalue * self.data['attr-multiplier']
-                percent = (collected_metrics[key][0][self.statistics] /
-                           rvalue * 100)
-                if self.op(percent, self.value):
-                    matched.append(r)
-            elif self.op(collected_metrics[key][0][self.statistics], self.value):
+                metric_cache.update(f.result())
+
+        matched = []
+        for r, metric_key in resource_metrics:
+            collected_metrics = r['c7n.metrics']
+            if metric_key is not None:
+                datapoints = metric_cache.get(metric_key)
+                if datapoints is None:
+                    continue
+                # each resource gets its own list, as missing values are filled in.
+                collected_metrics[key] = list(datapoints)
+            if self.match_resource(r, collected_metrics[key]):
                 matched.append(r)
         return matched
 
+    def get_metric_data(self, client, query_set):
+        """Get datapoints for up to 500 metric queries in GetMetricStatistics format."""
+        ids = {}
+        metric_queries = []
+        for idx, (metric_key, dimensions) in enumerate(query_set):
+            qid = "m%d" % idx
+            ids[qid] = metric_key
+            metric_queries.append({
+                'Id': qid,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': self.namespace,
+                        'MetricName': self.metric,
+                        'Dimensions': dimensions},
+                    'Period': self.period,
+                    'Stat': self.statistics},
+                'ReturnData': True})
+
+        results = {metric_key: [] for metric_key in ids.values()}
+        stats_key = self.statistics in self.standard_stats and self.statistics or None
+        paginator = client.get_paginator('get_metric_data')
+        for page in paginator.paginate(
+                MetricDataQueries=metric_queries,
+                StartTime=self.start, EndTime=self.end):
+            for result in page['MetricDataResults']:
+                datapoints = results[ids[result['Id']]]
+                for ts, value in zip(result['Timestamps'], result['Values']):
+                    if stats_key:
+                        datapoints.append({'Timestamp': ts, stats_key: value})
+                    else:
+                        datapoints.append({
+                            'Timestamp': ts,
+                            'ExtendedStatistics': {self.statistics: value}})
+        return results
+
+    def match_resource(self, r, datapoints):
+        # In certain cases CloudWatch reports no data for a metric.
+        # If the policy specifies a fill value for missing data, add
+        # that here before testing for matches. Otherwise, skip
+        # matching entirely.
+        if len(datapoints) == 0:
+            if 'missing-value' not in self.data:
+                return False
+            datapoints.append({
+                'Timestamp': self.start,
+                self.statistics: self.data['missing-value'],
+                'c7n:detail': 'Fill value for missing data'
+            })
+
+        if self.data.get('percent-attr'):
+            rvalue = r[self.data.get('percent-attr')]
+            if self.data.get('attr-multiplier'):
+                rvalue = rvalue * self.data['attr-multiplier']
+            percent = (datapoints[0][self.statistics] /
+                       rvalue * 100)
+            return self.op(percent, self.value)
+        return self.op(datapoints[0][self.statistics], self.value)
+
 
 class ShieldMetrics(MetricsFilter):
     """Specialized metrics filter for shield
@@ -1,6 +1,9 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import importlib
+import threading
+import time
+from collections import Counter, OrderedDict
 
 import jmespath
 
@@ -8,6 +11,102 @@ from .core import ValueFilter, OPERATORS
 from c7n.query import ChildResourceQuery
 
 
+class RelatedIndex:
+    """Run scoped index of related resources, shared across filters and policies.
+
+    Related resources are indexed by account, region, resource type and
+    source. Lookups of a few ids are served from the index, with any
+    misses fetched in a single batch, while larger lookups load the
+    complete population once. Entries expire with the resource cache
+    period, and the index is bypassed when caching is disabled. The
+    least recently used entries are evicted when over max_entries.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def get_key(self, manager):
+        return (
+            getattr(manager.config, 'account_id', None),
+            getattr(manager.config, 'region', None),
+            manager.type, getattr(manager, 'source_type', None))
+
+    def get_entry(self, manager):
+        key = self.get_key(manager)
+        period = manager.config.cache_period * 60
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or now - entry['created'] > period:
+                entry = self.entries[key] = {
+                    'created': now, 'resources': {},
+                    'population': None, 'lock': threading.Lock()}
+                self.prune(now - period)
+            self.entries.move_to_end(key)
+        return entry
+
+    def prune(self, created_before):
+        # callers hold the lock
+        for k in [k for k, e in self.entries.items() if e['created'] < created_before]:
+            del self.entries[k]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_population(self, manager):
+        entry = self.get_entry(manager)
+        with entry['lock']:
+            if entry['population'] is None:
+                self.stats['loads'] += 1
+                entry['population'] = manager.resources()
+                id_key = manager.get_model().id
+                entry['resources'].update(
+                    {r[id_key]: r for r in entry['population']})
+            else:
+                self.stats['hits'] += 1
+        return entry['population']
+
+    def get_resources(self, manager, ids, threshold):
+        """Get related resources by id, or the complete population."""
+        entry = self.get_entry(manager)
+        if entry['population'] is not None:
+            self.stats['hits'] += len(ids)
+            return entry['population']
+
+        found, misses = [], []
+        for rid in ids:
+            r = entry['resources'].get(rid)
+            if r is None:
+                misses.append(rid)
+            else:
+                found.append(r)
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += len(misses)
+        if not misses:
+            return found
+        if len(misses) >= threshold:
+            return self.get_population(manager)
+
+        fetched = manager.get_resources(misses)
+        id_key = manager.get_model().id
+        with entry['lock']:
+            entry['resources'].update({r[id_key]: r for r in fetched})
+        return found + fetched
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.stats = Counter()
+
+
+related_index = RelatedIndex()
+
+
 class RelatedResourceFilter(ValueFilter):
 
     schema_alias = False
@@ -42,13 +141,22 @@ class RelatedResourceFilter(ValueFilter):
         resource_manager = self.get_resource_manager()
         related_ids = self.get_related_ids(resources)
         model = resource_manager.get_model()
-        if len(related_ids) < self.FetchThreshold:
-            related = resource_manager.get_resources(list(related_ids))
-        else:
-            related = resource_manager.resources()
+        related = self.get_related_resources(resource_manager, related_ids)
         return {r[model.id]: r for r in related
                 if r[model.id] in related_ids}
 
+    def get_related_resources(self, resource_manager, related_ids):
+        """Fetch related resources by id, or their complete population.
+
+        Served from the shared related index when resource caching is enabled.
+        """
+        if getattr(resource_manager.config, 'cache_period', 0):
+            return related_index.get_resources(
+                resource_manager, list(related_ids), self.FetchThreshold)
+        if len(related_ids) < self.FetchThreshold:
+            return resource_manager.get_resources(list(related_ids))
+        return resource_manager.resources()
+
     def get_resource_manager(self):
         mod_path, class_name = self.RelatedResource.rsplit('.', 1)
         module = importlib.import_module(mod_path)
@@ -120,8 +228,13 @@ class RelatedResourceByIdFilter(RelatedResourceFilter):
         resource_manager = self.get_resource_manager()
         related_ids = self.get_related_ids(resources)
 
+        if getattr(resource_manager.config, 'cache_period', 0):
+            population = related_index.get_population(resource_manager)
+        else:
+            population = resource_manager.resources()
+
         related = {}
-        for r in resource_manager.resources():
+        for r in population:
             matched_vpc = self.get_related_by_ids(r) & related_ids
             if matched_vpc:
                 for vpc in matched_vpc:
@@ -6,10 +6,11 @@ Cloud-Custodian AWS Lambda Entry Point
 import os
 import logging
 import json
+import time
 
 from c7n.config import Config
 from c7n.structure import StructureParser
-from c7n.resources import load_resources
+from c7n.resources import load_resources, load_resource_index
 from c7n.policy import PolicyCollection
 from c7n.utils import format_event, get_account_id_from_sts, local_session
 
@@ -135,6 +136,19 @@ def init_config(policy_config):
 init_env_globals()
 
 
+def load_policy_resources(policy_data):
+    """Load the resource types the policies use.
+
+    Archives provisioned by c7n.mu carry a frozen index of the modules
+    their policies need, which lets cold starts skip importing unused
+    filter and action modules.
+    """
+    resource_types = StructureParser().get_resource_types(policy_data)
+    if policy_data.get('modules'):
+        return load_resource_index(resource_types, policy_data['modules'])
+    return load_resources(resource_types)
+
+
 def dispatch_event(event, context):
     error = event.get('detail', {}).get('errorCode')
     if error and C7N_SKIP_EVTERR:
@@ -144,10 +158,17 @@ def dispatch_event(event, context):
     # one time initialization for cold starts.
     global policy_config, policy_data
     if policy_config is None:
+        timings = {}
+        t = time.time()
         with open('config.json') as f:
             policy_data = json.load(f)
         policy_config = init_config(policy_data)
-        load_resources(StructureParser().get_resource_types(policy_data))
+        timings['config'] = time.time() - t
+        t = time.time()
+        load_policy_resources(policy_data)
+        timings['resources'] = time.time() - t
+        log.info("Cold start timings %s", " ".join(
+            "%s:%0.3f" % (k, v) for k, v in timings.items()))
 
     if C7N_DEBUG_EVENT:
         event['debug'] = True
@@ -6,12 +6,17 @@ try:
 except ImportError:
     from backports.functools_lru_cache import lru_cache
 
+import hashlib
+import json
 import logging
 import re
 import os
+import sys
+import tempfile
 
 from c7n.exceptions import PolicyValidationError
-from c7n.policy import PolicyCollection
+from c7n.policy import PolicyCollection, execution
+from c7n.provider import clouds
 from c7n.resources import load_resources
 try:
     from c7n import schema
@@ -20,11 +25,82 @@ except ImportError:
     schema = None
 from c7n.structure import StructureParser
 from c7n.utils import load_file
+from c7n.version import version
 
 
 log = logging.getLogger('custodian.loader')
 
 
+class SchemaCache:
+    """Persist generated policy schemas across processes.
+
+    Schemas are keyed by the custodian version, the requested resource
+    types and the plugins registered on them, along with the size and
+    mtime of the modules defining those plugins. Cached schemas were
+    checked when written, so loading one skips both generation and
+    the meta schema check.
+    """
+
+    default_path = '~/.cache/cloud-custodian/schema'
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+
+    @classmethod
+    def from_env(cls):
+        """Get the schema cache, set C7N_SCHEMA_CACHE to an empty value to disable."""
+        path = os.environ.get('C7N_SCHEMA_CACHE', cls.default_path)
+        if not path:
+            return None
+        return cls(path)
+
+    def get_key(self, resource_types):
+        classes = [('mode', k, m) for k, m in sorted(execution.items())]
+        for cloud_name, cloud_type in sorted(clouds.items()):
+            for type_name, resource_type in sorted(cloud_type.resources.items()):
+                names = {"%s.%s" % (cloud_name, n) for n in (
+                    type_name,) + tuple(resource_type.type_aliases or ())}
+                if resource_types and not names.intersection(resource_types):
+                    continue
+                classes.append(('resource', '%s.%s' % (cloud_name, type_name), resource_type))
+                classes.extend(('filter', k, v) for k, v in sorted(
+                    resource_type.filter_registry.items()))
+                classes.extend(('action', k, v) for k, v in sorted(
+                    resource_type.action_registry.items()))
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps([
+            version, sorted(resource_types),
+            ['%s:%s:%s.%s' % (kind, name, c.__module__, c.__qualname__)
+             for kind, name, c in classes]]).encode('utf8'))
+        modules = {c.__module__ for _, _, c in classes}
+        modules.add(schema.__name__)
+        for m in sorted(modules):
+            path = getattr(sys.modules.get(m), '__file__', None)
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                digest.update(('%s:%d:%d' % (m, stat.st_mtime_ns, stat.st_size)).encode('utf8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.path, '%s.json' % key)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, value):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            # write and rename so concurrent processes never read a partial file
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=self.path, suffix='.tmp', delete=False) as fh:
+                json.dump(value, fh)
+            os.replace(fh.name, os.path.join(self.path, '%s.json' % key))
+        except OSError as e:
+            log.debug("schema-cache: unable to save schema %s", e)
+
+
 class SchemaValidator:
 
     def __init__(self):
@@ -73,8 +149,16 @@ class SchemaValidator:
     def _gen_schema(self, resource_types):
         if schema is None:
             raise RuntimeError("missing jsonschema dependency")
-        rt_schema = schema.generate(resource_types)
-        schema.JsonSchemaValidator.check_schema(rt_schema)
+        cache = SchemaCache.from_env()
+        key = rt_schema = None
+        if cache:
+            key = cache.get_key(resource_types)
+            rt_schema = cache.get(key)
+        if rt_schema is None:
+            rt_schema = schema.generate(resource_types)
+            schema.JsonSchemaValidator.check_schema(rt_schema)
+            if cache:
+                cache.save(key, rt_schema)
         return schema.JsonSchemaValidator(rt_schema)
 
 
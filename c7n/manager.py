@@ -14,7 +14,7 @@ try:
 except ImportError:
     resources = PluginRegistry('resources')
 
-from c7n.utils import dumps
+from c7n.utils import dumps, tag_map_scope
 
 
 def iter_filters(filters, block_end=False):
@@ -102,18 +102,19 @@ class ResourceManager:
         if event and event.get('debug', False):
             self.log.info(
                 "Filtering resources using %d filters", len(self.filters))
-        for idx, f in enumerate(self.filters, start=1):
-            if not resources:
-                break
-            rcount = len(resources)
-
-            with self.ctx.tracer.subsegment("filter:%s" % f.type):
-                resources = f.process(resources, event)
-
-            if event and event.get('debug', False):
-                self.log.debug(
-                    "Filter #%d applied %d->%d filter: %s",
-                    idx, rcount, len(resources), dumps(f.data, indent=None))
+        with tag_map_scope():
+            for idx, f in enumerate(self.filters, start=1):
+                if not resources:
+                    break
+                rcount = len(resources)
+
+                with self.ctx.tracer.subsegment("filter:%s" % f.type):
+                    resources = f.process(resources, event)
+
+                if event and event.get('debug', False):
+                    self.log.debug(
+                        "Filter #%d applied %d->%d filter: %s",
+                        idx, rcount, len(resources), dumps(f.data, indent=None))
         self.log.debug("Filtered from %d to %d %s" % (
             original, len(resources), self.__class__.__name__.lower()))
         return resources
@@ -6,6 +6,7 @@ Cloud Custodian Lambda Provisioning Support
 docs/lambda.rst
 """
 import abc
+import atexit
 import base64
 import hashlib
 import importlib
@@ -14,9 +15,11 @@ import json
 import logging
 import os
 import shutil
+import threading
 import time
 import tempfile
 import zipfile
+from collections import Counter
 
 
 # We use this for freezing dependencies for serverless environments
@@ -339,6 +342,103 @@ def _package_deps(package, deps=None, ignore=()):
     return deps
 
 
+def get_module_digest(modules, hasher=hashlib.sha256):
+    """Return a hex digest over the source files of the given modules.
+
+    Covers the same files :py:meth:`PythonPackageArchive.add_modules`
+    would archive, so unchanged modules yield the same digest.
+    """
+    digest = hasher()
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        digest.update(module_name.encode('utf8'))
+        if hasattr(module, '__path__'):
+            paths = list(module.__path__)
+        else:
+            path = getattr(module, '__file__', None) or ''
+            if path.endswith('.pyc') and os.path.isfile(path[:-1]):
+                path = path[:-1]
+            paths = [path]
+        for path in paths:
+            if os.path.isfile(path):
+                walker = [(os.path.dirname(path), [], [os.path.basename(path)])]
+            else:
+                walker = os.walk(path)
+            for root, dirs, files in walker:
+                dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+                for f in sorted(files):
+                    if f.endswith('.pyc') or f.endswith('.c'):
+                        continue
+                    f_path = os.path.join(root, f)
+                    digest.update(os.path.relpath(f_path, path).encode('utf8'))
+                    digest.update(file_digest(f_path))
+    return digest.hexdigest()
+
+
+_file_digests = {}
+
+
+def file_digest(path):
+    """Content digest of a file, memoized on its size and modification time."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    value = _file_digests.get(key)
+    if value is None:
+        with open(path, 'rb') as fh:
+            value = _file_digests[key] = checksum(fh, hashlib.sha256())
+    return value
+
+
+class ArchiveCache:
+    """Content addressed cache of base lambda archives.
+
+    Policy lambdas share a base archive of custodian and any extra
+    packages, differing only in their policy config. Base archives are
+    built once per distinct module content and new archives are seeded
+    from them, so only the per policy files get compressed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.archives = {}
+        self.stats = Counter()
+        self.cache_dir = None
+
+    def get(self, modules):
+        """Return the path of a closed base archive for the given modules."""
+        modules = tuple(sorted(modules))
+        key = get_module_digest(modules)
+        with self.lock:
+            path = self.archives.get(key)
+            if path and os.path.exists(path):
+                self.stats['hit'] += 1
+                return path
+            self.stats['miss'] += 1
+            if self.cache_dir is None:
+                self.cache_dir = tempfile.mkdtemp(prefix='c7n-archive-')
+            archive = PythonPackageArchive(modules)
+            archive.close()
+            path = os.path.join(self.cache_dir, '%s.zip' % key)
+            shutil.copyfile(archive.path, path)
+            self.archives[key] = path
+            return path
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def clear(self):
+        with self.lock:
+            if self.cache_dir:
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self.cache_dir = None
+            self.archives = {}
+            self.stats = Counter()
+
+
+archive_cache = ArchiveCache()
+atexit.register(archive_cache.clear)
+
+
 def custodian_archive(packages=None):
     """Create a lambda code archive for running custodian.
 
@@ -362,7 +462,9 @@ def custodian_archive(packages=None):
     modules = {'c7n'}
     if packages:
         modules = filter(None, modules.union(packages))
-    return PythonPackageArchive(sorted(modules))
+    base = archive_cache.get(modules)
+    log.debug("Lambda archive base cache stats %s", archive_cache.get_stats())
+    return PythonPackageArchive(cache_file=base)
 
 
 class LambdaManager:
@@ -459,20 +561,14 @@ class LambdaManager:
         archive = func.get_archive()
         existing = self.get(func.name, qualifier)
 
-        if s3_uri:
-            # TODO: support versioned buckets
-            bucket, key = self._upload_func(s3_uri, func, archive)
-            code_ref = {'S3Bucket': bucket, 'S3Key': key}
-        else:
-            code_ref = {'ZipFile': archive.get_bytes()}
-
         changed = False
         if existing:
             result = old_config = existing['Configuration']
+            # only upload code when the archive content has changed.
             if archive.get_checksum() != old_config['CodeSha256']:
                 log.debug("Updating function %s code", func.name)
                 params = dict(FunctionName=func.name, Publish=True)
-                params.update(code_ref)
+                params.update(self._get_code_ref(s3_uri, func, archive))
                 result = self.client.update_function_code(**params)
                 waiter = self.client.get_waiter('function_updated')
                 waiter.wait(FunctionName=func.name)
@@ -498,7 +594,9 @@ class LambdaManager:
         else:
             log.info('Publishing custodian policy lambda function %s', func.name)
             params = func.get_config()
-            params.update({'Publish': True, 'Code': code_ref, 'Role': role})
+            params.update({
+                'Publish': True, 'Role': role,
+                'Code': self._get_code_ref(s3_uri, func, archive)})
             result = self.client.create_function(**params)
             self._update_concurrency(None, func)
             waiter = self.client.get_waiter('function_active')
@@ -507,6 +605,13 @@ class LambdaManager:
 
         return result, changed
 
+    def _get_code_ref(self, s3_uri, func, archive):
+        if s3_uri:
+            # TODO: support versioned buckets
+            bucket, key = self._upload_func(s3_uri, func, archive)
+            return {'S3Bucket': bucket, 'S3Key': key}
+        return {'ZipFile': archive.get_bytes()}
+
     def _update_concurrency(self, existing, func):
         e_concurrency = None
         if existing:
@@ -926,12 +1031,30 @@ class PolicyLambda(AbstractLambdaFunction):
         self.archive.add_contents(
             'config.json', json.dumps(
                 {'execution-options': get_exec_options(self.policy.options),
-                 'policies': [self.policy.data]}, indent=2))
+                 'policies': [self.policy.data],
+                 'modules': get_policy_modules(self.policy)}, indent=2))
         self.archive.add_contents('custodian_policy.py', PolicyHandlerTemplate)
         self.archive.close()
         return self.archive
 
 
+def get_policy_modules(policy):
+    """Return the modules providing a policy's resource, mode, filters and actions.
+
+    Serialized into the lambda config as a frozen index, so the handler
+    can import just these on a cold start instead of every module a
+    provider registers generic filters and actions from.
+    """
+    from c7n.provider import clouds
+
+    manager = policy.resource_manager
+    classes = [clouds[policy.provider_name], manager.__class__,
+               policy.get_execution_mode().__class__]
+    classes.extend(f.__class__ for f in manager.iter_filters() if f is not None)
+    classes.extend(a.__class__ for a in manager.actions)
+    return sorted({c.__module__ for c in classes})
+
+
 def zinfo(fname):
     """Amazon lambda exec environment setup can break itself
     if zip files aren't constructed a particular way.
@@ -8,6 +8,7 @@ See docs/usage/outputs.rst
 
 """
 import contextlib
+import contextvars
 import datetime
 import gzip
 import logging
@@ -314,6 +315,25 @@ class LogMetrics(Metrics):
         return res
 
 
+# The log output capturing the current execution context's records, it is
+# propagated to worker threads by c7n.executor.ThreadPoolExecutor.
+log_capture = contextvars.ContextVar('c7n_log_capture', default=None)
+
+
+class CaptureLogFilter(logging.Filter):
+    """Only pass log records emitted in the given log output's context.
+
+    This includes records from executor worker threads started within it.
+    """
+
+    def __init__(self, capture):
+        super().__init__()
+        self.capture = capture
+
+    def filter(self, record):
+        return log_capture.get() is self.capture
+
+
 class LogOutput:
 
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -322,6 +342,7 @@ class LogOutput:
         self.ctx = ctx
         self.config = config or {}
         self.handler = None
+        self.capture_token = None
 
     def get_handler(self):
         raise NotImplementedError()
@@ -342,6 +363,10 @@ class LogOutput:
             return
         self.handler.setLevel(logging.DEBUG)
         self.handler.setFormatter(logging.Formatter(self.log_format))
+        # with policies executing concurrently, only capture our own policy's records.
+        if getattr(getattr(self.ctx, 'options', None), 'parallel', None):
+            self.capture_token = log_capture.set(self)
+            self.handler.addFilter(CaptureLogFilter(self))
         mlog = logging.getLogger('custodian')
         mlog.addHandler(self.handler)
 
@@ -350,6 +375,9 @@ class LogOutput:
             return
         mlog = logging.getLogger('custodian')
         mlog.removeHandler(self.handler)
+        if self.capture_token is not None:
+            log_capture.reset(self.capture_token)
+            self.capture_token = None
         self.handler.flush()
         self.handler.close()
 
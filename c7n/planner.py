@@ -0,0 +1,144 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Shared resource fetch planning across a set of policies.
+
+Its common for a policy file to contain many policies against the same
+resource type in the same account and region. The planner groups those
+policies so each distinct resource population is enumerated and
+augmented once, and then handed out to every policy's filter chain.
+"""
+import json
+import logging
+import pickle  # nosec nosemgrep
+import threading
+
+from c7n.query import QueryResourceManager
+
+log = logging.getLogger('custodian.planner')
+
+
+class FetchGroup:
+    """A set of policies sharing a single resource population.
+
+    The first policy to request resources does the fetch and augment,
+    the population is then kept serialized so that each subsequent
+    policy gets its own copy to annotate and act upon. The serialized
+    copy is released once every policy in the group has been served.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.policies = []
+        self.fetches = 0
+        self.served = 0
+        self.cache_key = None
+        self._blob = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.policies)
+
+    def add(self, policy):
+        self.policies.append(policy)
+        self._pending += 1
+        policy.resource_manager.fetch_group = self
+
+    def discard(self):
+        """Note a group member that didn't need the shared population."""
+        with self._lock:
+            self._release()
+
+    def resources(self, manager, query, cache_key):
+        with self._lock:
+            if self.cache_key is None:
+                self.cache_key = cache_key
+            elif self.cache_key != cache_key:
+                # a resource manager customized its query at runtime,
+                # so we can't assume the population is the same.
+                self._release()
+                return manager.fetch_resources(query)
+
+            if self._blob is None and not self.fetches:
+                resources = manager.fetch_resources(query)
+                self.fetches += 1
+                self._pending -= 1
+                if self._pending > 0:
+                    self._blob = pickle.dumps(  # nosemgrep
+                        resources, protocol=pickle.HIGHEST_PROTOCOL)
+                return resources
+
+            if self._blob is None:
+                # population already released, ie. a member ran more than once.
+                return manager.fetch_resources(query)
+
+            resources = pickle.loads(self._blob)  # nosec nosemgrep
+            self.served += 1
+            self._release()
+            return resources
+
+    def _release(self):
+        self._pending -= 1
+        if self._pending <= 0:
+            self._blob = None
+
+
+class FetchPlanner:
+    """Group policies by the resource population they'll query.
+
+    Policies are grouped by provider, account, region, resource type,
+    source and query. Only pull mode policies with query based resource
+    managers are eligible, and only groups with more than one member
+    are wired up for sharing.
+    """
+
+    def __init__(self, policies):
+        self.policies = list(policies)
+        self.groups = []
+
+    @staticmethod
+    def get_group_key(policy):
+        manager = policy.resource_manager
+        return (
+            policy.provider_name,
+            policy.options.account_id,
+            policy.options.region,
+            policy.resource_type,
+            manager.source_type,
+            json.dumps(manager.data.get('query'), sort_keys=True, default=str))
+
+    @staticmethod
+    def is_eligible(policy):
+        if not isinstance(policy.resource_manager, QueryResourceManager):
+            return False
+        return policy.options.dryrun or policy.execution_mode == 'pull'
+
+    def plan(self):
+        groups = {}
+        for p in self.policies:
+            if not self.is_eligible(p):
+                continue
+            key = self.get_group_key(p)
+            groups.setdefault(key, FetchGroup(key)).policies.append(p)
+
+        self.groups = []
+        for g in groups.values():
+            if len(g) < 2:
+                continue
+            policies, g.policies = g.policies, []
+            for p in policies:
+                g.add(p)
+            self.groups.append(g)
+        log.debug(
+            "fetch planner grouped %d policies into %d shared fetches",
+            sum(map(len, self.groups)), len(self.groups))
+        return self.groups
+
+    def get_stats(self):
+        return {
+            'groups': len(self.groups),
+            'policies': sum(map(len, self.groups)),
+            'fetches': sum(g.fetches for g in self.groups),
+            'saved': sum(g.served for g in self.groups),
+        }
@@ -65,14 +65,28 @@ class ResourceQuery:
 
         return data
 
+    def _iter_client_enum(self, client, enum_op, params, path, retry=None):
+        if path is None or not client.can_paginate(enum_op):
+            yield self._invoke_client_enum(client, enum_op, params, path, retry) or []
+            return
+        p = client.get_paginator(enum_op)
+        if retry:
+            p.PAGE_ITERATOR_CLS = RetryPageIterator
+        path = jmespath.compile(path)
+        for page in p.paginate(**params):
+            yield path.search(page) or []
+
+    def _get_client(self, resource_manager):
+        m = self.resolve(resource_manager.resource_type)
+        if resource_manager.get_client:
+            return resource_manager.get_client()
+        return local_session(self.session_factory).client(
+            m.service, resource_manager.config.region)
+
     def filter(self, resource_manager, **params):
         """Query a set of resources."""
         m = self.resolve(resource_manager.resource_type)
-        if resource_manager.get_client:
-            client = resource_manager.get_client()
-        else:
-            client = local_session(self.session_factory).client(
-                m.service, resource_manager.config.region)
+        client = self._get_client(resource_manager)
         enum_op, path, extra_args = m.enum_spec
         if extra_args:
             params.update(extra_args)
@@ -80,6 +94,17 @@ class ResourceQuery:
             client, enum_op, params, path,
             getattr(resource_manager, 'retry', None)) or []
 
+    def iter_filter(self, resource_manager, **params):
+        """Query a set of resources, yielding them a page at a time."""
+        m = self.resolve(resource_manager.resource_type)
+        client = self._get_client(resource_manager)
+        enum_op, path, extra_args = m.enum_spec
+        if extra_args:
+            params.update(extra_args)
+        yield from self._iter_client_enum(
+            client, enum_op, params, path,
+            getattr(resource_manager, 'retry', None))
+
     def get(self, resource_manager, identities):
         """Get resources by identities
         """
@@ -229,6 +254,18 @@ class DescribeSource:
     def resources(self, query):
         return self.query.filter(self.manager, **query)
 
+    def iter_resources(self, query):
+        """Yield resources a page at a time.
+
+        Sources or queries that customize enumeration yield their
+        complete result as a single page.
+        """
+        if (self.__class__.resources is not DescribeSource.resources or
+                self.query.__class__.filter is not ResourceQuery.filter):
+            yield self.resources(query)
+            return
+        yield from self.query.iter_filter(self.manager, **query)
+
     def get_query(self):
         return self.resource_query_factory(self.manager.session_factory)
 
@@ -285,16 +322,77 @@ class ConfigSource:
 
     retry = staticmethod(get_retry(('ThrottlingException',)))
 
+    # max resource keys per batch get resource config call
+    batch_size = 100
+
     def __init__(self, manager):
         self.manager = manager
         self.titleCase = self.manager.resource_type.id[0].isupper()
+        # set when config rejects batch gets for the resource type
+        self.batch_unsupported = False
 
     def get_permissions(self):
-        return ["config:GetResourceConfigHistory",
+        return ["config:BatchGetResourceConfig",
+                "config:GetResourceConfigHistory",
                 "config:ListDiscoveredResources"]
 
     def get_resources(self, ids, cache=True):
         client = local_session(self.manager.session_factory).client('config')
+        results, history_ids = [], []
+        remaining = list(ids)
+        while remaining and not self.batch_unsupported:
+            resource_set = remaining[:self.batch_size]
+            remaining = remaining[self.batch_size:]
+            try:
+                items, unprocessed = self.get_batch_items(client, resource_set)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ValidationException':
+                    raise
+                self.batch_unsupported = self.is_batch_unsupported(e)
+                self.manager.log.debug(
+                    "config batch get failed for %s, using history: %s",
+                    self.manager.get_model().config_type,
+                    e.response['Error'].get('Message'))
+                history_ids.extend(resource_set)
+                continue
+            # keys config didn't process in the batch, and items whose
+            # tags are only given by history, are fetched individually.
+            history_ids.extend(unprocessed)
+            for item in items:
+                if self.has_item_tags(item):
+                    results.append(self.load_resource(item))
+                else:
+                    history_ids.append(item['resourceId'])
+        results.extend(self.get_history_resources(client, history_ids + remaining))
+        return list(filter(None, results))
+
+    def is_batch_unsupported(self, error):
+        """Whether a batch get validation error is for an unsupported resource type."""
+        message = error.response['Error'].get('Message', '').lower()
+        return 'not supported' in message or 'unsupported' in message
+
+    def has_item_tags(self, item):
+        """Whether a config item carries tags outside of its top level tags field.
+
+        Batch get items don't have the top level tags of history items.
+        """
+        if item.get('tags'):
+            return True
+        item_config = self._load_item_config(item) or {}
+        if any(k.lower() == 'tags' for k in item_config):
+            return True
+        return 'Tags' in (item.get('supplementaryConfiguration') or {})
+
+    def get_batch_items(self, client, ids):
+        """Get base configuration items for ids, and any ids left unprocessed."""
+        config_type = self.manager.get_model().config_type
+        response = self.retry(
+            client.batch_get_resource_config,
+            resourceKeys=[{'resourceType': config_type, 'resourceId': i} for i in ids])
+        return (response.get('baseConfigurationItems', []),
+                [k['resourceId'] for k in response.get('unprocessedResourceKeys', ())])
+
+    def get_history_resources(self, client, ids):
         results = []
         m = self.manager.get_model()
         for i in ids:
@@ -306,7 +404,7 @@ class ConfigSource:
             if not revisions:
                 continue
             results.append(self.load_resource(revisions[0]))
-        return list(filter(None, results))
+        return results
 
     def get_query_params(self, query):
         """Parse config select expression from policy and parameter.
@@ -380,13 +478,16 @@ class ConfigSource:
                 resource['Tags'] = [{u'Key': k, u'Value': v} for k, v in stags.items()]
 
     def get_listed_resources(self, client):
+        return list(itertools.chain(*self.iter_listed_resources(client)))
+
+    def iter_listed_resources(self, client):
+        """Yield resources a chunk at a time from the discovered resource ids."""
         # fallback for when config decides to arbitrarily break select
         # resource for a given resource type.
         paginator = client.get_paginator('list_discovered_resources')
         paginator.PAGE_ITERATOR_CLS = RetryPageIterator
         pages = paginator.paginate(
             resourceType=self.manager.get_model().config_type)
-        results = []
 
         with self.manager.executor_factory(max_workers=2) as w:
             ridents = pages.build_full_result()
@@ -397,18 +498,21 @@ class ConfigSource:
                 len(resource_ids),
                 self.manager.__class__.__name__.lower())
 
-            for resource_set in chunks(resource_ids, 50):
-                futures = []
-                futures.append(w.submit(self.get_resources, resource_set))
-                for f in as_completed(futures):
-                    if f.exception():
-                        self.manager.log.error(
-                            "Exception getting resources from config \n %s" % (
-                                f.exception()))
-                    results.extend(f.result())
-        return results
+            futures = [
+                w.submit(self.get_resources, resource_set)
+                for resource_set in chunks(resource_ids, self.batch_size)]
+            for f in as_completed(futures):
+                if f.exception():
+                    self.manager.log.error(
+                        "Exception getting resources from config \n %s" % (
+                            f.exception()))
+                yield f.result()
 
     def resources(self, query=None):
+        return list(itertools.chain(*self.iter_resources(query)))
+
+    def iter_resources(self, query=None):
+        """Yield resources a page at a time."""
         client = local_session(self.manager.session_factory).client('config')
         query = self.get_query_params(query)
         pager = Paginator(
@@ -418,17 +522,16 @@ class ConfigSource:
             client.meta.service_model.operation_model('SelectResourceConfig'))
         pager.PAGE_ITERATOR_CLS = RetryPageIterator
 
-        results = []
+        found = False
         for page in pager.paginate(Expression=query['expr']):
-            results.extend([
-                self.load_resource(json.loads(r)) for r in page['Results']])
+            found = found or bool(page['Results'])
+            yield [self.load_resource(json.loads(r)) for r in page['Results']]
 
         # Config arbitrarily breaks which resource types its supports for query/select
         # on any given day, if we don't have a user defined query, then fallback
         # to iteration mode.
-        if not results and query == self.get_query_params({}):
-            results = self.get_listed_resources(client)
-        return results
+        if not found and query == self.get_query_params({}):
+            yield from self.iter_listed_resources(client)
 
     def augment(self, resources):
         return resources
@@ -442,12 +545,18 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
     max_workers = 3
     chunk_size = 20
 
+    # number of resources augmented and filtered at a time when streaming
+    stream_chunk_size = 1000
+
     permissions = ()
 
     _generate_arn = None
 
     get_client = None
 
+    # set by c7n.planner when the resource population is shared across policies
+    fetch_group = None
+
     retry = staticmethod(
         get_retry((
             'TooManyRequestsException',
@@ -463,6 +572,7 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
     def __init__(self, data, options):
         super(QueryResourceManager, self).__init__(data, options)
         self.source = self.get_source(self.source_type)
+        self._cache.id_key = self.get_model().id
 
     @property
     def source_type(self):
@@ -523,15 +633,23 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
                 self.log.debug("Using cached %s: %d" % (
                     "%s.%s" % (self.__class__.__module__, self.__class__.__name__),
                     len(resources)))
+                if augment and self.augment_cached(resources):
+                    self._cache.save(cache_key, resources)
+                if augment and self.fetch_group is not None:
+                    self.fetch_group.discard()
+
+        if resources is None and augment and self.is_streaming():
+            return self.stream_resources(query or {})
 
+        with self._cache:
             if resources is None:
                 if query is None:
                     query = {}
-                with self.ctx.tracer.subsegment('resource-fetch'):
-                    resources = self.source.resources(query)
+                if augment and self.fetch_group is not None:
+                    resources = self.fetch_group.resources(self, query, cache_key)
+                else:
+                    resources = self.fetch_resources(query, augment)
                 if augment:
-                    with self.ctx.tracer.subsegment('resource-augment'):
-                        resources = self.augment(resources)
                     # Don't pollute cache with unaugmented resources.
                     self._cache.save(cache_key, resources)
 
@@ -544,6 +662,55 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
             self.check_resource_limit(len(resources), resource_count)
         return resources
 
+    def is_streaming(self):
+        """Whether resources should be fetched, augmented and filtered as a stream.
+
+        Streaming is opt-in, and only applies to the policy's own resource
+        manager, so related resource lookups stay cached. It isn't possible
+        when the population is shared with other policies or a filter needs
+        to see the complete population at once.
+        """
+        if not getattr(self.config, 'stream_resources', False):
+            return False
+        if self.fetch_group is not None or self.data != self.ctx.policy.data:
+            return False
+        return not any(f.barrier for f in self.iter_filters())
+
+    def stream_resources(self, query):
+        """Fetch, augment and filter resources a chunk at a time.
+
+        Only matched resources are retained, which bounds memory usage to
+        the chunk size plus the selection. Streamed populations are not cached.
+        """
+        iter_resources = getattr(self.source, 'iter_resources', None)
+        if iter_resources is None:
+            pages = [self.source.resources(query)]
+        else:
+            pages = iter_resources(query)
+
+        resources = []
+        resource_count = 0
+        for resource_set in chunks(
+                itertools.chain.from_iterable(pages), self.stream_chunk_size):
+            with self.ctx.tracer.subsegment('resource-augment'):
+                resource_set = self.augment(resource_set)
+            resource_count += len(resource_set)
+            with self.ctx.tracer.subsegment('filter'):
+                resources.extend(self.filter_resources(resource_set))
+
+        if self.data == self.ctx.policy.data:
+            self.check_resource_limit(len(resources), resource_count)
+        return resources
+
+    def fetch_resources(self, query, augment=True):
+        """Enumerate and optionally augment resources, bypassing the cache."""
+        with self.ctx.tracer.subsegment('resource-fetch'):
+            resources = self.source.resources(query)
+        if augment:
+            with self.ctx.tracer.subsegment('resource-augment'):
+                resources = self.augment(resources)
+        return resources
+
     def check_resource_limit(self, selection_count, population_count):
         """Check if policy's execution affects more resources then its limit.
 
@@ -557,12 +724,10 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
     def _get_cached_resources(self, ids):
         key = self.get_cache_key(None)
         with self._cache:
-            resources = self._cache.get(key)
+            resources = self._cache.get_resources(key, ids)
             if resources is not None:
                 self.log.debug("Using cached results for get_resources")
-                m = self.get_model()
-                id_set = set(ids)
-                return [r for r in resources if r[m.id] in id_set]
+                return resources
         return None
 
     def get_resources(self, ids, cache=True, augment=True):
@@ -581,6 +746,15 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
             self.log.warning("event ids not resolved: %s error:%s" % (ids, e))
             return []
 
+    def augment_cached(self, resources):
+        """Augment cached resources in place with any data they're missing.
+
+        Returns True if the resources were modified. Resources which only
+        fetch the augment data a policy needs may have been cached by a
+        policy needing less.
+        """
+        return False
+
     def augment(self, resources):
         """subclasses may want to augment resources with additional information.
 
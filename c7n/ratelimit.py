@@ -0,0 +1,138 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Adaptive api rate limiting.
+
+Rate limits are tracked per (account, region, service, operation) and
+shared by every thread and policy in the process. A limit only engages
+once the api has throttled us, at which point its rate is adjusted
+additive increase / multiplicative decrease (AIMD) style, backing off
+on throttles and probing back up as calls succeed. Once a rate recovers
+past its ceiling, the limit is lifted again.
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger('custodian.ratelimit')
+
+THROTTLE_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'Throttled',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException',
+    'SlowDown',
+    'EC2ThrottledException',
+}
+
+
+class TokenBucket:
+    """An AIMD adjusted token bucket.
+
+    A rate of None means unlimited, ie. no throttle has been observed.
+    """
+
+    def __init__(self, min_rate=1.0, max_rate=100.0, increase=1.0, decrease=0.5):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.decreased = 0
+        # observed call rate, over one second windows
+        self.window_start = self.updated
+        self.window_calls = 0
+        self.observed_rate = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, returning the seconds the caller should wait."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.observed_rate = self.window_calls / (now - self.window_start)
+                self.window_start, self.window_calls = now, 0
+            self.window_calls += 1
+            if self.rate is None:
+                return 0
+            self.tokens = min(
+                max(self.rate, 1.0), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # tokens can go negative, reserving future capacity in call order.
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            # a burst of in flight calls throttled together is one signal.
+            if now - self.decreased < 1.0:
+                return
+            self.decreased = now
+            if self.rate is None:
+                self.rate = max(self.observed_rate, self.window_calls, self.min_rate)
+                self.tokens = 0.0
+                self.updated = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+    def on_success(self):
+        with self.lock:
+            if self.rate is None:
+                return
+            # additive increase of roughly `increase` calls/s per second.
+            self.rate += self.increase / self.rate
+            if self.rate >= self.max_rate:
+                self.rate = None
+
+
+class RateLimiter:
+    """Registry of token buckets keyed by api operation."""
+
+    def __init__(self, **bucket_options):
+        self.bucket_options = bucket_options
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.setdefault(key, TokenBucket(**self.bucket_options))
+        return bucket
+
+    def acquire(self, key):
+        """Wait for capacity on the given operation, returning the delay."""
+        delay = self.get_bucket(key).acquire()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def on_throttle(self, key):
+        bucket = self.get_bucket(key)
+        bucket.on_throttle()
+        log.debug("api throttled %s, rate limited to %0.2f/s", ":".join(
+            map(str, key)), bucket.rate)
+
+    def on_success(self, key):
+        self.get_bucket(key).on_success()
+
+    def get_rate(self, key):
+        bucket = self.buckets.get(key)
+        return bucket and bucket.rate or None
+
+    def reset(self):
+        with self.lock:
+            self.buckets = {}
+
+
+# shared by all sessions in the process
+limiter = RateLimiter()
@@ -31,13 +31,17 @@ CLI Usage
 from concurrent.futures import as_completed
 
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 import gzip
-import io
+import heapq
+import itertools
 import json
 import jmespath
 import logging
+import operator
 import os
+import sys
+import tempfile
 from tabulate import tabulate
 
 from botocore.compat import OrderedDict
@@ -75,41 +79,64 @@ def report(policies, start_date, options, output_fh, raw_output_fh=None):
         include_policy=len(policy_names) > 1
     )
 
-    records = []
-    for policy in policies:
-        # initialize policy execution context for output access
-        policy.ctx.initialize()
-        if policy.ctx.output.type == 's3':
-            policy_records = record_set(
-                policy.session_factory,
-                policy.ctx.output.config['netloc'],
-                strip_output_path(policy.ctx.output.config['path'], policy.name),
-                start_date)
-        else:
-            policy_records = fs_record_set(policy.ctx.log_dir, policy.name)
-
-        log.debug("Found %d records for region %s", len(policy_records), policy.options.region)
-
-        for record in policy_records:
-            record['policy'] = policy.name
-            record['region'] = policy.options.region
+    records = itertools.chain.from_iterable(
+        policy_records(policy, start_date) for policy in policies)
+    if raw_output_fh is not None:
+        records = write_json_records(records, raw_output_fh)
 
-        records += policy_records
+    if options.format == 'json':
+        for _ in write_json_records(records, sys.stdout):
+            pass
+        print()
+        return
 
-    rows = formatter.to_csv(records, unique=not options.all_findings)
+    rows = formatter.iter_csv(records, unique=not options.all_findings)
 
     if options.format == 'csv':
         writer = csv.writer(output_fh, formatter.headers(), quoting=csv.QUOTE_ALL)
         writer.writerow(formatter.headers())
         writer.writerows(rows)
-    elif options.format == 'json':
-        print(dumps(records, indent=2))
     else:
         # We special case CSV, and for other formats we pass to tabulate
-        print(tabulate(rows, formatter.headers(), tablefmt=options.format))
+        print(tabulate(list(rows), formatter.headers(), tablefmt=options.format))
+
+
+def policy_records(policy, start_date):
+    """Stream a policy's output records, annotated with policy and region."""
+    # initialize policy execution context for output access
+    policy.ctx.initialize()
+    if policy.ctx.output.type == 's3':
+        records = iter_record_set(
+            policy.session_factory,
+            policy.ctx.output.config['netloc'],
+            strip_output_path(policy.ctx.output.config['path'], policy.name),
+            start_date)
+    else:
+        records = fs_record_set(policy.ctx.log_dir, policy.name)
+
+    count = 0
+    for record in records:
+        record['policy'] = policy.name
+        record['region'] = policy.options.region
+        count += 1
+        yield record
+    log.debug("Found %d records for region %s", count, policy.options.region)
 
-    if raw_output_fh is not None:
-        dumps(records, raw_output_fh, indent=2)
+
+def write_json_records(records, fh, indent=2):
+    """Write records to fh as a json array as they pass through.
+
+    Output is identical to dumping the full list.
+    """
+    prefix = ' ' * indent
+    count = 0
+    for record in records:
+        fh.write(count and ',\n' or '[\n')
+        fh.write('\n'.join(
+            prefix + line for line in dumps(record, indent=indent).split('\n')))
+        count += 1
+        yield record
+    fh.write(count and '\n]' or '[]')
 
 
 def _get_values(record, field_list, tag_map):
@@ -200,6 +227,46 @@ class Formatter:
                 keys.add(rec_id)
         return uniq
 
+    def iter_csv(self, records, reverse=True, unique=True, spool_size=100000):
+        """Format records into rows as they're read, see to_csv.
+
+        Only each record's sort date, id and row are kept, never the
+        records themselves. Past spool_size rows these are sorted and
+        spooled to temporary files, then merged back in date order with
+        the first row per id kept, so memory use is bounded by the
+        number of unique ids rather than the size of the record set.
+        """
+        runs, chunk = [], []
+        date_sort = id_field = None
+        by_date = operator.itemgetter(0)
+        try:
+            for r in records:
+                if date_sort is None:
+                    date_sort = ('CustodianDate' in r and 'CustodianDate' or
+                                 self._date_field or False)
+                    id_field = unique and self._id_field or None
+                chunk.append((
+                    date_sort and _sort_value(r[date_sort]) or 0,
+                    id_field and r[id_field],
+                    self.extract_csv(r)))
+                if len(chunk) >= spool_size:
+                    runs.append(_spool_rows(chunk, by_date, reverse))
+                    chunk = []
+            chunk.sort(key=by_date, reverse=reverse)
+
+            keys = set()
+            for _, rec_id, row in heapq.merge(
+                    *[map(json.loads, fh) for fh in runs], chunk,
+                    key=by_date, reverse=reverse):
+                if unique:
+                    if rec_id in keys:
+                        continue
+                    keys.add(rec_id)
+                yield row
+        finally:
+            for fh in runs:
+                fh.close()
+
     def to_csv(self, records, reverse=True, unique=True):
         if not records:
             return []
@@ -221,6 +288,23 @@ class Formatter:
         return rows
 
 
+def _sort_value(value):
+    # spooled rows are serialized as json, so compare dates as iso strings.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _spool_rows(rows, key, reverse):
+    rows.sort(key=key, reverse=reverse)
+    fh = tempfile.TemporaryFile(mode='w+')
+    for row in rows:
+        fh.write(json.dumps(row))
+        fh.write('\n')
+    fh.seek(0)
+    return fh
+
+
 def fs_record_set(output_path, policy_name):
     record_path = os.path.join(output_path, 'resources.json')
 
@@ -241,60 +325,105 @@ def record_set(session_factory, bucket, key_prefix, start_date, specify_hour=Fal
 
     From the given start date.
     """
+    records = list(iter_record_set(
+        session_factory, bucket, key_prefix, start_date, specify_hour))
+    log.info("Fetched %d records" % len(records))
+    return records
 
-    s3 = local_session(session_factory).client('s3')
 
-    records = []
+def iter_record_set(session_factory, bucket, key_prefix, start_date,
+                    specify_hour=False, max_workers=20):
+    """Stream all s3 records for the given policy output url
+
+    From the given start date. Keys are fetched concurrently, with at
+    most max_workers objects held in memory at a time.
+    """
+    keys = record_keys(session_factory, bucket, key_prefix, start_date, specify_hour)
     key_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as w:
+        while True:
+            key_set = list(itertools.islice(keys, max_workers))
+            if not key_set:
+                break
+            key_count += len(key_set)
+            futures = [w.submit(get_records, bucket, k, session_factory)
+                       for k in key_set]
+            for f in as_completed(futures):
+                yield from f.result()
+    log.debug("Fetched records across %d files", key_count)
 
-    date = start_date.strftime('%Y/%m/%d')
-    if specify_hour:
-        date += "/{}".format(start_date.hour)
-    else:
-        date += "/00"
 
-    marker = "{}/{}/resources.json.gz".format(key_prefix.strip("/"), date)
+def record_keys(session_factory, bucket, key_prefix, start_date, specify_hour=False):
+    """List record keys in the date partitions from the start date on.
 
-    p = s3.get_paginator('list_objects_v2').paginate(
-        Bucket=bucket,
-        Prefix=key_prefix.strip('/') + '/',
-        StartAfter=marker,
-    )
+    Output keys are partitioned as 'YYYY/mm/dd/HH/resources.json.gz' under
+    the policy prefix, each day's partition from the start date through
+    today is listed, rather than everything under the policy prefix.
+    """
+    s3 = local_session(session_factory).client('s3')
+    key_prefix = key_prefix.strip('/')
 
-    with ThreadPoolExecutor(max_workers=20) as w:
+    marker = start_date.strftime('%Y/%m/%d')
+    if specify_hour:
+        marker += "/{}".format(start_date.hour)
+    else:
+        marker += "/00"
+    marker = "{}/{}/resources.json.gz".format(key_prefix, marker)
+
+    day = start_date.date()
+    # include tomorrow's partition, output dates are utc
+    end = datetime.utcnow().date() + timedelta(days=1)
+    while day <= end:
+        p = s3.get_paginator('list_objects_v2').paginate(
+            Bucket=bucket,
+            Prefix="{}/{}/".format(key_prefix, day.strftime('%Y/%m/%d')),
+            StartAfter=marker)
         for key_set in p:
-            if 'Contents' not in key_set:
+            for k in key_set.get('Contents', ()):
+                if k['Key'].endswith('resources.json.gz'):
+                    yield k
+        day += timedelta(days=1)
+
+
+def iter_json_records(fh, chunk_size=65536):
+    """Incrementally decode the records of a json array from a text stream."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+    while True:
+        # skip array delimiters and whitespace between records
+        while pos < len(buf) and buf[pos] in '[,] \t\r\n':
+            pos += 1
+        if pos < len(buf):
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                yield record
                 continue
-            keys = [k for k in key_set['Contents']
-                    if k['Key'].endswith('resources.json.gz')]
-            key_count += len(keys)
-            futures = map(lambda k: w.submit(
-                get_records, bucket, k, session_factory), keys)
-
-            for f in as_completed(futures):
-                records.extend(f.result())
-
-    log.info("Fetched %d records across %d files" % (
-        len(records), key_count))
-    return records
+        if eof:
+            return
+        data = fh.read(chunk_size)
+        eof = not data
+        buf = buf[pos:] + data
+        pos = 0
 
 
 def get_records(bucket, key, session_factory):
-    # we're doing a lot of this in memory, worst case
-    # though we're talking about a 10k objects, else
-    # we should spool to temp files
-
     # key ends with 'YYYY/mm/dd/HH/resources.json.gz'
     # so take the date parts only
     date_str = '-'.join(key['Key'].rsplit('/', 5)[-5:-1])
     custodian_date = date_parse(date_str)
     s3 = local_session(session_factory).client('s3')
     result = s3.get_object(Bucket=bucket, Key=key['Key'])
-    blob = io.BytesIO(result['Body'].read())
 
-    records = json.load(gzip.GzipFile(fileobj=blob))
+    # decompress and decode the object as it's read
+    with gzip.open(result['Body'], mode='rt') as fh:
+        records = []
+        for r in iter_json_records(fh):
+            r['CustodianDate'] = custodian_date
+            records.append(r)
     log.debug("bucket: %s key: %s records: %d",
               bucket, key['Key'], len(records))
-    for r in records:
-        r['CustodianDate'] = custodian_date
     return records
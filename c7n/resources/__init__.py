@@ -3,6 +3,8 @@
 #
 # AWS resources to manage
 #
+import importlib
+
 from c7n.provider import clouds
 
 LOADED = set()
@@ -28,6 +30,26 @@ def load_resources(resource_types=('*',)):
     return missing
 
 
+def load_resource_index(resource_types, modules):
+    """Load resources from a frozen module index.
+
+    Only the given modules are imported, instead of each provider's
+    generic filter and action modules, before registering the resource
+    types. Related resources still load lazily via load_resources.
+    """
+    for m in modules:
+        importlib.import_module(m)
+    pmap = {}
+    for r in resource_types:
+        pmap.setdefault(r.split('.', 1)[0], []).append(r)
+    LOADED.update(pmap)
+    missing = []
+    for pname, rtypes in pmap.items():
+        _, not_found = clouds[pname].get_resource_types(rtypes)
+        missing.extend(not_found)
+    return missing
+
+
 def should_load_provider(name, provider_types, no_wild=False):
     global LOADED
     if (name not in LOADED and
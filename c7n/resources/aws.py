@@ -48,7 +48,7 @@ from c7n.output import (
 )
 
 from c7n.registry import PluginRegistry
-from c7n import credentials, utils
+from c7n import credentials, ratelimit, utils
 
 log = logging.getLogger('custodian.aws')
 
@@ -542,10 +542,21 @@ class XrayTracer:
 
 @api_stats_outputs.register('aws')
 class ApiStats(DeltaStats):
+    """Api call counts, along with per operation latency and throttling.
+
+    Calls are also paced through the process wide adaptive rate limiter,
+    see :mod:`c7n.ratelimit`, and client construction is tracked via the
+    shared client pool, see :class:`c7n.utils.ClientPool`.
+    """
+
+    limiter = ratelimit.limiter
 
     def __init__(self, ctx, config=None):
         super(ApiStats, self).__init__(ctx, config)
         self.api_calls = Counter()
+        self.api_ops = {}
+        self.client_stats = utils.client_pool.get_stats()
+        self.lock = threading.Lock()
 
     def get_snapshot(self):
         return dict(self.api_calls)
@@ -553,9 +564,27 @@ class ApiStats(DeltaStats):
     def get_metadata(self):
         return self.get_snapshot()
 
+    def get_limit_metadata(self):
+        results = {}
+        for op, stats in list(self.api_ops.items()):
+            stats = dict(stats)
+            stats['latency'] = stats['latency'] / (stats.pop('timed') or 1)
+            stats['rate'] = self.limiter.get_rate(stats.pop('key'))
+            results[op] = stats
+        return results
+
+    def get_client_metadata(self):
+        before, after = self.client_stats, utils.client_pool.get_stats()
+        created = {k: v - before['created'].get(k, 0)
+                   for k, v in after['created'].items()}
+        return {
+            'created': {k: v for k, v in created.items() if v},
+            'reused': after['hits'] - before['hits']}
+
     def __enter__(self):
         if isinstance(self.ctx.session_factory, credentials.SessionFactory):
             self.ctx.session_factory.set_subscribers((self,))
+        self.client_stats = utils.client_pool.get_stats()
         self.push_snapshot()
 
     def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
@@ -564,20 +593,83 @@ class ApiStats(DeltaStats):
 
         # With cached sessions, we need to unregister any events subscribers
         # on extant sessions to allow for the next registration.
-        utils.local_session(self.ctx.session_factory).events.unregister(
+        session = utils.local_session(self.ctx.session_factory)
+        events = session.events
+        events.unregister(
             'after-call.*.*', self._record, unique_id='c7n-api-stats')
+        events.unregister(
+            'before-call.*.*', self._limit, unique_id='c7n-api-limit')
+        events.unregister(
+            'needs-retry.*.*', self._retry, unique_id='c7n-api-throttle')
+        # pooled clients hold a copy of the session's event handlers
+        # from their construction, so drop them along with the handlers.
+        utils.client_pool.evict(session)
 
         self.ctx.metrics.put_metric(
             "ApiCalls", sum(self.api_calls.values()), "Count")
+        throttles = sum(s['throttles'] for s in self.api_ops.values())
+        if throttles:
+            self.ctx.metrics.put_metric("ApiThrottles", throttles, "Count")
         self.pop_snapshot()
 
     def __call__(self, s):
         s.events.register(
             'after-call.*.*', self._record, unique_id='c7n-api-stats')
-
-    def _record(self, http_response, parsed, model, **kwargs):
-        self.api_calls["%s.%s" % (
-            model.service_model.endpoint_prefix, model.name)] += 1
+        s.events.register(
+            'before-call.*.*', self._limit, unique_id='c7n-api-limit')
+        s.events.register(
+            'needs-retry.*.*', self._retry, unique_id='c7n-api-throttle')
+
+    def get_op_stats(self, op, key):
+        stats = self.api_ops.get(op)
+        if stats is None:
+            with self.lock:
+                stats = self.api_ops.setdefault(op, {
+                    'key': key, 'throttles': 0, 'timed': 0,
+                    'latency': 0.0, 'max_latency': 0.0, 'delay': 0.0})
+        return stats
+
+    def _limit(self, model, context, **kwargs):
+        key = (getattr(self.ctx.options, 'account_id', None),
+               context.get('client_region'),
+               model.service_model.endpoint_prefix,
+               model.name)
+        delay = self.limiter.acquire(key)
+        if delay:
+            stats = self.get_op_stats(
+                "%s.%s" % (key[2], key[3]), key)
+            with self.lock:
+                stats['delay'] += delay
+        context['c7n-api-limit'] = (key, time.time())
+
+    def _retry(self, response, request_dict, **kwargs):
+        if response is None:
+            return
+        code = response[1].get('Error', {}).get('Code')
+        limit = request_dict.get('context', {}).get('c7n-api-limit')
+        if code not in ratelimit.THROTTLE_CODES or not limit:
+            return
+        key = limit[0]
+        self.limiter.on_throttle(key)
+        stats = self.get_op_stats("%s.%s" % (key[2], key[3]), key)
+        with self.lock:
+            stats['throttles'] += 1
+
+    def _record(self, http_response, parsed, model, context=None, **kwargs):
+        op = "%s.%s" % (model.service_model.endpoint_prefix, model.name)
+        self.api_calls[op] += 1
+        limit = context and context.get('c7n-api-limit')
+        if not limit:
+            return
+        key, started = limit
+        if http_response.status_code < 300:
+            self.limiter.on_success(key)
+        latency = time.time() - started
+        stats = self.get_op_stats(op, key)
+        with self.lock:
+            stats['timed'] += 1
+            stats['latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
 
 
 @blob_outputs.register('s3')
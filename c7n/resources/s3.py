@@ -40,7 +40,7 @@ from botocore.client import Config
 from botocore.exceptions import ClientError
 
 from collections import defaultdict
-from concurrent.futures import as_completed
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 
 try:
     from urllib3.exceptions import SSLError
@@ -77,14 +77,60 @@ MAX_COPY_SIZE = 1024 * 1024 * 1024 * 2
 
 class DescribeS3(query.DescribeSource):
 
+    # concurrent augment api calls across all buckets
+    max_workers = 20
+
     def augment(self, buckets):
+        """Augment buckets with their augment table data.
+
+        Bucket regions are resolved first, after which buckets share a
+        client per region and each bucket's remaining methods run
+        concurrently.
+        """
+        keys = self.manager.get_augment_keys()
+        if keys is None:
+            keys = {m[1] for m in S3_AUGMENT_TABLE}
+        session = local_session(self.manager.session_factory)
+
+        location = [m for m in S3_AUGMENT_TABLE if m[1] == 'Location']
+        clients = {}
+
+        def get_location_calls():
+            client = session.client('s3')
+            for b in buckets:
+                if get_missing_augments(b, ('Location',)):
+                    yield (client, b, location[0])
+
+        def get_augment_calls():
+            for b in buckets:
+                region = get_region(b)
+                if region not in clients:
+                    clients[region] = bucket_client(session, b)
+                for minfo in get_missing_augments(b, keys - {'Location'}):
+                    yield (clients[region], b, minfo, session)
+
         with self.manager.executor_factory(
-                max_workers=min((10, len(buckets) + 1))) as w:
-            results = w.map(
-                assemble_bucket,
-                zip(itertools.repeat(self.manager.session_factory), buckets))
-            results = list(filter(None, results))
-            return results
+                max_workers=min((self.max_workers, len(buckets) + 1))) as w:
+            if location and 'Location' in keys:
+                self.run_bounded(w, get_location_calls())
+            self.run_bounded(w, get_augment_calls())
+        return buckets
+
+    def run_bounded(self, w, calls):
+        """Run augment_bucket for each call's args, bounding queued futures.
+
+        Large accounts have hundreds of thousands of bucket augment calls,
+        only a multiple of max_workers are submitted at a time.
+        """
+        pending = set()
+        for args in calls:
+            if len(pending) >= self.max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    f.result()
+            pending.add(w.submit(augment_bucket, *args))
+        for f in as_completed(pending):
+            f.result()
 
 
 class ConfigS3(query.ConfigSource):
@@ -385,6 +431,45 @@ class S3(query.QueryResourceManager):
         perms.extend([n[-1] for n in S3_AUGMENT_TABLE])
         return perms
 
+    def get_augment_keys(self):
+        """Get the augment keys the policy's filters and actions need.
+
+        Returns None when all of them are needed, ie. when not running with
+        augment_on_demand, a filter or action doesn't declare its
+        augment_keys, or the bucket population is shared with other policies.
+        """
+        if not getattr(self.config, 'augment_on_demand', False):
+            return None
+        if self.fetch_group is not None or self.data != self.ctx.policy.data:
+            return None
+        keys = {'Location'}
+        for e in itertools.chain(self.iter_filters(), self.actions):
+            if e is None:
+                continue
+            e_keys = e.augment_keys
+            if type(e) is ValueFilter:
+                e_keys = get_value_augment_keys(e)
+            if e_keys is None:
+                return None
+            keys.update(e_keys)
+        return keys
+
+    def augment_cached(self, buckets):
+        """Fetch augment data the policy needs but cached buckets are missing."""
+        if self.source_type != 'describe':
+            return False
+        keys = self.get_augment_keys()
+        if keys is None:
+            keys = {m[1] for m in S3_AUGMENT_TABLE}
+        partial = [b for b in buckets if get_missing_augments(b, keys)]
+        if not partial:
+            return False
+        with self.executor_factory(max_workers=min((10, len(partial) + 1))) as w:
+            list(w.map(
+                functools.partial(assemble_bucket, keys=keys),
+                zip(itertools.repeat(self.session_factory), partial)))
+        return True
+
 
 S3_CONFIG_SUPPLEMENT_NULL_MAP = {
     'BucketLoggingConfiguration': u'{"destinationBucketName":null,"logFilePrefix":null}',
@@ -417,77 +502,103 @@ S3_AUGMENT_TABLE = (
 )
 
 
-def assemble_bucket(item):
+def get_value_augment_keys(f):
+    """Get the augment keys a value filter reads, from the root of its key."""
+    if len(f.data) == 1 and 'type' not in f.data:
+        key = list(f.data)[0]
+    else:
+        key = f.data.get('key') or ''
+    if key.startswith('tag:'):
+        return ('Tags',)
+    root = key.split('.', 1)[0].split('[', 1)[0]
+    if root in {m[1] for m in S3_AUGMENT_TABLE}:
+        return (root,)
+    return ()
+
+
+def get_missing_augments(b, keys):
+    """Get the augment table entries for keys a bucket hasn't been augmented with.
+
+    Methods we were denied access to are not retried.
+    """
+    denied = b.get('c7n:DeniedMethods', ())
+    return [m for m in S3_AUGMENT_TABLE
+            if m[1] in keys and m[1] not in b and m[0] not in denied]
+
+
+def assemble_bucket(item, keys=None):
     """Assemble a document representing all the config state around a bucket.
 
-    TODO: Refactor this, the logic here feels quite muddled.
+    Only the given augment keys are fetched when specified, along with
+    any of them the bucket is missing.
     """
     factory, b = item
     s = factory()
-    c = s.client('s3')
-    # Bucket Location, Current Client Location, Default Location
-    b_location = c_location = location = "us-east-1"
-    methods = list(S3_AUGMENT_TABLE)
+    if keys is None:
+        methods = list(S3_AUGMENT_TABLE)
+    else:
+        methods = get_missing_augments(b, keys)
+    # As soon as we learn location (which generally works) we can use a
+    # client for the bucket's region.
+    if methods and methods[0][1] == 'Location':
+        augment_bucket(s.client('s3'), b, methods.pop(0))
+    c = bucket_client(s, b)
     for minfo in methods:
-        m, k, default, select = minfo[:4]
-        try:
-            method = getattr(c, m)
-            v = method(Bucket=b['Name'])
-            v.pop('ResponseMetadata')
-            if select is not None and select in v:
-                v = v[select]
-        except (ssl.SSLError, SSLError) as e:
-            # Proxy issues? i assume
-            log.warning("Bucket ssl error %s: %s %s",
-                        b['Name'], b.get('Location', 'unknown'),
-                        e)
-            continue
-        except ClientError as e:
-            code = e.response['Error']['Code']
-            if code.startswith("NoSuch") or "NotFound" in code:
-                v = default
-            elif code == 'PermanentRedirect':
-                s = factory()
-                c = bucket_client(s, b)
-                # Requeue with the correct region given location constraint
-                methods.append((m, k, default, select))
-                continue
-            else:
-                log.warning(
-                    "Bucket:%s unable to invoke method:%s error:%s ",
-                    b['Name'], m, e.response['Error']['Message'])
-                # For auth failures, we don't bail out, continue processing if we can.
-                # Note this can lead to missing data, but in general is cleaner than
-                # failing hard, due to the common use of locked down s3 bucket policies
-                # that may cause issues fetching information across a fleet of buckets.
-
-                # This does mean s3 policies depending on augments should check denied
-                # methods annotation, generally though lacking get access to an augment means
-                # they won't have write access either.
-
-                # For other error types we raise and bail policy execution.
-                if e.response['Error']['Code'] == 'AccessDenied':
-                    b.setdefault('c7n:DeniedMethods', []).append(m)
-                    continue
-                raise
-        # As soon as we learn location (which generally works)
-        if k == 'Location' and v is not None:
-            b_location = v.get('LocationConstraint')
-            # Location == region for all cases but EU
-            # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
-            if b_location is None:
-                b_location = "us-east-1"
-            elif b_location == 'EU':
-                b_location = "eu-west-1"
-                v['LocationConstraint'] = 'eu-west-1'
-            if v and v != c_location:
-                c = s.client('s3', region_name=b_location)
-            elif c_location != location:
-                c = s.client('s3', region_name=location)
-        b[k] = v
+        augment_bucket(c, b, minfo, s)
     return b
 
 
+def augment_bucket(client, b, minfo, session=None):
+    """Invoke a single augment table method for a bucket, setting its key.
+
+    On a redirect the method is retried once with a client for the
+    bucket's region, when a session is given.
+    """
+    m, k, default, select = minfo[:4]
+    try:
+        method = getattr(client, m)
+        v = method(Bucket=b['Name'])
+        v.pop('ResponseMetadata')
+        if select is not None and select in v:
+            v = v[select]
+    except (ssl.SSLError, SSLError) as e:
+        # Proxy issues? i assume
+        log.warning("Bucket ssl error %s: %s %s",
+                    b['Name'], b.get('Location', 'unknown'),
+                    e)
+        return
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        if code.startswith("NoSuch") or "NotFound" in code:
+            v = default
+        elif code == 'PermanentRedirect' and session is not None:
+            # Retry with the correct region given location constraint
+            return augment_bucket(bucket_client(session, b), b, minfo)
+        else:
+            log.warning(
+                "Bucket:%s unable to invoke method:%s error:%s ",
+                b['Name'], m, e.response['Error']['Message'])
+            # For auth failures, we don't bail out, continue processing if we can.
+            # Note this can lead to missing data, but in general is cleaner than
+            # failing hard, due to the common use of locked down s3 bucket policies
+            # that may cause issues fetching information across a fleet of buckets.
+
+            # This does mean s3 policies depending on augments should check denied
+            # methods annotation, generally though lacking get access to an augment means
+            # they won't have write access either.
+
+            # For other error types we raise and bail policy execution.
+            if e.response['Error']['Code'] == 'AccessDenied':
+                b.setdefault('c7n:DeniedMethods', []).append(m)
+                return
+            raise
+    # Location == region for all cases but EU
+    # https://docs.aws.amazon.com/AmazonS3/latest/API/RESTBucketGETlocation.html
+    if k == 'Location' and v is not None and v.get('LocationConstraint') == 'EU':
+        v['LocationConstraint'] = 'eu-west-1'
+    b[k] = v
+
+
 def bucket_client(session, b, kms=False):
     region = get_region(b)
 
@@ -592,6 +703,7 @@ class S3CrossAccountFilter(CrossAccountAccessFilter):
                   - type: cross-account
     """
     permissions = ('s3:GetBucketPolicy',)
+    augment_keys = ('Policy',)
 
     def get_accounts(self):
         """add in elb access by default
@@ -709,6 +821,7 @@ class GlobalGrantsFilter(Filter):
             'type': 'array', 'items': {
                 'type': 'string', 'enum': [
                     'READ', 'WRITE', 'WRITE_ACP', 'READ_ACP', 'FULL_CONTROL']}})
+    augment_keys = ('Acl', 'Website')
 
     GLOBAL_ALL = "http://acs.amazonaws.com/groups/global/AllUsers"
     AUTH_ALL = "http://acs.amazonaws.com/groups/global/AuthenticatedUsers"
@@ -816,6 +929,9 @@ class BucketFinding(PostFinding):
 
 @S3.filter_registry.register('has-statement')
 class HasStatementFilter(polstmt_filter.HasStatementFilter):
+
+    augment_keys = ('Policy',)
+
     def get_std_format_args(self, bucket):
         return {
             'account_id': self.manager.config.account_id,
@@ -850,6 +966,7 @@ class EncryptionEnabledFilter(Filter):
     """
     schema = type_schema(
         'no-encryption-statement')
+    augment_keys = ('Policy',)
 
     def get_permissions(self):
         perms = self.manager.get_resource_manager('s3').get_permissions()
@@ -903,6 +1020,7 @@ class MissingPolicyStatementFilter(Filter):
         'missing-policy-statement',
         aliases=('missing-statement',),
         statement_ids={'type': 'array', 'items': {'type': 'string'}})
+    augment_keys = ('Policy',)
 
     def __call__(self, b):
         p = b.get('Policy')
@@ -950,6 +1068,7 @@ class BucketNotificationFilter(ValueFilter):
         rinherit=ValueFilter.schema)
     schema_alias = False
     annotation_key = 'c7n:MatchedNotificationConfigurationIds'
+    augment_keys = ('Notification',)
 
     permissions = ('s3:GetBucketNotification',)
 
@@ -1017,6 +1136,7 @@ class BucketLoggingFilter(BucketFilterBase):
         target_prefix={'type': 'string'})
     schema_alias = False
     account_name = None
+    augment_keys = ('Logging',)
 
     permissions = ("s3:GetBucketLogging", "iam:ListAccountAliases")
 
@@ -1105,6 +1225,7 @@ class NoOp(BucketActionBase):
 
     schema = type_schema('no-op')
     permissions = ('s3:ListAllMyBuckets',)
+    augment_keys = ()
 
     def process(self, buckets):
         return None
@@ -2495,6 +2616,8 @@ class BucketTag(Tag):
                     value: us-east-1
     """
 
+    augment_keys = ('Tags',)
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(self.manager.session_factory, resource_set, tags)
 
@@ -2522,6 +2645,7 @@ class MarkBucketForOp(TagDelayedAction):
 
     schema = type_schema(
         'mark-for-op', rinherit=TagDelayedAction.schema)
+    augment_keys = ('Tags',)
 
 
 @actions.register('unmark')
@@ -2543,6 +2667,8 @@ class RemoveBucketTag(RemoveTag):
                     tags: ['BucketOwner']
     """
 
+    augment_keys = ('Tags',)
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(
             self.manager.session_factory, resource_set, remove_tags=tags)
@@ -1,7 +1,11 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from collections import OrderedDict
+from concurrent.futures import as_completed
 import itertools
 import operator
+import threading
+import time
 import zlib
 import jmespath
 import re
@@ -17,7 +21,7 @@ from c7n import query, resolver
 from c7n.manager import resources
 from c7n.resources.securityhub import OtherResourcePostFinding, PostFinding
 from c7n.utils import (
-    chunks, local_session, type_schema, get_retry, parse_cidr)
+    chunks, local_session, type_schema, get_retry, parse_cidr, CidrSet)
 
 from c7n.resources.aws import shape_validate
 from c7n.resources.shield import IsShieldProtected, SetShieldProtection
@@ -723,8 +727,66 @@ class SecurityGroupPatch:
                        IpPermissions=[r for r in delta['added']])
 
 
+class SGUsageIndex:
+    """Run scoped reverse index of security group references.
+
+    Maps each security group id to the resources referencing it, by
+    scanner kind, per account and region. Built once by the first
+    usage filter in a run and shared with subsequent policies, entries
+    expire with the resource cache period. The least recently used
+    entries are evicted when over max_entries.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_key(self, manager, kinds):
+        return (
+            getattr(manager.config, 'account_id', None),
+            getattr(manager.config, 'region', None),
+            tuple(kinds))
+
+    def get(self, manager, kinds):
+        period = manager.config.cache_period * 60
+        key = self.get_key(manager, kinds)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry['created'] > period:
+                return None
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, manager, kinds, refs, nics):
+        now = time.time()
+        key = self.get_key(manager, kinds)
+        with self.lock:
+            self.entries[key] = entry = {
+                'created': now, 'refs': refs, 'nics': nics}
+            self.entries.move_to_end(key)
+            self.prune(now - manager.config.cache_period * 60)
+        return entry
+
+    def prune(self, created_before):
+        # callers hold the lock
+        for k in [k for k, e in self.entries.items() if e['created'] < created_before]:
+            del self.entries[k]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+
+
+sg_usage_index = SGUsageIndex()
+
+
 class SGUsage(Filter):
 
+    nics = ()
+
     def get_permissions(self):
         return list(itertools.chain(
             *[self.manager.get_resource_manager(m).get_permissions()
@@ -756,70 +818,92 @@ class SGUsage(Filter):
             ("codebuild", self.get_codebuild_sgs),
         )
 
-    def scan_groups(self):
-        used = set()
-        for kind, scanner in self.get_scanners():
-            sg_ids = scanner()
-            new_refs = sg_ids.difference(used)
-            used = used.union(sg_ids)
-            self.log.debug(
-                "%s using %d sgs, new refs %s total %s",
-                kind, len(sg_ids), len(new_refs), len(used))
+    def get_references(self):
+        """Map of security group id to referencing resource ids by scanner kind.
 
-        return used
+        Scanners run concurrently, and with resource caching enabled the
+        result is shared across policies via the usage index.
+        """
+        scanners = self.get_scanners()
+        kinds = [kind for kind, _ in scanners]
+        use_index = bool(getattr(self.manager.config, 'cache_period', 0))
+        entry = use_index and sg_usage_index.get(self.manager, kinds) or None
+        if entry is not None:
+            self.nics = entry['nics']
+            return entry['refs']
+
+        refs = {}
+        with self.executor_factory(max_workers=len(scanners)) as w:
+            futures = {w.submit(scanner): kind for kind, scanner in scanners}
+            for f in as_completed(futures):
+                kind = futures[f]
+                sg_refs = f.result()
+                new_refs = set(sg_refs).difference(refs)
+                for sg_id, rids in sg_refs.items():
+                    refs.setdefault(sg_id, {}).setdefault(kind, set()).update(rids)
+                self.log.debug(
+                    "%s using %d sgs, new refs %s total %s",
+                    kind, len(sg_refs), len(new_refs), len(refs))
+
+        if use_index:
+            sg_usage_index.put(self.manager, kinds, refs, self.nics)
+        return refs
+
+    def scan_groups(self):
+        return set(self.get_references())
 
     def get_launch_config_sgs(self):
         # Note assuming we also have launch config garbage collection
         # enabled.
-        sg_ids = set()
+        sg_ids = {}
         for cfg in self.manager.get_resource_manager('launch-config').resources():
             for g in cfg['SecurityGroups']:
-                sg_ids.add(g)
+                sg_ids.setdefault(g, set()).add(cfg['LaunchConfigurationName'])
             for g in cfg['ClassicLinkVPCSecurityGroups']:
-                sg_ids.add(g)
+                sg_ids.setdefault(g, set()).add(cfg['LaunchConfigurationName'])
         return sg_ids
 
     def get_lambda_sgs(self):
-        sg_ids = set()
+        sg_ids = {}
         for func in self.manager.get_resource_manager('lambda').resources(augment=False):
             if 'VpcConfig' not in func:
                 continue
             for g in func['VpcConfig']['SecurityGroupIds']:
-                sg_ids.add(g)
+                sg_ids.setdefault(g, set()).add(func['FunctionName'])
         return sg_ids
 
     def get_eni_sgs(self):
-        sg_ids = set()
+        sg_ids = {}
         self.nics = self.manager.get_resource_manager('eni').resources()
         for nic in self.nics:
             for g in nic['Groups']:
-                sg_ids.add(g['GroupId'])
+                sg_ids.setdefault(g['GroupId'], set()).add(nic['NetworkInterfaceId'])
         return sg_ids
 
     def get_codebuild_sgs(self):
-        sg_ids = set()
+        sg_ids = {}
         for cb in self.manager.get_resource_manager('codebuild').resources():
-            sg_ids |= set(cb.get('vpcConfig', {}).get('securityGroupIds', []))
+            for g in cb.get('vpcConfig', {}).get('securityGroupIds', []):
+                sg_ids.setdefault(g, set()).add(cb['name'])
         return sg_ids
 
     def get_sg_refs(self):
-        sg_ids = set()
+        sg_ids = {}
         for sg in self.manager.get_resource_manager('security-group').resources():
             for perm_type in ('IpPermissions', 'IpPermissionsEgress'):
                 for p in sg.get(perm_type, []):
                     for g in p.get('UserIdGroupPairs', ()):
-                        sg_ids.add(g['GroupId'])
+                        sg_ids.setdefault(g['GroupId'], set()).add(sg['GroupId'])
         return sg_ids
 
     def get_ecs_cwe_sgs(self):
-        sg_ids = set()
+        sg_ids = {}
         expr = jmespath.compile(
             'EcsParameters.NetworkConfiguration.awsvpcConfiguration.SecurityGroups[]')
         for rule in self.manager.get_resource_manager(
                 'event-rule-target').resources(augment=False):
-            ids = expr.search(rule)
-            if ids:
-                sg_ids.update(ids)
+            for g in expr.search(rule) or ():
+                sg_ids.setdefault(g, set()).add(rule['Id'])
         return sg_ids
 
 
@@ -1197,6 +1281,7 @@ class SGPermission(Filter):
 
     def process(self, resources, event=None):
         self.vfilters = []
+        self.cidr_filters = {}
         fattrs = list(sorted(self.perm_attrs.intersection(self.data.keys())))
         self.ports = 'Ports' in self.data and self.data['Ports'] or ()
         self.only_ports = (
@@ -1237,15 +1322,16 @@ class SGPermission(Filter):
         if not ip_perms:
             return False
 
-        match_range = self.data[cidr_key]
-
-        if isinstance(match_range, dict):
-            match_range['key'] = cidr_type
-        else:
-            match_range = {cidr_type: match_range}
-
-        vf = ValueFilter(match_range, self.manager)
-        vf.annotate = False
+        vf = self.cidr_filters.get(cidr_key)
+        if vf is None:
+            match_range = self.data[cidr_key]
+            if isinstance(match_range, dict):
+                match_range['key'] = cidr_type
+            else:
+                match_range = {cidr_type: match_range}
+            # built once per filter, so the match cidrs are only parsed once.
+            vf = self.cidr_filters[cidr_key] = ValueFilter(match_range, self.manager)
+            vf.annotate = False
 
         for ip_range in ip_perms:
             found = vf(ip_range)
@@ -2059,7 +2145,7 @@ class AclAwsS3Cidrs(Filter):
         ec2 = local_session(self.manager.session_factory).client('ec2')
         cidrs = jmespath.search(
             "PrefixLists[].Cidrs[]", ec2.describe_prefix_lists())
-        cidrs = [parse_cidr(cidr) for cidr in cidrs]
+        cidrs = CidrSet([parse_cidr(cidr) for cidr in cidrs])
         results = []
 
         check_egress = self.data.get('egress', True)
@@ -2074,8 +2160,8 @@ class AclAwsS3Cidrs(Filter):
                 if not entry['Egress'] and not check_ingress:
                     continue
                 entry_cidr = parse_cidr(entry['CidrBlock'])
-                for c in matched:
-                    if c in entry_cidr and matched[c] is None:
+                for c in cidrs.subnets(entry_cidr):
+                    if matched[c] is None:
                         matched[c] = (
                             entry['RuleAction'] == 'allow' and True or False)
             if present and all(matched.values()):
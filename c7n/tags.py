@@ -269,6 +269,7 @@ class TagActionFilter(Filter):
         skew_hours={'type': 'number', 'minimum': 0},
         op={'type': 'string'})
     schema_alias = True
+    augment_keys = ('Tags',)
 
     current_date = None
 
@@ -21,6 +21,7 @@ from distutils.util import strtobool
 
 from c7n import deprecated, policy
 from c7n.exceptions import DeprecationError
+from c7n.filters.related import related_index
 from c7n.loader import PolicyLoader
 from c7n.ctx import ExecutionContext
 from c7n.utils import reset_session_cache
@@ -116,6 +117,10 @@ class CustodianTestCore:
         if config.get('cache'):
             config["cache"] = os.path.join(temp_dir, "c7n.cache")
             config["cache_period"] = 300
+            self.addCleanup(related_index.clear)
+            # imported here, as aws resources aren't loaded by all provider tests
+            from c7n.resources.vpc import sg_usage_index
+            self.addCleanup(sg_usage_index.clear)
         return Config.empty(**config)
 
     def load_policy_set(self, data, config=None):
@@ -1,5 +1,8 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+import bisect
 import copy
 from datetime import datetime, timedelta
 from dateutil.tz import tzutc
@@ -13,12 +16,18 @@ import re
 import sys
 import threading
 import time
+from functools import partial
 from urllib import parse as urlparse
 from urllib.request import getproxies, proxy_bypass
 
 
 from dateutil.parser import ParserError, parse
 
+try:
+    from boto3 import Session as BotoSession
+except ImportError:  # pragma: no cover
+    BotoSession = None
+
 from c7n import config
 from c7n.exceptions import ClientError, PolicyValidationError
 
@@ -310,10 +319,81 @@ def query_instances(session, client=None, **query):
 
 
 CONN_CACHE = threading.local()
+SESSION_TTL = 60 * 45
+
+
+class ClientPool:
+    """Thread safe, bounded pool of boto3 clients.
+
+    Clients are keyed by session identity and user agent, service, region
+    and client config, so repeated ``session.client(...)`` calls against a
+    cached session reuse a client instead of reloading the service model
+    and endpoint data. Clients are evicted with their session, on expiry of
+    the session cache period, or least recently used when over size.
+    """
+
+    def __init__(self, max_size=256, ttl=SESSION_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clients = OrderedDict()
+        self.created = Counter()
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def get_key(self, session, service_name, region_name, params):
+        options = []
+        for k, v in sorted(params.items()):
+            # botocore config objects don't implement equality
+            v = getattr(v, '_user_provided_options', v)
+            options.append((k, repr(v)))
+        # session factories update the user agent of cached sessions
+        # per policy, clients are created with the agent at the time.
+        return (id(session), session._session.user_agent(),
+                service_name, region_name, tuple(options))
+
+    def get_client(self, session, service_name, region_name=None, **params):
+        key = self.get_key(session, service_name, region_name, params)
+        now = time.time()
+        with self.lock:
+            entry = self.clients.get(key)
+            if entry is not None and entry[0] is session and now - entry[1] < self.ttl:
+                self.clients.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+        client = BotoSession.client(
+            session, service_name, region_name=region_name, **params)
+
+        with self.lock:
+            self.clients[key] = (session, now, client)
+            self.clients.move_to_end(key)
+            self.created[service_name] += 1
+            while len(self.clients) > self.max_size:
+                self.clients.popitem(last=False)
+        return client
+
+    def evict(self, session):
+        with self.lock:
+            for k in [k for k, v in self.clients.items() if v[0] is session]:
+                del self.clients[k]
+
+    def get_stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'created': dict(self.created)}
+
+    def clear(self):
+        with self.lock:
+            self.clients.clear()
+
+
+client_pool = ClientPool()
 
 
 def local_session(factory, region=None):
-    """Cache a session thread local for up to 45m"""
+    """Cache a session thread local for up to 45m
+
+    boto3 sessions have their clients served from the shared client pool.
+    """
     factory_region = getattr(factory, 'region', 'global')
     if region:
         factory_region = region
@@ -321,9 +401,13 @@ def local_session(factory, region=None):
     t = getattr(CONN_CACHE, factory_region, {}).get('time')
 
     n = time.time()
-    if s is not None and t + (60 * 45) > n:
+    if s is not None and t + SESSION_TTL > n:
         return s
+    if s is not None:
+        client_pool.evict(s)
     s = factory()
+    if BotoSession is not None and isinstance(s, BotoSession):
+        s.client = partial(client_pool.get_client, s)
 
     setattr(CONN_CACHE, factory_region, {'session': s, 'time': n})
     return s
@@ -332,6 +416,63 @@ def local_session(factory, region=None):
 def reset_session_cache():
     for k in [k for k in dir(CONN_CACHE) if not k.startswith('_')]:
         setattr(CONN_CACHE, k, {})
+    client_pool.clear()
+
+
+TAG_MAPS = threading.local()
+
+
+@contextmanager
+def tag_map_scope():
+    """Share per resource tag dictionaries for the duration of the block.
+
+    Within a scope, tag lookups via :func:`get_tag_value` build a
+    key/value dict for each resource's tag list once, and reuse it for
+    every subsequent lookup, ie. across all the filters in a policy's
+    filter chain. Scopes nest, the outermost one owns the maps.
+    """
+    if getattr(TAG_MAPS, 'maps', None) is not None:
+        yield
+        return
+    TAG_MAPS.maps = {}
+    try:
+        yield
+    finally:
+        TAG_MAPS.maps = None
+
+
+def get_tag_value(i, k):
+    """Get the value of tag `k` from a resource, or None.
+
+    Supports the aws tag list form, as well as the gcp `labels`
+    and azure `tags` dict forms.
+    """
+    if 'Tags' in i:
+        tags = i.get('Tags') or ()
+        maps = getattr(TAG_MAPS, 'maps', None)
+        if maps is None:
+            for t in tags:
+                if t.get('Key') == k:
+                    return t.get('Value')
+            return None
+        # keyed by list identity, holding a reference to the list
+        # ensures the id isn't reused while the scope is active.
+        entry = maps.get(id(tags))
+        if entry is None or entry[0] is not tags:
+            tag_map = {}
+            for t in tags:
+                tag_map.setdefault(t.get('Key'), t.get('Value'))
+            entry = maps[id(tags)] = (tags, tag_map)
+        return entry[1].get(k)
+    # GCP schema: 'labels': {'key': 'value'}
+    elif 'labels' in i:
+        return i.get('labels', {}).get(k, None)
+    # GCP has a secondary form of labels called tags
+    # as labels without values.
+    # Azure schema: 'tags': {'key': 'value'}
+    elif 'tags' in i:
+        return i.get('tags', {}).get(k, None)
+    return None
 
 
 def annotation(i, k):
@@ -514,18 +655,84 @@ class IPv4Network(ipaddress.IPv4Network):
             return self._is_subnet_of(other, self)
 
 
-class IPv4List:
-    def __init__(self, ipv4_list):
-        self.ipv4_list = ipv4_list
+class CidrSet:
+    """A compiled set of networks and addresses, for either ip version.
+
+    Members are held as sorted integer intervals, answering containment,
+    overlap and subnet queries with a binary search rather than a scan
+    over every member. Networks are nested or disjoint, so containment
+    only needs the outermost networks, which never overlap.
+    """
+
+    def __init__(self, cidrs):
+        self.cidrs = [c for c in cidrs if isinstance(
+            c, (ipaddress._BaseNetwork, ipaddress._BaseAddress))]
+        self.intervals = {}
+        for c in self.cidrs:
+            self.intervals.setdefault(c.version, []).append(
+                self.get_interval(c) + (c,))
+        self.starts = {}
+        self.outer = {}
+        for version, intervals in self.intervals.items():
+            intervals.sort(key=lambda i: (i[0], -i[1]))
+            self.starts[version] = [i[0] for i in intervals]
+            outer = []
+            for start, end, _ in intervals:
+                if not outer or start > outer[-1][1]:
+                    outer.append((start, end))
+            self.outer[version] = ([o[0] for o in outer], [o[1] for o in outer])
+
+    @staticmethod
+    def get_interval(cidr):
+        if isinstance(cidr, ipaddress._BaseNetwork):
+            return int(cidr.network_address), int(cidr.broadcast_address)
+        return int(cidr), int(cidr)
+
+    def __len__(self):
+        return len(self.cidrs)
+
+    def __iter__(self):
+        return iter(self.cidrs)
 
     def __contains__(self, other):
-        if other is None:
+        """Whether other is within any member network, or is a member address."""
+        if getattr(other, 'version', None) not in self.outer:
+            return False
+        start, end = self.get_interval(other)
+        starts, ends = self.outer[other.version]
+        idx = bisect.bisect_right(starts, start) - 1
+        return idx >= 0 and ends[idx] >= end
+
+    def overlaps(self, other):
+        """Whether any member overlaps with other."""
+        if getattr(other, 'version', None) not in self.outer:
             return False
-        in_networks = any([other in y_elem for y_elem in self.ipv4_list
-          if isinstance(y_elem, IPv4Network)])
-        in_addresses = any([other == y_elem for y_elem in self.ipv4_list
-          if isinstance(y_elem, ipaddress.IPv4Address)])
-        return any([in_networks, in_addresses])
+        start, end = self.get_interval(other)
+        starts, ends = self.outer[other.version]
+        idx = bisect.bisect_right(starts, end) - 1
+        return idx >= 0 and ends[idx] >= start
+
+    def subnets(self, other):
+        """Members within other, ie. subnets of the other network."""
+        if getattr(other, 'version', None) not in self.intervals:
+            return []
+        start, end = self.get_interval(other)
+        intervals = self.intervals[other.version]
+        idx = bisect.bisect_left(self.starts[other.version], start)
+        found = []
+        for i_start, i_end, cidr in itertools.islice(intervals, idx, None):
+            if i_start > end:
+                break
+            if i_end <= end:
+                found.append(cidr)
+        return found
+
+
+class IPv4List(CidrSet):
+
+    def __init__(self, ipv4_list):
+        self.ipv4_list = ipv4_list
+        super().__init__(ipv4_list)
 
 
 def reformat_schema(model):
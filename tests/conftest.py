@@ -32,6 +32,9 @@ pytest_plugins = ("pytest_recording",)
 LazyReplay.value = not strtobool(os.environ.get('C7N_FUNCTIONAL', 'no'))
 LazyPluginCacheDir.value = '../.tfcache'
 
+# don't persist generated policy schemas from test runs
+os.environ.setdefault('C7N_SCHEMA_CACHE', '')
+
 
 class TerraformAWSRewriteHooks:
     """ Local pytest plugin
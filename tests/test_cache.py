@@ -6,7 +6,8 @@ import os
 import pickle
 import sqlite3
 import sys
-from unittest import TestCase
+import time
+from unittest import TestCase, mock
 
 import pytest
 
@@ -25,6 +26,10 @@ class TestCache(TestCase):
 
 class MemCacheTest(TestCase):
 
+    def setUp(self):
+        cache.InMemoryCache._InMemoryCache__shared_state.clear()
+        self.addCleanup(cache.InMemoryCache._InMemoryCache__shared_state.clear)
+
     def test_mem_factory(self):
         self.assertEqual(
             cache.factory(config.Bag(cache='memory', cache_period=5)).__class__,
@@ -33,7 +38,9 @@ class MemCacheTest(TestCase):
     def test_get_set(self):
         mem_cache = cache.InMemoryCache({})
         mem_cache.save({'region': 'us-east-1'}, {'hello': 'world'})
-        self.assertEqual(mem_cache.size(), 1)
+        self.assertEqual(
+            mem_cache.size(),
+            len(cache.encode({'region': 'us-east-1'})) + len(cache.encode({'hello': 'world'})))
         self.assertEqual(mem_cache.load(), True)
 
         mem_cache = cache.InMemoryCache({})
@@ -42,6 +49,34 @@ class MemCacheTest(TestCase):
             {'hello': 'world'})
         mem_cache.close()
 
+    def test_expiration(self):
+        mem_cache = cache.InMemoryCache(config.Bag(cache='memory', cache_period=5))
+        mem_cache.save('abc', [1, 2, 3])
+        self.assertEqual(mem_cache.get('abc'), [1, 2, 3])
+        with mock.patch.object(cache.time, 'time', return_value=time.time() + 301):
+            self.assertEqual(mem_cache.get('abc'), None)
+        self.assertEqual(mem_cache.size(), 0)
+
+    def test_lru_entries(self):
+        mem_cache = cache.InMemoryCache(config.Bag(cache='memory', cache_period=5))
+        mem_cache.max_entries = 2
+        mem_cache.save('a', 1)
+        mem_cache.save('b', 2)
+        mem_cache.get('a')
+        mem_cache.save('c', 3)
+        self.assertEqual(mem_cache.get('b'), None)
+        self.assertEqual(mem_cache.get('a'), 1)
+        self.assertEqual(mem_cache.get('c'), 3)
+
+    def test_lru_bytes(self):
+        mem_cache = cache.InMemoryCache(config.Bag(cache='memory', cache_period=5))
+        mem_cache.save('a', 'x' * 100)
+        mem_cache.max_bytes = mem_cache.size() + 50
+        mem_cache.save('b', 'y' * 100)
+        self.assertEqual(mem_cache.get('a'), None)
+        self.assertEqual(mem_cache.get('b'), 'y' * 100)
+        self.assertLessEqual(mem_cache.size(), mem_cache.max_bytes)
+
 
 def test_sqlkv(tmp_path):
     kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
@@ -55,6 +90,20 @@ def test_sqlkv(tmp_path):
     kv.close()
 
 
+def test_sqlkv_concurrent_writers(tmp_path):
+    caches = [
+        cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+        for i in range(2)]
+    for kv in caches:
+        kv.load()
+    assert caches[0].conn.execute('pragma journal_mode').fetchone() == ('wal',)
+
+    caches[1].save('a', [1])
+    assert caches[0].get('a') == [1]
+    for kv in caches:
+        kv.close()
+
+
 def test_sqlkv_get_expired(tmp_path):
     kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
     kv.load()
@@ -99,3 +148,73 @@ def test_sqlkv_convert(tmp_path):
     kv.close()
     with open(cache_path, 'rb') as fh:
         assert fh.read(15) == b"SQLite format 3"
+
+
+def test_sharded_factory(tmp_path):
+    kv = cache.factory(config.Bag(cache="sharded://%s" % tmp_path, cache_period=60))
+    assert isinstance(kv, cache.ShardedCache)
+    assert kv.cache_dir == str(tmp_path)
+
+
+def test_sharded_get_save(tmp_path):
+    kv = cache.ShardedCache(config.Bag(cache="sharded://%s" % tmp_path, cache_period=60))
+    kv.id_key = 'id'
+    k1 = {"account": "123456789012", "region": "us-west-2", "resource": "EC2",
+          "source": "describe", "q": None}
+    k2 = dict(k1, region='us-east-1')
+    v1 = [{'id': 'a', 'x': 1}, {'id': 'b', 'x': 2}, {'id': 'c', 'x': 3}]
+
+    with kv:
+        assert kv.get(k1) is None
+        kv.save(k1, v1)
+        kv.save(k2, v1[:1])
+        assert kv.get(k1) == v1
+        assert kv.get(k2) == v1[:1]
+        assert kv.get_resources(k1, ['c', 'a', 'z']) == [v1[0], v1[2]]
+        kv.save(("uri-resolver", "s3://bucket/key"), "contents")
+        assert kv.get(("uri-resolver", "s3://bucket/key")) == "contents"
+
+    assert sorted(os.listdir(tmp_path)) == [
+        '123456789012-us-east-1-EC2-describe.db',
+        '123456789012-us-west-2-EC2-describe.db',
+        'default.db']
+    assert kv.size() > 0
+    stats = kv.get_stats()
+    assert stats['CacheHits'] == 4
+    assert stats['CacheMisses'] == 1
+    assert stats['CacheBytesWritten'] > 0
+    assert stats['CacheBytesRead'] > 0
+
+
+def test_sharded_positional(tmp_path):
+    kv = cache.ShardedCache(config.Bag(cache="sharded://%s" % tmp_path, cache_period=60))
+    kv.id_key = 'id'
+    k1 = {"account": "123456789012", "region": "us-west-2", "resource": "EC2"}
+    v1 = [{'id': 'a', 'x': 1}, {'id': 'a', 'x': 2}]
+    kv.save(k1, v1)
+    assert kv.get(k1) == v1
+    assert kv.get_resources(k1, ['a']) == v1
+    kv.close()
+
+
+def test_sharded_get_expired(tmp_path):
+    kv = cache.ShardedCache(config.Bag(cache="sharded://%s" % tmp_path, cache_period=60))
+    k1 = {"account": "123456789012", "region": "us-west-2", "resource": "EC2"}
+    kv.save(k1, [{'id': 'a'}], datetime.utcnow() - timedelta(days=10))
+    assert kv.get(k1) is None
+    kv.close()
+
+    # stale rows are removed when a shard is opened
+    kv = cache.ShardedCache(config.Bag(cache="sharded://%s" % tmp_path, cache_period=60))
+    conn = kv.get_shard(k1)
+    assert conn.execute('select count(*) from c7n_resource').fetchone() == (0,)
+    kv.close()
+
+
+def test_codec_fallback(monkeypatch):
+    monkeypatch.setattr(cache, 'zstandard', None)
+    monkeypatch.setattr(cache, 'lz4', None)
+    codec = cache.Codec()
+    value = codec.encode({'a': [1, 2, 3]})
+    assert value[:1] == cache.Codec.ZLIB
+    assert codec.decode(value) == {'a': [1, 2, 3]}
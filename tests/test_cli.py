@@ -83,6 +83,11 @@ class UtilsTest(BaseTest):
         param = "day=today"
         self.assertIs(cli._key_val_pair(param), param)
 
+    def test_service_limit(self):
+        self.assertRaises(ArgumentTypeError, cli._service_limit, "iam")
+        self.assertRaises(ArgumentTypeError, cli._service_limit, "iam=0")
+        self.assertEqual(cli._service_limit("iam=4"), ("iam", 4))
+
 
 class VersionTest(CliTest):
 
@@ -501,6 +506,123 @@ class RunTest(CliTest):
             ]
         )
 
+    def test_ec2_shared_fetch(self):
+        session_factory = self.replay_flight_data(
+            "test_ec2_state_transition_age_filter"
+        )
+
+        from c7n.policy import PolicyCollection
+
+        self.patch(
+            PolicyCollection,
+            "session_factory",
+            staticmethod(lambda x=None: session_factory),
+        )
+
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {
+                        "name": "ec2-state-transition-age",
+                        "resource": "ec2",
+                        "filters": [
+                            {"State.Name": "running"}, {"type": "state-age", "days": 30}
+                        ],
+                    },
+                    {
+                        "name": "ec2-running",
+                        "resource": "ec2",
+                        "filters": [{"State.Name": "running"}],
+                    }
+                ]
+            }
+        )
+
+        log_output = self.capture_logging('custodian.commands')
+        self.run_and_expect_success(
+            [
+                "custodian",
+                "run",
+                "--shared-fetch",
+                "--cache-period",
+                "0",
+                "-s",
+                temp_dir,
+                yaml_file,
+            ]
+        )
+        self.assertIn(
+            "shared fetch: 2 policies in 1 groups, 1 api enumerations saved",
+            log_output.getvalue())
+
+    def test_ec2_parallel(self):
+        session_factory = self.replay_flight_data(
+            "test_ec2_state_transition_age_filter"
+        )
+
+        from c7n.policy import PolicyCollection
+
+        self.patch(
+            PolicyCollection,
+            "session_factory",
+            staticmethod(lambda x=None: session_factory),
+        )
+
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {
+                        "name": "ec2-state-transition-age",
+                        "resource": "ec2",
+                        "filters": [
+                            {"State.Name": "running"}, {"type": "state-age", "days": 30}
+                        ],
+                    },
+                    {
+                        "name": "ec2-running",
+                        "resource": "ec2",
+                        "filters": [{"State.Name": "running"}],
+                    }
+                ]
+            }
+        )
+
+        self.run_and_expect_success(
+            [
+                "custodian",
+                "run",
+                "--parallel",
+                "2",
+                "--service-limit",
+                "ec2=1",
+                "--cache-period",
+                "0",
+                "-s",
+                temp_dir,
+                yaml_file,
+            ]
+        )
+        self.assertEqual(
+            sorted(os.listdir(temp_dir)),
+            ["ec2-running", "ec2-state-transition-age"])
+
+    def test_parallel_error(self):
+        from c7n.policy import Policy
+
+        self.patch(
+            Policy, "__call__", lambda x: (_ for _ in ()).throw(Exception("foobar"))
+        )
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {"policies": [
+                {"name": "error-a", "resource": "ec2"},
+                {"name": "error-b", "resource": "iam-role"}]}
+        )
+        self.run_and_expect_failure(
+            ["custodian", "run", "--parallel", "2", "-s", temp_dir, yaml_file], 2)
+
     def test_error(self):
         from c7n.policy import Policy
 
@@ -1,11 +1,14 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from datetime import datetime, timedelta
 import os
 from botocore.exceptions import ClientError
+from dateutil.tz import tzutc
 import placebo
 
 from c7n import credentials
-from c7n.credentials import SessionFactory, assumed_session, get_sts_client
+from c7n.credentials import (
+    CredentialBroker, SessionFactory, assumed_session, get_sts_client)
 from c7n.version import version
 from c7n.utils import local_session
 
@@ -82,3 +85,40 @@ class Credential(BaseTest):
         client = local_session(factory).client('ec2')
         self.assertTrue(
             'check-ec2' in client._client_config.user_agent)
+
+    def test_credential_broker(self):
+        calls = []
+
+        def fetch(ttl=timedelta(hours=1)):
+            calls.append(True)
+            return dict(
+                access_key='AKI', secret_key='secret', token='token',
+                expiry_time=(datetime.now(tzutc()) + ttl).isoformat())
+
+        broker = CredentialBroker()
+        key = broker.get_key('arn:aws:iam::123456789012:role/Custodian', None, 'c7n')
+        self.assertEqual(broker.get(key, fetch), broker.get(key, fetch))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(broker.get_stats(), {'hit': 1, 'miss': 1})
+
+        # credentials botocore would immediately refresh are fetched again
+        expiring = broker.get(
+            broker.get_key('arn:aws:iam::123456789012:role/Other', None, 'c7n'),
+            lambda: fetch(timedelta(minutes=5)))
+        self.assertEqual(broker.get_stats()['miss'], 2)
+        self.assertLess(broker.get_ttl(expiring), broker.min_ttl)
+
+    def test_credential_broker_file_cache(self):
+        self.change_environment(C7N_CREDENTIAL_CACHE=self.get_temp_dir())
+        creds = dict(
+            access_key='AKI', secret_key='secret', token='token',
+            expiry_time=(datetime.now(tzutc()) + timedelta(hours=1)).isoformat())
+        key = CredentialBroker.get_key('arn:aws:iam::123456789012:role/Custodian', 'xyz', 'c7n')
+        CredentialBroker().get(key, lambda: creds)
+
+        def fetch():
+            raise AssertionError("credentials should be loaded from cache")
+
+        broker = CredentialBroker()
+        self.assertEqual(broker.get(key, fetch), creds)
+        self.assertEqual(broker.get_stats(), {'file-hit': 1})
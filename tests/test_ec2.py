@@ -14,6 +14,7 @@ from c7n.exceptions import PolicyValidationError, ClientError
 from c7n.resources import ec2
 from c7n.resources.ec2 import actions, QueryFilter
 from c7n import tags, utils
+from c7n.filters.metrics import MetricsFilter, metric_cache
 
 from .common import BaseTest
 
@@ -298,6 +299,46 @@ class TestMetricFilter(BaseTest):
         resources = policy.run()
         self.assertEqual(len(resources), 1)
 
+    def test_metric_filter_batch(self):
+        metric_cache.clear()
+        self.addCleanup(metric_cache.clear)
+        queries = []
+        get_metric_data = MetricsFilter.get_metric_data
+
+        def counted_get_metric_data(self, client, query_set):
+            queries.append(len(query_set))
+            return get_metric_data(self, client, query_set)
+
+        self.patch(MetricsFilter, 'get_metric_data', counted_get_metric_data)
+        session_factory = self.replay_flight_data("test_ec2_metric_batch")
+        for name in ('ec2-utilization', 'ec2-utilization-2'):
+            policy = self.load_policy(
+                {
+                    "name": name,
+                    "resource": "ec2",
+                    "filters": [
+                        {
+                            "type": "metrics",
+                            "name": "CPUUtilization",
+                            "days": 3,
+                            "value": 1.5,
+                        }
+                    ],
+                },
+                config={'batch_metrics': True},
+                session_factory=session_factory,
+            )
+            resources = policy.run()
+            self.assertEqual(len(resources), 1)
+            datapoints = resources[0]['c7n.metrics']['AWS/EC2.CPUUtilization.Average.3']
+            self.assertEqual(len(datapoints), 1)
+            self.assertEqual(datapoints[0]['Average'], 0.02857142857142857)
+            self.assertEqual(
+                datapoints[0]['Timestamp'].replace(tzinfo=None),
+                datetime.datetime(2016, 6, 21, 20, 59))
+        # the second policy is served from the metric cache
+        self.assertEqual(queries, [1])
+
 
 class TestPropagateSpotTags(BaseTest):
 
@@ -42,5 +42,17 @@ class MainExecutorTest(ExecutorBase, unittest.TestCase):
     executor_factory = executor.MainThreadExecutor
 
 
+class KeyedLimiterTest(unittest.TestCase):
+
+    def test_limiter(self):
+        limiter = executor.KeyedLimiter({'iam': 1})
+        with limiter.acquire('iam'):
+            self.assertFalse(limiter.semaphores['iam'].acquire(blocking=False))
+            # unlimited keys pass through
+            with limiter.acquire('ec2'):
+                pass
+        self.assertTrue(limiter.semaphores['iam'].acquire(blocking=False))
+
+
 if __name__ == "__main__":
     unittest.main()
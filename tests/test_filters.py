@@ -16,9 +16,11 @@ from c7n import filters as base_filters
 from c7n.resources.ec2 import filters
 from c7n.resources.elb import ELB
 from c7n.testing import mock_datetime_now
+from c7n import utils
 from c7n.utils import annotation
 from .common import instance, event_data, Bag, BaseTest
 from c7n.filters.core import AnnotationSweeper, ValueRegex, parse_date as core_parse_date
+from c7n.filters.related import RelatedIndex
 
 
 class BaseFilterTest(unittest.TestCase):
@@ -103,6 +105,24 @@ class TestOrFilter(unittest.TestCase):
         self.assertEqual(f.process(results), results)
         self.assertEqual(f.process([instance(Architecture="amd64")]), [])
 
+    def test_or_process_set(self):
+        resources = [
+            {"Name": "a", "Color": "green"},
+            {"Name": "b", "Color": "blue"},
+            {"Name": "c", "Color": "red"}]
+        f = filters.factory({"or": [{"Color": "red"}, {"Color": "green"}]})
+        f.manager = Bag(get_model=lambda: Bag(id="Name"))
+
+        class CopyFilter:
+            # filters returning copies map back by resource id
+            def process(self, resources, event=None):
+                return [dict(r) for r in resources if r["Name"] == "b"]
+
+        f.filters.append(CopyFilter())
+        results = f.process(resources)
+        self.assertEqual([r["Name"] for r in results], ["a", "b", "c"])
+        self.assertIs(results[1], resources[1])
+
 
 class TestAndFilter(unittest.TestCase):
 
@@ -243,6 +263,56 @@ class TestValueFilter(unittest.TestCase):
         self.assertEqual(vf.v, None)
         self.assertFalse(res)
 
+    def test_value_compile(self):
+        vf = filters.factory({
+            "type": "value", "key": "tag:Env", "op": "in",
+            "value": ["prod", "staging"]})
+        vf.validate()
+        self.assertEqual(vf.k, "tag:Env")
+        self.assertIsNone(vf.matcher)
+        self.assertTrue(vf.match({"Tags": [{"Key": "Env", "Value": "prod"}]}))
+        self.assertFalse(vf.match({"Tags": [{"Key": "Env", "Value": "dev"}]}))
+        self.assertFalse(vf.match({"Tags": []}))
+        self.assertFalse(vf.match(None))
+
+        vf = filters.factory({
+            "type": "value", "key": "Name",
+            "value_regex": "app-([a-z]+)-.*", "value": "web"})
+        vf.validate()
+        self.assertTrue(vf.match({"Name": "app-web-01"}))
+        self.assertFalse(vf.match({"Name": "app-db-01"}))
+        self.assertFalse(vf.match({"Name": 42}))
+
+    def test_value_compile_subclass_accessor(self):
+
+        class NestedValue(base_filters.ValueFilter):
+            def get_resource_value(self, k, i):
+                return super().get_resource_value(k, i['c7n:nested'])
+
+        vf = NestedValue({"type": "value", "key": "a", "value": 1})
+        self.assertTrue(vf.match({"c7n:nested": {"a": 1}, "a": 2}))
+
+    def test_value_sentinel_static_type(self):
+        vf = filters.factory({
+            "type": "value", "key": "Items", "value_type": "size",
+            "value": "empty"})
+        self.assertTrue(vf.match({"Items": []}))
+        self.assertFalse(vf.match({"Items": [1]}))
+
+    def test_tag_map_scope(self):
+        tags = [{"Key": "App", "Value": "a"}, {"Key": "App", "Value": "b"}]
+        resources = [{"Tags": tags}, {"Tags": [{"Key": "App", "Value": "c"}]}]
+        vf = filters.factory({"tag:App": "a"})
+        self.assertEqual(vf.process(resources), resources[:1])
+        with utils.tag_map_scope():
+            with utils.tag_map_scope():
+                self.assertEqual(vf.process(resources), resources[:1])
+            maps = utils.TAG_MAPS.maps
+            self.assertEqual(
+                maps[id(tags)], (tags, {"App": "a"}))
+            self.assertEqual(len(maps), 2)
+        self.assertIsNone(utils.TAG_MAPS.maps)
+
     def test_value_type_cidr(self):
         # test cidr range match
         resource = {"ingress": "10.10.10.0/24"}
@@ -1504,6 +1574,71 @@ class TestReduceFilter(BaseFilterTest):
         )
 
 
+class RelatedIndexTest(unittest.TestCase):
+
+    def get_manager(self, region='us-east-1'):
+        calls = []
+
+        class Manager:
+            type = 'security-group'
+            source_type = 'describe'
+            config = Bag(account_id='123', region=region, cache_period=15)
+            population = [{'GroupId': 'sg-%d' % i} for i in range(20)]
+
+            def get_model(self):
+                return Bag(id='GroupId')
+
+            def get_resources(self, ids):
+                calls.append(('get', sorted(ids)))
+                return [r for r in self.population if r['GroupId'] in ids]
+
+            def resources(self):
+                calls.append(('resources',))
+                return self.population
+
+        return Manager(), calls
+
+    def test_related_index_batches_misses(self):
+        index = RelatedIndex()
+        manager, calls = self.get_manager()
+        self.assertEqual(
+            index.get_resources(manager, ['sg-1', 'sg-2'], 10),
+            [{'GroupId': 'sg-1'}, {'GroupId': 'sg-2'}])
+        self.assertEqual(
+            [r['GroupId'] for r in index.get_resources(manager, ['sg-2', 'sg-3'], 10)],
+            ['sg-2', 'sg-3'])
+        self.assertEqual(calls, [('get', ['sg-1', 'sg-2']), ('get', ['sg-3'])])
+        self.assertEqual(index.get_stats(), {'hits': 1, 'misses': 3})
+
+        # other regions are indexed separately
+        west, west_calls = self.get_manager('us-west-2')
+        index.get_resources(west, ['sg-1'], 10)
+        self.assertEqual(west_calls, [('get', ['sg-1'])])
+
+    def test_related_index_population(self):
+        index = RelatedIndex()
+        manager, calls = self.get_manager()
+        ids = ['sg-%d' % i for i in range(12)]
+        self.assertEqual(len(index.get_resources(manager, ids, 10)), 20)
+        self.assertEqual(len(index.get_resources(manager, ['sg-19'], 10)), 20)
+        self.assertEqual(index.get_population(manager), manager.population)
+        self.assertEqual(calls, [('resources',)])
+        self.assertEqual(index.get_stats(), {'misses': 12, 'loads': 1, 'hits': 2})
+        index.clear()
+        self.assertEqual(index.get_stats(), {})
+
+    def test_related_index_bounded(self):
+        index = RelatedIndex(max_entries=1)
+        east, east_calls = self.get_manager()
+        west, west_calls = self.get_manager('us-west-2')
+        index.get_resources(east, ['sg-1'], 10)
+        index.get_resources(west, ['sg-1'], 10)
+        self.assertEqual(len(index.entries), 1)
+        # least recently used region was evicted, and is fetched again
+        index.get_resources(east, ['sg-1'], 10)
+        self.assertEqual(east_calls, [('get', ['sg-1']), ('get', ['sg-1'])])
+
+
 class AnnotationSweeperTest(unittest.TestCase):
     def test_annotation_sweep_jmespath(self):
         resources = [
@@ -1540,6 +1675,24 @@ class AnnotationSweeperTest(unittest.TestCase):
         self.assertEqual(len(resources), 2)
         self.assertEqual(resources, swept)
 
+    def test_annotation_sweep_restore(self):
+        resources = [
+            {"Id": "a", "c7n:matched": ["x"], "c7n:info": {"y": [1]}},
+            {"Id": "b"}]
+        sweeper = AnnotationSweeper("Id", resources)
+        # block filters mutating existing annotations in place
+        resources[0]["c7n:matched"].append("z")
+        resources[0]["c7n:info"]["y"].append(2)
+        resources[1]["c7n:new"] = True
+        sweeper.sweep([resources[0]])
+        self.assertEqual(resources[0]["c7n:matched"], ["x", "z"])
+        self.assertEqual(resources[1], {"Id": "b"})
+        sweeper.sweep([])
+        self.assertEqual(
+            resources[0],
+            {"Id": "a", "c7n:matched": ["x"], "c7n:info": {"y": [1]}})
+        self.assertEqual(sweeper.ra_map, {0: {"c7n:matched": ["x"], "c7n:info": {"y": [1]}}})
+
 
 if __name__ == "__main__":
     unittest.main()
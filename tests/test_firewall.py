@@ -27,3 +27,6 @@ class NetworkFirewallTest(BaseTest):
         resources = p.run()
         self.assertEqual(len(resources), 1)
         assert resources[0]['FirewallName'] == 'unicron'
+        # batch items lack firewall tags, those come from config history
+        assert {t['Key']: t['Value'] for t in resources[0]['Tags']} == {
+            'App': 'CustodianDev', 'Owner': 'Kapil'}
@@ -145,3 +145,15 @@ class HandleTest(BaseTest):
         )
         self.assertEqual(handler.dispatch_event({"detail": {}}, None), True)
         self.assertEqual(executions, [({"detail": {}, "debug": True}, None)])
+
+    def test_dispatch_module_index(self):
+        output, executions = self.setupLambdaEnv({
+            'modules': ['c7n.resources.aws', 'c7n.resources.ec2'],
+            'policies': [{'resource': 'ec2', 'name': 'xyz'}]})
+        with mock.patch('c7n.handler.load_resource_index') as load_index:
+            load_index.return_value = []
+            handler.dispatch_event({'detail': {}}, None)
+        load_index.assert_called_once_with(
+            {'aws.ec2'}, ['c7n.resources.aws', 'c7n.resources.ec2'])
+        self.assertIn('Cold start timings config:', output.getvalue())
+        self.assertTrue(executions)
@@ -188,3 +188,29 @@ def test_dir_loader_should_skip_hidden_subfolders(tmp_path, write_policy):
     assert len(policies.policies) == 1
     policy, = policies.policies
     assert policy.name == "good"
+
+
+class TestSchemaCache(BaseTest):
+
+    def test_schema_cache(self):
+        cache_dir = self.get_temp_dir()
+        self.change_environment(C7N_SCHEMA_CACHE=cache_dir)
+        data = {'policies': [{'name': 'foo', 'resource': 'aws.ec2'}]}
+        loader.load_resources(('aws.ec2',))
+
+        self.assertEqual(loader.SchemaValidator().validate(data), [])
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        def generate(resource_types):
+            raise AssertionError("schema should be loaded from cache")
+
+        self.patch(loader.schema, 'generate', generate)
+        self.assertEqual(loader.SchemaValidator().validate(data), [])
+
+        cache = loader.SchemaCache(cache_dir)
+        self.assertNotEqual(
+            cache.get_key(('aws.ec2',)), cache.get_key(('aws.ec2', 'aws.s3')))
+
+    def test_schema_cache_disabled(self):
+        self.change_environment(C7N_SCHEMA_CACHE='')
+        self.assertIsNone(loader.SchemaCache.from_env())
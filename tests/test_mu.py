@@ -18,9 +18,11 @@ import mock
 
 from c7n.config import Config
 from c7n.mu import (
+    archive_cache,
     custodian_archive,
     generate_requirements,
     get_exec_options,
+    get_policy_modules,
     BucketLambdaNotification,
     LambdaFunction,
     LambdaManager,
@@ -187,6 +189,21 @@ class PolicyLambdaProvision(Publish):
                  'SourceIdentifier': 'arn:aws:lambda:us-east-1:644160558196:function:CloudCustodian'} # noqa
              })
 
+    def test_policy_module_index(self):
+        p = self.load_policy({
+            'name': 'module-index',
+            'resource': 'aws.ec2',
+            'mode': {'type': 'periodic', 'schedule': 'rate(1 day)'},
+            'filters': [
+                {'or': [{'tag:Owner': 'absent'}, {'type': 'security-group'}]}],
+            'actions': [{'type': 'post-finding', 'types': ['Software and Configuration Checks']}]})
+        self.assertEqual(
+            get_policy_modules(p),
+            ['c7n.filters.core', 'c7n.policy', 'c7n.resources.aws', 'c7n.resources.ec2'])
+        with PolicyLambda(p).get_archive().get_reader() as reader:
+            config = json.loads(reader.read('config.json'))
+        self.assertEqual(config['modules'], get_policy_modules(p))
+
     def test_config_rule_evaluation(self):
         session_factory = self.replay_flight_data("test_config_rule_evaluate")
         p = self.load_policy(
@@ -1180,6 +1197,21 @@ class PythonArchiveTest(unittest.TestCase):
         filenames = archive.get_filenames()
         self.assertTrue("c7n/__init__.py" in filenames)
 
+    def test_custodian_archive_base_cache(self):
+        archive_cache.clear()
+        self.addCleanup(archive_cache.clear)
+        archives = []
+        for i in range(2):
+            archive = custodian_archive()
+            self.addCleanup(archive.remove)
+            archive.add_contents("config.json", "{}")
+            archive.close()
+            archives.append(archive)
+        self.assertEqual(archive_cache.get_stats(), {"miss": 1, "hit": 1})
+        self.assertEqual(archives[0].get_checksum(), archives[1].get_checksum())
+        self.assertIn("c7n/__init__.py", archives[1].get_filenames())
+        self.assertIn("config.json", archives[1].get_filenames())
+
     def make_file(self):
         bench = tempfile.mkdtemp()
         path = os.path.join(bench, "foo.txt")
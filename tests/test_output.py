@@ -6,6 +6,7 @@ import logging
 import mock
 import shutil
 import os
+import threading
 
 from contextlib import nullcontext as no_exception
 from dateutil.parser import parse as date_parse
@@ -13,6 +14,7 @@ from dateutil.parser import parse as date_parse
 from c7n.ctx import ExecutionContext
 from c7n.config import Config
 from c7n.exceptions import InvalidOutputConfig
+from c7n.executor import ThreadPoolExecutor
 from c7n.output import DirectoryOutput, BlobOutput, LogFile, metrics_outputs
 from c7n.resources.aws import S3Output, MetricsOutput, get_bucket_region_clientless
 from c7n.testing import mock_datetime_now, TestUtils
@@ -123,6 +125,60 @@ class S3OutputTest(TestUtils):
             content = fh.read().strip()
             self.assertTrue(content.endswith("hello world"))
 
+    def test_join_log_parallel(self):
+        temp_dir = self.get_temp_dir()
+        output = LogFile(
+            Bag(log_dir=temp_dir, options=Config.empty(parallel=4)), {})
+        logging.getLogger('custodian').setLevel(logging.INFO)
+        output.join_log()
+
+        l = logging.getLogger("custodian.s3") # NOQA
+        v = l.manager.disable
+        l.manager.disable = 0
+
+        t = threading.Thread(target=l.info, args=("other policy",))
+        t.start()
+        t.join()
+        l.info("hello world")
+        output.leave_log()
+        l.manager.disable = v
+
+        with open(os.path.join(temp_dir, "custodian-run.log")) as fh:
+            content = fh.read().strip()
+            self.assertTrue(content.endswith("hello world"))
+            self.assertNotIn("other policy", content)
+
+    def test_join_log_parallel_workers(self):
+        l = logging.getLogger("custodian.s3") # NOQA
+        logging.getLogger('custodian').setLevel(logging.INFO)
+        v = l.manager.disable
+        l.manager.disable = 0
+        self.addCleanup(setattr, l.manager, 'disable', v)
+
+        # both policies' log handlers are attached while either logs
+        barrier = threading.Barrier(2, timeout=5)
+
+        def run_policy(name):
+            temp_dir = self.get_temp_dir()
+            output = LogFile(
+                Bag(log_dir=temp_dir, options=Config.empty(parallel=2)), {})
+            output.join_log()
+            barrier.wait()
+            # records from the policy's own executor workers are captured
+            with ThreadPoolExecutor(max_workers=1) as w:
+                w.submit(l.info, "%s worker" % name).result()
+            barrier.wait()
+            output.leave_log()
+            with open(os.path.join(temp_dir, "custodian-run.log")) as fh:
+                return fh.read()
+
+        with ThreadPoolExecutor(max_workers=2) as w:
+            logs = dict(zip(("a", "b"), w.map(run_policy, ("a", "b"))))
+        self.assertIn("a worker", logs["a"])
+        self.assertNotIn("b worker", logs["a"])
+        self.assertIn("b worker", logs["b"])
+        self.assertNotIn("a worker", logs["b"])
+
     def test_compress(self):
         output = self.get_s3_output()
 
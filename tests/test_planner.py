@@ -0,0 +1,76 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+from c7n.planner import FetchPlanner
+from c7n.query import QueryResourceManager
+
+from .common import BaseTest
+
+
+class FetchPlannerTest(BaseTest):
+
+    def patch_fetch(self):
+        fetches = []
+
+        def fetch_resources(manager, query, augment=True):
+            fetches.append(manager.ctx.policy.name)
+            return [
+                {'InstanceId': 'i-1', 'State': {'Name': 'running'}},
+                {'InstanceId': 'i-2', 'State': {'Name': 'stopped'}}]
+
+        self.patch(QueryResourceManager, 'fetch_resources', fetch_resources)
+        return fetches
+
+    def test_shared_fetch(self):
+        fetches = self.patch_fetch()
+        policies = [
+            self.load_policy({
+                'name': 'ec2-running', 'resource': 'ec2',
+                'filters': [{'State.Name': 'running'}]}),
+            self.load_policy({
+                'name': 'ec2-stopped', 'resource': 'ec2',
+                'filters': [{'State.Name': 'stopped'}]}),
+            self.load_policy({
+                'name': 'ec2-all', 'resource': 'ec2'}),
+            self.load_policy({
+                'name': 'ec2-query', 'resource': 'ec2',
+                'query': [{'instance-state-name': 'running'}]}),
+            self.load_policy({
+                'name': 'ec2-lambda', 'resource': 'ec2',
+                'mode': {'type': 'periodic', 'schedule': 'rate(1 day)'}}),
+        ]
+        planner = FetchPlanner(policies)
+        groups = planner.plan()
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(
+            [p.name for p in groups[0].policies],
+            ['ec2-running', 'ec2-stopped', 'ec2-all'])
+
+        running = policies[0].resource_manager.resources()
+        stopped = policies[1].resource_manager.resources()
+        everything = policies[2].resource_manager.resources()
+        policies[3].resource_manager.resources()
+
+        self.assertEqual([r['InstanceId'] for r in running], ['i-1'])
+        self.assertEqual([r['InstanceId'] for r in stopped], ['i-2'])
+        self.assertEqual(len(everything), 2)
+        # each policy gets its own copy of the population
+        self.assertIsNot(running[0], everything[0])
+        self.assertEqual(fetches, ['ec2-running', 'ec2-query'])
+        self.assertEqual(
+            planner.get_stats(),
+            {'groups': 1, 'policies': 3, 'fetches': 1, 'saved': 2})
+        # population is released after the last member is served
+        self.assertIsNone(groups[0]._blob)
+
+    def test_shared_fetch_regions(self):
+        self.patch_fetch()
+        policies = [
+            self.load_policy(
+                {'name': 'ec2-east', 'resource': 'ec2'},
+                config={'region': 'us-east-1'}),
+            self.load_policy(
+                {'name': 'ec2-west', 'resource': 'ec2'},
+                config={'region': 'us-west-2'}),
+        ]
+        self.assertEqual(FetchPlanner(policies).plan(), [])
+        self.assertIsNone(policies[0].resource_manager.fetch_group)
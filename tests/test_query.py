@@ -3,8 +3,11 @@
 import json
 import logging
 import os
+from unittest import mock
 
 
+from c7n.config import Config as C7NConfig
+from c7n.exceptions import ClientError
 from c7n.query import ResourceQuery, RetryPageIterator, TypeInfo
 from c7n.resources.vpc import InternetGateway
 
@@ -128,6 +131,60 @@ class ConfigSourceTest(BaseTest):
         p.data['query'] = [{'clause': "configuration.imageId = 'xyz'"}]
         self.assertIn("imageId = 'xyz'", source.get_query_params(None)['expr'])
 
+    def test_config_get_resources_batch(self):
+        p = self.load_policy({'name': 'x', 'resource': 'ec2'})
+        source = p.resource_manager.get_source('config')
+
+        def item(rid, tags=True):
+            config = {'instanceId': rid}
+            if tags:
+                config['tags'] = [{'key': 'App', 'value': rid}]
+            return {'resourceId': rid, 'supplementaryConfiguration': {},
+                    'configuration': config}
+
+        history = {'i-b': item('i-b'), 'i-c': dict(item('i-c', False), tags={'App': 'c'})}
+        client = mock.MagicMock()
+        client.batch_get_resource_config.return_value = {
+            'baseConfigurationItems': [item('i-a'), item('i-c', False)],
+            'unprocessedResourceKeys': [
+                {'resourceType': 'AWS::EC2::Instance', 'resourceId': 'i-b'}]}
+        client.get_resource_config_history.side_effect = lambda resourceId, **kw: {
+            'configurationItems': [history[resourceId]]}
+
+        with mock.patch('c7n.query.local_session') as local_session:
+            local_session.return_value.client.return_value = client
+            resources = source.get_resources(['i-a', 'i-b', 'i-c'])
+            # unprocessed keys, and items with only top level tags, use history
+            self.assertEqual(
+                {r['InstanceId']: r['Tags'] for r in resources},
+                {'i-a': [{'Key': 'App', 'Value': 'i-a'}],
+                 'i-b': [{'Key': 'App', 'Value': 'i-b'}],
+                 'i-c': [{'Key': 'App', 'Value': 'c'}]})
+            self.assertEqual(
+                [c[1]['resourceId'] for c in
+                 client.get_resource_config_history.call_args_list], ['i-b', 'i-c'])
+
+            # other validation errors only send the failed chunk to history
+            client.reset_mock()
+            client.batch_get_resource_config.side_effect = ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'invalid id'}},
+                'BatchGetResourceConfig')
+            self.assertEqual(len(source.get_resources(['i-b'])), 1)
+            self.assertFalse(source.batch_unsupported)
+
+            # types config won't batch fall back to history for the source
+            client.batch_get_resource_config.side_effect = ClientError(
+                {'Error': {'Code': 'ValidationException',
+                           'Message': 'Resource type is not supported'}},
+                'BatchGetResourceConfig')
+            self.assertEqual(len(source.get_resources(['i-b', 'i-c'])), 2)
+            self.assertEqual(len(source.get_resources(['i-b'])), 1)
+            self.assertEqual(client.batch_get_resource_config.call_count, 2)
+            self.assertTrue(source.batch_unsupported)
+            self.assertFalse(
+                p.resource_manager.get_resource_manager('ec2').get_source(
+                    'config').batch_unsupported)
+
 
 class QueryResourceManagerTest(BaseTest):
 
@@ -164,3 +221,87 @@ class QueryResourceManagerTest(BaseTest):
         self.assertEqual(len(resources), 1)
         resources = p.resource_manager.get_resources(["igw-5bce113f"])
         self.assertEqual(resources, [])
+
+    def test_stream_resources(self):
+        session_factory = self.replay_flight_data("test_query_model")
+        p = self.load_policy(
+            {
+                "name": "igw-check",
+                "resource": "internet-gateway",
+                "filters": [{"InternetGatewayId": "igw-3d9e3d56"}],
+            },
+            config={"stream_resources": True},
+            session_factory=session_factory,
+        )
+        self.assertTrue(p.resource_manager.is_streaming())
+        self.patch(p.resource_manager, "stream_chunk_size", 1)
+        augmented = []
+        self.patch(p.resource_manager, "augment", lambda r: augmented.append(len(r)) or r)
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(resources[0]["InternetGatewayId"], "igw-3d9e3d56")
+        self.assertEqual(augmented, [1, 1, 1])
+
+    def test_stream_resources_barrier(self):
+        p = self.load_policy(
+            {
+                "name": "igw-check",
+                "resource": "internet-gateway",
+                "filters": [{"or": [
+                    {"type": "value", "value_type": "resource_count",
+                     "op": "gt", "value": 1}]}],
+            },
+            config={"stream_resources": True},
+        )
+        self.assertFalse(p.resource_manager.is_streaming())
+        p = self.load_policy(
+            {
+                "name": "igw-check",
+                "resource": "internet-gateway",
+                "filters": [{"type": "reduce", "limit": 1}],
+            },
+            config={"stream_resources": True},
+        )
+        self.assertFalse(p.resource_manager.is_streaming())
+        p = self.load_policy(
+            {"name": "igw-check", "resource": "internet-gateway"})
+        self.assertFalse(p.resource_manager.is_streaming())
+
+    def test_stream_resources_related(self):
+        p = self.load_policy(
+            {"name": "ec2-check", "resource": "ec2"},
+            config={"stream_resources": True})
+        self.assertTrue(p.resource_manager.is_streaming())
+        # related resource managers, ie. for subnet/security-group filters
+        related = p.resource_manager.get_resource_manager('security-group')
+        self.assertFalse(related.is_streaming())
+
+    def test_iter_filter_pages(self):
+        session_factory = self.replay_flight_data("test_query_filter")
+        p = self.load_policy(
+            {"name": "ec2", "resource": "ec2"}, session_factory=session_factory
+        )
+        pages = list(p.resource_manager.source.iter_resources({}))
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][0]["InstanceId"], "i-9432cb49")
+
+    def test_sharded_cache(self):
+        session_factory = self.replay_flight_data("test_query_manager")
+        cache_dir = self.get_temp_dir()
+        p = self.load_policy(
+            {"name": "igw-check", "resource": "internet-gateway"},
+            config=C7NConfig.empty(
+                cache="sharded://%s" % cache_dir, cache_period=60,
+                account_id=self.account_id, output_dir=cache_dir),
+            session_factory=session_factory,
+        )
+        self.assertEqual(len(p.run()), 1)
+        self.assertEqual(len(p.run()), 1)
+        self.assertEqual(
+            p.resource_manager.get_resources(["igw-2e65104a"])[0]["InternetGatewayId"],
+            "igw-2e65104a")
+        stats = p.get_cache().get_stats()
+        self.assertEqual((stats['CacheHits'], stats['CacheMisses']), (2, 1))
+        with open(os.path.join(cache_dir, "igw-check", "metadata.json")) as fh:
+            metrics = {m['MetricName'] for m in json.load(fh)['metrics']}
+        self.assertIn('CacheHits', metrics)
@@ -0,0 +1,102 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+import unittest
+
+import mock
+
+from c7n.config import Bag
+from c7n.ratelimit import RateLimiter, TokenBucket
+from c7n.resources.aws import ApiStats
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def patch_time(self, now):
+        clock = [now]
+        patcher = mock.patch('c7n.ratelimit.time.monotonic', lambda: clock[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return clock
+
+    def test_unlimited_until_throttled(self):
+        clock = self.patch_time(100)
+        bucket = TokenBucket(min_rate=1, max_rate=20)
+        for i in range(10):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertIsNone(bucket.rate)
+
+        clock[0] = 101
+        bucket.acquire()
+        self.assertEqual(bucket.observed_rate, 10)
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 5)
+        # concurrent throttles within a second only back off once
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 5)
+
+        # calls queue behind each other at the limited rate
+        self.assertEqual(bucket.acquire(), 0.2)
+        self.assertEqual(bucket.acquire(), 0.4)
+        clock[0] = 101.4
+        self.assertAlmostEqual(bucket.acquire(), 0.2)
+
+        clock[0] = 102.5
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 2.5)
+
+    def test_additive_increase(self):
+        self.patch_time(100)
+        bucket = TokenBucket(min_rate=2, max_rate=4)
+        bucket.on_throttle()
+        self.assertEqual(bucket.rate, 2)
+        bucket.on_success()
+        self.assertEqual(bucket.rate, 2.5)
+        for i in range(5):
+            bucket.on_success()
+        # recovered past the ceiling, limit is lifted
+        self.assertIsNone(bucket.rate)
+
+    def test_limiter_keys(self):
+        limiter = RateLimiter(min_rate=1)
+        key = ('123', 'us-east-1', 'ec2', 'DescribeInstances')
+        limiter.on_throttle(key)
+        self.assertEqual(limiter.get_rate(key), 1)
+        self.assertIsNone(limiter.get_rate(('123', 'us-west-2', 'ec2', 'DescribeInstances')))
+        limiter.reset()
+        self.assertIsNone(limiter.get_rate(key))
+
+
+class ApiStatsTest(unittest.TestCase):
+
+    def get_model(self, service, op):
+        return Bag(name=op, service_model=Bag(endpoint_prefix=service))
+
+    def test_operation_stats(self):
+        ctx = Bag(options=Bag(account_id='123'))
+        stats = ApiStats(ctx)
+        stats.limiter = RateLimiter(min_rate=1)
+        model = self.get_model('ec2', 'DescribeInstances')
+
+        context = {'client_region': 'us-east-1'}
+        stats._limit(model=model, context=context, params={})
+        key = ('123', 'us-east-1', 'ec2', 'DescribeInstances')
+        self.assertEqual(context['c7n-api-limit'][0], key)
+
+        throttle = ({}, {'Error': {'Code': 'RequestLimitExceeded'}})
+        stats._retry(response=throttle, request_dict={'context': context})
+        stats._retry(response=None, request_dict={'context': context})
+        stats._record(
+            http_response=Bag(status_code=200), parsed={},
+            model=model, context=context)
+        # calls outside of the limiter are still counted
+        stats._record(
+            http_response=Bag(status_code=200), parsed={},
+            model=self.get_model('s3', 'ListBuckets'), context={})
+
+        self.assertEqual(
+            stats.get_metadata(), {'ec2.DescribeInstances': 1, 's3.ListBuckets': 1})
+        limits = stats.get_limit_metadata()
+        self.assertEqual(list(limits), ['ec2.DescribeInstances'])
+        self.assertEqual(limits['ec2.DescribeInstances']['throttles'], 1)
+        self.assertEqual(limits['ec2.DescribeInstances']['rate'], 2)
+        self.assertTrue(limits['ec2.DescribeInstances']['latency'] >= 0)
@@ -1,6 +1,10 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-from c7n.reports.csvout import Formatter, strip_output_path
+import io
+import json
+
+from c7n.reports.csvout import (
+    Formatter, iter_json_records, strip_output_path, write_json_records)
 from .common import BaseTest, load_data
 
 
@@ -34,6 +38,7 @@ class TestEC2Report(BaseTest):
             recs = list(map(lambda x: self.records[x], rec_ids))
             rows = list(map(lambda x: self.rows[x], row_ids))
             self.assertEqual(formatter.to_csv(recs), rows)
+            self.assertEqual(list(formatter.iter_csv(iter(recs), spool_size=1)), rows)
 
     def test_custom_fields(self):
         # Test the ability to include custom fields.
@@ -146,3 +151,22 @@ class TestMultiReport(BaseTest):
             strip_output_path(p, policy_name) == f"logs/{policy_name}"
             for p in output_paths
         ))
+
+
+class TestStreamingReport(BaseTest):
+
+    def test_iter_json_records(self):
+        records = [{"id": i, "name": "a, ]}[" * i} for i in range(20)]
+        data = json.dumps(records, indent=2)
+        for chunk_size in (1, 16, 1024):
+            self.assertEqual(
+                list(iter_json_records(io.StringIO(data), chunk_size)), records)
+        self.assertEqual(list(iter_json_records(io.StringIO("[]"))), [])
+
+    def test_write_json_records(self):
+        records = [{"id": 1, "tags": ["a"]}, {"id": 2}]
+        for expected in (records, []):
+            output = io.StringIO()
+            self.assertEqual(
+                list(write_json_records(iter(expected), output)), expected)
+            self.assertEqual(output.getvalue(), json.dumps(expected, indent=2))
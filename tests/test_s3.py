@@ -7,10 +7,12 @@ import os
 import io
 import shutil
 import tempfile
+import threading
 import time  # NOQA needed for some recordings
 
-from unittest import TestCase
+from unittest import TestCase, mock
 
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from botocore.exceptions import ClientError
 from dateutil.tz import tzutc
@@ -21,7 +23,7 @@ from c7n.executor import MainThreadExecutor
 from c7n.resources import s3
 from c7n.mu import LambdaManager
 from c7n.ufuncs import s3crypt
-from c7n.utils import get_account_alias_from_sts
+from c7n.utils import get_account_alias_from_sts, reset_session_cache
 
 from .common import (
     BaseTest,
@@ -134,6 +136,97 @@ def generateBucketContents(s3, bucket, contents=None):
         key.put(Body=v, ContentLength=len(v), ContentType="text/plain")
 
 
+class BucketAugmentKeys(BaseTest):
+
+    def get_augment_keys(self, filters=(), actions=(), on_demand=True):
+        p = self.load_policy({
+            "name": "s3-augment-keys", "resource": "s3",
+            "filters": list(filters), "actions": list(actions)},
+            config={"augment_on_demand": on_demand})
+        return p.resource_manager.get_augment_keys()
+
+    def test_augment_keys(self):
+        self.assertEqual(
+            self.get_augment_keys([
+                {"or": [{"tag:Owner": "absent"}, {"Name": "xyz"}]},
+                {"type": "value", "key": "Versioning.Status", "value": "Enabled"}]),
+            {"Location", "Tags", "Versioning"})
+        self.assertEqual(
+            self.get_augment_keys([{"type": "global-grants"}], ["no-op"]),
+            {"Location", "Acl", "Website"})
+        self.assertIsNone(self.get_augment_keys(actions=["delete"]))
+        self.assertIsNone(self.get_augment_keys([{"tag:Owner": "absent"}], on_demand=False))
+
+    def test_assemble_bucket_keys(self):
+        client = mock.MagicMock()
+        client.get_bucket_location.return_value = {
+            "LocationConstraint": None, "ResponseMetadata": {}}
+        client.get_bucket_tagging.return_value = {
+            "TagSet": [{"Key": "Owner", "Value": "me"}], "ResponseMetadata": {}}
+        client.get_bucket_policy.return_value = {"Policy": "{}", "ResponseMetadata": {}}
+        factory = mock.MagicMock()
+        factory.return_value.client.return_value = client
+
+        b = s3.assemble_bucket((factory, {"Name": "xyz"}), keys={"Location", "Tags"})
+        self.assertEqual(set(b), {"Name", "Location", "Tags"})
+        client.get_bucket_policy.assert_not_called()
+
+        # only the missing augments are fetched for a bucket
+        client.get_bucket_tagging.reset_mock()
+        s3.assemble_bucket((factory, b), keys={"Location", "Tags", "Policy"})
+        self.assertEqual(b["Policy"], "{}")
+        client.get_bucket_tagging.assert_not_called()
+        self.assertEqual(client.get_bucket_location.call_count, 1)
+
+    def test_augment_region_clients(self):
+        client = mock.MagicMock()
+        client.get_bucket_location.side_effect = [
+            {"LocationConstraint": "us-west-2", "ResponseMetadata": {}},
+            {"LocationConstraint": "EU", "ResponseMetadata": {}},
+            {"LocationConstraint": "us-west-2", "ResponseMetadata": {}}]
+        client.get_bucket_tagging.side_effect = lambda **kw: {
+            "TagSet": [], "ResponseMetadata": {}}
+        factory = mock.MagicMock(region="us-east-1")
+        factory.return_value.client.return_value = client
+        manager = mock.MagicMock(session_factory=factory, executor_factory=MainThreadExecutor)
+        manager.get_augment_keys.return_value = {"Location", "Tags"}
+        reset_session_cache()
+        self.addCleanup(reset_session_cache)
+
+        buckets = s3.DescribeS3(manager).augment([{"Name": "a"}, {"Name": "b"}, {"Name": "c"}])
+        self.assertEqual(
+            [s3.get_region(b) for b in buckets], ["us-west-2", "eu-west-1", "us-west-2"])
+        self.assertEqual(client.get_bucket_tagging.call_count, 3)
+        # one location client, then one client per bucket region
+        regions = [c[1].get("region_name") for c in factory.return_value.client.call_args_list]
+        self.assertEqual(regions, [None, "us-west-2", "eu-west-1"])
+
+    def test_augment_bounded(self):
+        source = s3.DescribeS3(mock.MagicMock())
+        self.patch(source, "max_workers", 2)
+        lock = threading.Lock()
+        counts = {"inflight": 0, "peak": 0}
+
+        def augment_bucket(*args):
+            time.sleep(0.001)
+            with lock:
+                counts["inflight"] -= 1
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                with lock:
+                    counts["inflight"] += 1
+                    counts["peak"] = max(counts["peak"], counts["inflight"])
+                return super().submit(fn, *args)
+
+        self.patch(s3, "augment_bucket", augment_bucket)
+        with Executor(max_workers=2) as w:
+            source.run_bounded(w, ((i,) for i in range(50)))
+        self.assertEqual(counts["inflight"], 0)
+        # queued futures are bounded to twice the workers
+        self.assertLessEqual(counts["peak"], 5)
+
+
 class BucketMetrics(BaseTest):
 
     def test_metrics_dims(self):
@@ -6,6 +6,8 @@ import os
 import tempfile
 import time
 
+import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 from dateutil.parser import parse as parse_date
 import mock
@@ -212,6 +214,33 @@ class UtilTest(BaseTest):
 
         self.assertEqual(utils.local_session(p.session_factory), previous)
 
+    def test_local_session_client_pool(self):
+        session = boto3.Session(
+            region_name='us-east-1',
+            aws_access_key_id='xyz', aws_secret_access_key='abc')
+        pool = utils.ClientPool(max_size=2)
+        self.patch(utils, 'client_pool', pool)
+        self.addCleanup(utils.reset_session_cache)
+        utils.reset_session_cache()
+
+        s = utils.local_session(lambda: session)
+        ec2 = s.client('ec2')
+        self.assertIs(s.client('ec2'), ec2)
+        self.assertIsNot(s.client('ec2', region_name='us-west-2'), ec2)
+        self.assertIs(
+            s.client('lambda', config=BotoConfig(read_timeout=900)),
+            s.client('lambda', config=BotoConfig(read_timeout=900)))
+        self.assertEqual(
+            pool.get_stats(),
+            {'hits': 2, 'created': {'ec2': 2, 'lambda': 1}})
+
+        # bounded, least recently used are evicted first
+        self.assertEqual(len(pool.clients), 2)
+        self.assertIsNot(s.client('ec2'), ec2)
+
+        pool.evict(session)
+        self.assertEqual(len(pool.clients), 0)
+
     def test_format_date(self):
         d = parse_date("2018-02-02 12:00")
         self.assertEqual("{}".format(utils.FormatDate(d)), "2018-02-02 12:00:00")
@@ -280,6 +309,32 @@ class UtilTest(BaseTest):
         IPV4_list2 = utils.IPv4List([n3, n4])
         self.assertFalse(a1 in IPV4_list2)
 
+    def test_cidr_set(self):
+        cidrs = utils.CidrSet([
+            ipaddress.ip_network(u"10.0.0.0/24"),
+            ipaddress.ip_network(u"10.0.0.0/8"),
+            ipaddress.ip_network(u"11.0.0.0/24"),
+            ipaddress.ip_network(u"2001:db8::/32"),
+            None])
+        self.assertEqual(len(cidrs), 4)
+        self.assertTrue(ipaddress.ip_network(u"10.5.0.0/16") in cidrs)
+        self.assertTrue(ipaddress.ip_address(u"11.0.0.5") in cidrs)
+        self.assertTrue(ipaddress.ip_network(u"2001:db8:1::/48") in cidrs)
+        self.assertFalse(ipaddress.ip_network(u"11.0.0.0/23") in cidrs)
+        self.assertFalse(ipaddress.ip_address(u"2001:db9::1") in cidrs)
+        self.assertFalse(None in cidrs)
+
+        self.assertTrue(cidrs.overlaps(ipaddress.ip_network(u"11.0.0.0/23")))
+        self.assertFalse(cidrs.overlaps(ipaddress.ip_network(u"12.0.0.0/8")))
+
+        self.assertEqual(
+            cidrs.subnets(ipaddress.ip_network(u"10.0.0.0/8")),
+            [ipaddress.ip_network(u"10.0.0.0/8"), ipaddress.ip_network(u"10.0.0.0/24")])
+        self.assertEqual(
+            cidrs.subnets(ipaddress.ip_network(u"11.0.0.0/16")),
+            [ipaddress.ip_network(u"11.0.0.0/24")])
+        self.assertEqual(cidrs.subnets(ipaddress.ip_network(u"12.0.0.0/8")), [])
+
     def test_chunks(self):
         self.assertEqual(
             list(utils.chunks(range(100), size=50)),
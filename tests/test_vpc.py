@@ -5,8 +5,10 @@ from .common import BaseTest, functional, event_data
 from unittest.mock import MagicMock
 
 from botocore.exceptions import ClientError as BotoClientError
+from c7n.config import Bag
 from c7n.exceptions import PolicyValidationError
 from c7n.resources.aws import shape_validate
+from c7n.resources.vpc import SGUsageIndex
 from pytest_terraform import terraform
 
 
@@ -1321,6 +1323,58 @@ class SecurityGroupTest(BaseTest):
         resources = p.run()
         assert resources == []
 
+    def test_usage_index_shared(self):
+        scans = []
+
+        def scanner(kind, refs):
+            def scan():
+                scans.append(kind)
+                return refs
+            return scan
+
+        policies = []
+        for fname in ('unused', 'used'):
+            p = self.load_policy(
+                {'name': 'sg-%s' % fname, 'resource': 'security-group',
+                 'filters': [fname]},
+                cache=True)
+            f = p.resource_manager.filters[0]
+            self.patch(f, 'get_scanners', lambda: (
+                ('nics', scanner('nics', {'sg-1': {'eni-1'}})),
+                ('lambdas', scanner('lambdas', {'sg-1': {'func'}, 'sg-2': {'func'}}))))
+            self.patch(f, 'filter_peered_refs', lambda resources: resources)
+            policies.append(f)
+
+        resources = [{'GroupId': 'sg-%d' % i, 'VpcId': 'vpc-1'} for i in range(1, 4)]
+        self.assertEqual(
+            [r['GroupId'] for r in policies[0].process(resources)], ['sg-3'])
+        self.assertEqual(
+            policies[0].get_references()['sg-1'],
+            {'nics': {'eni-1'}, 'lambdas': {'func'}})
+        self.assertEqual(
+            [r['GroupId'] for r in policies[1].process(resources)], ['sg-1', 'sg-2'])
+        self.assertEqual(sorted(scans), ['lambdas', 'nics'])
+
+    def test_sg_usage_index_bounded(self):
+        index = SGUsageIndex(max_entries=1)
+
+        def manager(region):
+            return Bag(config=Bag(account_id='123', region=region, cache_period=15))
+
+        east, west = manager('us-east-1'), manager('us-west-2')
+        index.put(east, ('nics',), {}, [])
+        index.put(west, ('nics',), {}, [])
+        self.assertEqual(len(index.entries), 1)
+        self.assertIsNone(index.get(east, ('nics',)))
+        self.assertIsNotNone(index.get(west, ('nics',)))
+
+        # expired entries are dropped on put
+        index = SGUsageIndex()
+        index.put(east, ('nics',), {}, [])
+        index.entries[index.get_key(east, ('nics',))]['created'] -= 16 * 60
+        index.put(west, ('nics',), {}, [])
+        self.assertEqual(list(index.entries), [index.get_key(west, ('nics',))])
+
     def test_unused(self):
         factory = self.replay_flight_data("test_security_group_unused")
         p = self.load_policy(
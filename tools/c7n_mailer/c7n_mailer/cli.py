@@ -150,6 +150,8 @@ CONFIG_SCHEMA = {
         'ldap_email_attribute': {'type': 'string'},
         'ldap_bind_password_in_kms': {'type': 'boolean'},
         'ldap_bind_password': SECURED_STRING_SCHEMA,
+        'ldap_batch_size': {'type': 'integer'},
+        'ldap_negative_cache_ttl': {'type': 'integer'},
         'cross_accounts': {'type': 'object'},
         'ses_region': {'type': 'string'},
         'redis_host': {'type': 'string'},
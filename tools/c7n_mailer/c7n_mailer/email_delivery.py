@@ -98,6 +98,22 @@ class EmailDelivery:
             ldap_uid_emails = ldap_uid_emails + ldap_emails_set
         return ldap_uid_emails
 
+    def get_ldap_uids(self, sqs_message):
+        """All the ldap uids a message's resources will be resolved for."""
+        uids = set()
+        if self.config.get('ldap_uid_tags'):
+            for resource in sqs_message['resources']:
+                uids.update(get_resource_tag_targets(resource, self.config['ldap_uid_tags']))
+        if sqs_message['action'].get('resource_ldap_lookup_username'):
+            uids.update(r.get('UserName') for r in sqs_message['resources'])
+        if 'resource-owner' in sqs_message['action'].get('to', []):
+            contact_tags = self.config.get('contact_tags', [])
+            for resource in sqs_message['resources']:
+                values = get_resource_tag_targets(resource, contact_tags)
+                uids.update(set(values).difference(self.get_valid_emails_from_list(values)))
+        uids.discard(None)
+        return uids
+
     def get_resource_owner_emails_from_resource(self, sqs_message, resource):
         if 'resource-owner' not in sqs_message['action'].get('to', []):
             return []
@@ -161,6 +177,14 @@ class EmailDelivery:
         account_emails = self.get_account_emails(sqs_message)
 
         policy_to_emails = policy_to_emails + event_owner_email + account_emails
+
+        # resolve the message's ldap uids up front in batches, the per resource
+        # lookups below are then served from the lookup's cache.
+        if self.ldap_lookup is not None:
+            self.ldap_lookup.resolve_uids(
+                self.get_ldap_uids(sqs_message),
+                manager=sqs_message['action'].get('email_ldap_username_manager', False))
+
         for resource in sqs_message['resources']:
             # this is the list of emails that will be sent for this resource
             resource_emails = []
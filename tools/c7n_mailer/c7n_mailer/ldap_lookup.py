@@ -1,8 +1,11 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
+from collections import OrderedDict
 import json
-
 import re
+import threading
+import time
+
 import redis
 
 try:
@@ -13,6 +16,10 @@ else:
     have_sqlite = True
 from ldap3 import Connection
 from ldap3.core.exceptions import LDAPSocketOpenError
+from ldap3.utils.conv import escape_filter_chars
+
+# marks a cached negative (not found) result, with its expiration
+NEGATIVE_KEY = 'c7n:negative'
 
 
 class LdapLookup:
@@ -30,6 +37,10 @@ class LdapLookup:
         self.uid_key = config.get('ldap_uid_attribute', 'sAMAccountName')
         self.attributes = ['displayName', self.uid_key, self.email_key, self.manager_attr]
         self.uid_regex = config.get('ldap_uid_regex', None)
+        self.batch_size = int(config.get('ldap_batch_size', 50))
+        self.negative_ttl = int(config.get('ldap_negative_cache_ttl', 3600))
+        self.local_cache = local_cache
+        self.local_prefix = '%s:%s:' % (config.get('ldap_uri'), config.get('ldap_bind_dn'))
         self.cache_engine = config.get('cache_engine', None)
         if self.cache_engine == 'redis':
             redis_host = config.get('redis_host')
@@ -68,6 +79,100 @@ class LdapLookup:
             return {}
         return self.connection.entries[0]
 
+    def get_cached(self, key):
+        """Get cached metadata, from the process local cache then the cache engine.
+
+        Returns None on a miss, and {} for a cached negative result.
+        """
+        result = self.local_cache.get(self.local_prefix + key)
+        if result is not None:
+            return result
+        if not self.cache_engine:
+            return None
+        result = self.caching.get(key)
+        if result is None:
+            return None
+        if NEGATIVE_KEY in result:
+            if result[NEGATIVE_KEY] < time.time():
+                return None
+            self.local_cache.set(
+                self.local_prefix + key, {}, result[NEGATIVE_KEY] - time.time())
+            return {}
+        self.local_cache.set(self.local_prefix + key, result)
+        return result
+
+    def set_cached(self, key, metadata):
+        if metadata:
+            self.local_cache.set(self.local_prefix + key, metadata)
+            if self.cache_engine:
+                self.caching.set(key, metadata)
+            return
+        # negative results aren't cached when their ttl is disabled
+        if self.negative_ttl <= 0:
+            return
+        self.local_cache.set(self.local_prefix + key, {}, self.negative_ttl)
+        if self.cache_engine:
+            self.caching.set(key, {NEGATIVE_KEY: time.time() + self.negative_ttl})
+
+    def match_uid(self, uid):
+        # for example if you set ldap_uid_regex in your mailer.yml to "^[0-9]{6}$" then it
+        # would only query LDAP if your string length is 6 characters long and only digits.
+        if self.uid_regex and not re.search(self.uid_regex, uid):
+            self.log.debug('uid does not match regex: %s %s' % (self.uid_regex, uid))
+            return False
+        return True
+
+    def resolve_uids(self, uids, manager=False):
+        """Resolve metadata for a set of uids, batching ldap searches for cache misses.
+
+        Results are cached, so subsequent lookups for these uids (and their
+        managers, if requested) are served from the process local cache.
+        """
+        results = {}
+        misses = []
+        for uid in {u.lower() for u in uids if u}:
+            if not self.match_uid(uid):
+                results[uid] = {}
+                continue
+            cached = self.get_cached(uid)
+            if cached is None:
+                misses.append(uid)
+            else:
+                results[uid] = cached
+
+        for idx in range(0, len(misses), self.batch_size):
+            batch = misses[idx:idx + self.batch_size]
+            found = self.search_uids(batch)
+            for uid in batch:
+                metadata = found.get(uid, {})
+                if metadata:
+                    self.set_cached(metadata['dn'], metadata)
+                self.set_cached(uid, metadata)
+                results[uid] = metadata
+
+        if manager:
+            for manager_dn in {m.get(self.manager_attr) for m in results.values()}:
+                if manager_dn:
+                    self.get_metadata_from_dn(manager_dn)
+        return results
+
+    def search_uids(self, uids):
+        ldap_filter = '(|%s)' % ''.join(
+            '(%s=%s)' % (self.uid_key, escape_filter_chars(uid)) for uid in uids)
+        self.connection.search(self.base_dn, ldap_filter, attributes=self.attributes)
+        found = {}
+        for entry in self.connection.entries:
+            metadata = self.get_dict_from_ldap_object(entry)
+            if not metadata:
+                continue
+            uid = str(metadata[self.uid_key]).lower()
+            if uid in found:
+                self.log.warning("too many results for uid %s", uid)
+                found[uid] = {}
+                continue
+            found[uid] = metadata
+        return {uid: m for uid, m in found.items() if m}
+
     def get_email_to_addrs_from_uid(self, uid, manager=False):
         to_addrs = []
         uid_metadata = self.get_metadata_from_uid(uid)
@@ -86,23 +191,20 @@ class LdapLookup:
 
     # eg, dn = uid=bill_lumbergh,cn=users,dc=initech,dc=com
     def get_metadata_from_dn(self, user_dn):
-        if self.cache_engine:
-            cache_result = self.caching.get(user_dn)
-            if cache_result:
-                cache_msg = 'Got ldap metadata from local cache for: %s' % user_dn
-                self.log.debug(cache_msg)
-                return cache_result
+        cache_result = self.get_cached(user_dn)
+        if cache_result is not None:
+            self.log.debug('Got ldap metadata from local cache for: %s' % user_dn)
+            return cache_result
         ldap_filter = '(%s=*)' % self.uid_key
         ldap_results = self.search_ldap(user_dn, ldap_filter, attributes=self.attributes)
-        if ldap_results:
-            ldap_user_metadata = self.get_dict_from_ldap_object(self.connection.entries[0])
-        else:
-            self.caching.set(user_dn, {})
+        if not ldap_results:
+            self.set_cached(user_dn, {})
             return {}
-        if self.cache_engine:
-            self.log.debug('Writing user: %s metadata to cache engine.' % user_dn)
-            self.caching.set(user_dn, ldap_user_metadata)
-            self.caching.set(ldap_user_metadata[self.uid_key], ldap_user_metadata)
+        ldap_user_metadata = self.get_dict_from_ldap_object(self.connection.entries[0])
+        self.log.debug('Writing user: %s metadata to cache engine.' % user_dn)
+        self.set_cached(user_dn, ldap_user_metadata)
+        if ldap_user_metadata:
+            self.set_cached(ldap_user_metadata[self.uid_key], ldap_user_metadata)
         return ldap_user_metadata
 
     def get_dict_from_ldap_object(self, ldap_user_object):
@@ -123,40 +225,64 @@ class LdapLookup:
     # eg, uid = bill_lumbergh
     def get_metadata_from_uid(self, uid):
         uid = uid.lower()
-        if self.uid_regex:
-            # for example if you set ldap_uid_regex in your mailer.yml to "^[0-9]{6}$" then it
-            # would only query LDAP if your string length is 6 characters long and only digits.
-            # re.search("^[0-9]{6}$", "123456")
-            # Out[41]: <_sre.SRE_Match at 0x1109ab440>
-            # re.search("^[0-9]{6}$", "1234567") returns None, or "12345a' also returns None
-            if not re.search(self.uid_regex, uid):
-                regex_msg = 'uid does not match regex: %s %s' % (self.uid_regex, uid)
-                self.log.debug(regex_msg)
-                return {}
-        if self.cache_engine:
-            cache_result = self.caching.get(uid)
-            if cache_result or cache_result == {}:
-                cache_msg = 'Got ldap metadata from local cache for: %s' % uid
-                self.log.debug(cache_msg)
-                return cache_result
-        ldap_filter = '(%s=%s)' % (self.uid_key, uid)
+        if not self.match_uid(uid):
+            return {}
+        cache_result = self.get_cached(uid)
+        if cache_result is not None:
+            self.log.debug('Got ldap metadata from local cache for: %s' % uid)
+            return cache_result
+        ldap_filter = '(%s=%s)' % (self.uid_key, escape_filter_chars(uid))
         ldap_results = self.search_ldap(self.base_dn, ldap_filter, attributes=self.attributes)
+        ldap_user_metadata = {}
         if ldap_results:
             ldap_user_metadata = self.get_dict_from_ldap_object(self.connection.entries[0])
-            if self.cache_engine:
-                self.log.debug('Writing user: %s metadata to cache engine.' % uid)
-                if ldap_user_metadata.get('dn'):
-                    self.caching.set(ldap_user_metadata['dn'], ldap_user_metadata)
-                    self.caching.set(uid, ldap_user_metadata)
-                else:
-                    self.caching.set(uid, {})
-        else:
-            if self.cache_engine:
-                self.caching.set(uid, {})
-            return {}
+        self.log.debug('Writing user: %s metadata to cache engine.' % uid)
+        if ldap_user_metadata.get('dn'):
+            self.set_cached(ldap_user_metadata['dn'], ldap_user_metadata)
+        self.set_cached(uid, ldap_user_metadata)
         return ldap_user_metadata
 
 
+class LocalCache:
+    """Process local LRU cache of ldap metadata, in front of the cache engine.
+
+    Shared by lookups across messages within a mailer process. Entries
+    may have a ttl, used for negative results.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            ttl = self.ttl if ttl is None else ttl
+            self.data[key] = (value, time.time() + ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+local_cache = LocalCache()
+
+
 # Use sqlite as a local cache for folks not running the mailer in lambda, avoids extra daemons
 # as dependencies. This normalizes the methods to set/get functions, so you can interchangeable
 # decide which caching system to use, a local file, or memcache, redis, etc
@@ -178,6 +304,7 @@ class LocalSqlite:
 
     def set(self, key, value):
         # note, the ? marks are required to ensure escaping into the database.
+        self.sqlite.execute("DELETE FROM ldap_cache WHERE key=?", (key,))
         self.sqlite.execute("INSERT INTO ldap_cache VALUES (?, ?)", (key, json.dumps(value)))
         self.sqlite.commit()
 
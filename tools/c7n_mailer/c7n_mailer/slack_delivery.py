@@ -28,6 +28,8 @@ class SlackDelivery:
         resource_list = copy.deepcopy(sqs_message['resources'])
 
         slack_messages = {}
+        # renders shared across targets with the same template and resources
+        render_cache = {}
 
         # Check for Slack targets in 'to' action and render appropriate template.
         for target in sqs_message.get('action', ()).get('to', []):
@@ -45,7 +47,7 @@ class SlackDelivery:
                         slack_messages[address] = get_rendered_jinja(
                             slack_target, sqs_message, resources,
                             self.logger, 'slack_template', 'slack_default',
-                            self.config['templates_folders'])
+                            self.config['templates_folders'], render_cache)
                 self.logger.debug(
                     "Generating messages for recipient list produced by resource owner resolution.")
             elif target.startswith('https://hooks.slack.com/'):
@@ -53,14 +55,14 @@ class SlackDelivery:
                     target, sqs_message,
                     resource_list,
                     self.logger, 'slack_template', 'slack_default',
-                    self.config['templates_folders'])
+                    self.config['templates_folders'], render_cache)
             elif target.startswith('slack://webhook/#') and self.config.get('slack_webhook'):
                 webhook_target = self.config.get('slack_webhook')
                 slack_messages[webhook_target] = get_rendered_jinja(
                     target.split('slack://webhook/#', 1)[1], sqs_message,
                     resource_list,
                     self.logger, 'slack_template', 'slack_default',
-                    self.config['templates_folders'])
+                    self.config['templates_folders'], render_cache)
                 self.logger.debug(
                     "Generating message for webhook %s." % self.config.get('slack_webhook'))
             elif target.startswith('slack://') and is_email(target.split('slack://', 1)[1]):
@@ -69,14 +71,14 @@ class SlackDelivery:
                     slack_messages[address] = get_rendered_jinja(
                         slack_target, sqs_message, resource_list,
                         self.logger, 'slack_template', 'slack_default',
-                        self.config['templates_folders'])
+                        self.config['templates_folders'], render_cache)
             elif target.startswith('slack://#'):
                 resolved_addrs = target.split('slack://#', 1)[1]
                 slack_messages[resolved_addrs] = get_rendered_jinja(
                     resolved_addrs, sqs_message,
                     resource_list,
                     self.logger, 'slack_template', 'slack_default',
-                    self.config['templates_folders'])
+                    self.config['templates_folders'], render_cache)
             elif target.startswith('slack://tag/') and 'Tags' in resource_list[0]:
                 tag_name = target.split('tag/', 1)[1]
                 result = next((item for item in resource_list[0].get('Tags', [])
@@ -98,7 +100,7 @@ class SlackDelivery:
                 slack_messages[resolved_addr] = get_rendered_jinja(
                     slack_target, sqs_message, resource_list,
                     self.logger, 'slack_template', 'slack_default',
-                    self.config['templates_folders']
+                    self.config['templates_folders'], render_cache
                 )
                 self.logger.debug("Generating message for specified Slack channel.")
         return slack_messages
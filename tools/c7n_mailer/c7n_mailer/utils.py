@@ -6,10 +6,12 @@ from datetime import datetime, timedelta
 import functools
 import json
 import os
+import threading
 import time
 import yaml
 
 import jinja2
+import jinja2.meta
 import jmespath
 from dateutil import parser
 from dateutil.tz import gettz, tzutc
@@ -55,8 +57,56 @@ def get_processor(mailer_config, logger):
     return processor
 
 
+class MemoryBytecodeCache(jinja2.BytecodeCache):
+    """Keep compiled template bytecode in process memory.
+
+    Shared by all the template environments so a template found via
+    several folder lists is only compiled once per process (or warm lambda
+    container).
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def load_bytecode(self, bucket):
+        code = self.buckets.get(bucket.key)
+        if code is not None:
+            bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket):
+        self.buckets[bucket.key] = bucket.bytecode_to_string()
+
+    def clear(self):
+        self.buckets.clear()
+
+
+template_bytecode_cache = MemoryBytecodeCache()
+_jinja_envs = {}
+_jinja_envs_lock = threading.Lock()
+_recipient_templates = {}
+
+
 def get_jinja_env(template_folders):
-    env = jinja2.Environment(trim_blocks=True, autoescape=False)  # nosec nosemgrep
+    """Get the template environment for the given template folders.
+
+    Environments are long lived and keyed by their folders, which lets
+    jinja's own template cache skip reloading and recompiling templates
+    on every rendered message.
+    """
+    if isinstance(template_folders, str):
+        template_folders = [template_folders]
+    key = tuple(template_folders)
+    with _jinja_envs_lock:
+        env = _jinja_envs.get(key)
+        if env is None:
+            env = _jinja_envs[key] = _get_jinja_env(list(key))
+    return env
+
+
+def _get_jinja_env(template_folders):
+    env = jinja2.Environment(
+        trim_blocks=True, autoescape=False,  # nosec nosemgrep
+        bytecode_cache=template_bytecode_cache)
     env.filters['yaml_safe'] = functools.partial(yaml.safe_dump, default_flow_style=False)
     env.filters['date_time_format'] = date_time_format
     env.filters['get_date_time_delta'] = get_date_time_delta
@@ -71,9 +121,45 @@ def get_jinja_env(template_folders):
     return env
 
 
+def reset_jinja_cache():
+    with _jinja_envs_lock:
+        _jinja_envs.clear()
+    _recipient_templates.clear()
+    template_bytecode_cache.clear()
+    get_subject_template.cache_clear()
+
+
+def template_uses_recipient(env, template_name, seen=None):
+    """Check whether a template, or any template it includes, references recipient.
+
+    Dynamic template references can't be resolved statically, so we
+    assume those do.
+    """
+    seen = seen if seen is not None else set()
+    if template_name in seen:
+        return False
+    seen.add(template_name)
+    source = env.loader.get_source(env, template_name)[0]
+    ast = env.parse(source)
+    if 'recipient' in jinja2.meta.find_undeclared_variables(ast):
+        return True
+    for ref in jinja2.meta.find_referenced_templates(ast):
+        if ref is None or template_uses_recipient(env, ref, seen):
+            return True
+    return False
+
+
 def get_rendered_jinja(
         target, sqs_message, resources, logger,
-        specified_template, default_template, template_folders):
+        specified_template, default_template, template_folders,
+        render_cache=None):
+    """Render a message template for a target.
+
+    When a `render_cache` dict is passed, renders are shared across calls
+    for the same template and resource list. Templates which never
+    reference the recipient are rendered once and fanned out to every
+    target.
+    """
     env = get_jinja_env(template_folders)
     mail_template = sqs_message['action'].get(specified_template, default_template)
     if not os.path.isabs(mail_template):
@@ -84,6 +170,19 @@ def get_rendered_jinja(
         logger.error("Invalid template reference %s\n%s" % (mail_template, error_msg))
         return
 
+    cache_key = None
+    if render_cache is not None:
+        recipient = None
+        uses_recipient = _recipient_templates.get((id(env), mail_template))
+        if uses_recipient is None:
+            uses_recipient = _recipient_templates[(id(env), mail_template)] = \
+                template_uses_recipient(env, mail_template)
+        if uses_recipient:
+            recipient = tuple(target) if isinstance(target, list) else target
+        cache_key = (mail_template, id(resources), recipient)
+        if cache_key in render_cache:
+            return render_cache[cache_key][1]
+
     # recast seconds since epoch as utc iso datestring, template
     # authors can use date_time_format helper func to convert local
     # tz. if no execution start time was passed use current time.
@@ -105,6 +204,10 @@ def get_rendered_jinja(
         policy=sqs_message['policy'],
         execution_start=execution_start,
         region=sqs_message.get('region', ''))
+    if cache_key is not None:
+        # hold a reference to the resources so their id stays unique
+        # for the lifetime of the cache.
+        render_cache[cache_key] = (resources, rendered_jinja)
     return rendered_jinja
 
 
@@ -124,10 +227,15 @@ def get_resource_tag_targets(resource, target_tag_keys):
     return targets
 
 
+@functools.lru_cache(maxsize=128)
+def get_subject_template(subject):
+    return jinja2.Template(subject)
+
+
 def get_message_subject(sqs_message):
     default_subject = 'Custodian notification - %s' % (sqs_message['policy']['name'])
     subject = sqs_message['action'].get('subject', default_subject)
-    jinja_template = jinja2.Template(subject)
+    jinja_template = get_subject_template(subject)
     subject = jinja_template.render(
         account=sqs_message.get('account', ''),
         account_id=sqs_message.get('account_id', ''),
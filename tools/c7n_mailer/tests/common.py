@@ -7,7 +7,7 @@ import fakeredis
 from ldap3 import MOCK_SYNC, Connection, Server
 from ldap3.strategy import mockBase
 
-from c7n_mailer.ldap_lookup import LdapLookup, Redis
+from c7n_mailer.ldap_lookup import LdapLookup, LocalCache, Redis
 
 logger = logging.getLogger("custodian.mailer")
 
@@ -690,6 +690,7 @@ def get_ldap_lookup(cache_engine=None, uid_regex=None):
     if uid_regex:
         config["ldap_uid_regex"] = uid_regex
     ldap_lookup = MockLdapLookup(config, logger)
+    ldap_lookup.local_cache = LocalCache()
     michael_bolton = {
         "dn": "CN=Michael Bolton,cn=users,dc=initech,dc=com",
         "mail": "michael_bolton@initech.com",
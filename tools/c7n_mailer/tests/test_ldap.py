@@ -4,7 +4,7 @@
 import unittest
 
 from common import get_ldap_lookup, PETER, BILL
-from c7n_mailer.ldap_lookup import have_sqlite
+from c7n_mailer.ldap_lookup import LocalCache, have_sqlite
 
 
 SKIP_REASON = "Azure Pipelines still broken"
@@ -97,3 +97,41 @@ class MailerLdapTest(unittest.TestCase):
         self.ldap_lookup.connection = None
         to_addr = self.ldap_lookup.get_email_to_addrs_from_uid("doesnotexist", manager=True)
         self.assertEqual(to_addr, [])
+
+    def test_resolve_uids_batched(self):
+        results = self.ldap_lookup.resolve_uids(
+            ["Peter", "michael_bolton", "doesnotexist", None], manager=True)
+        self.assertEqual(results["peter"]["mail"], PETER[1]["mail"][0])
+        self.assertEqual(results["michael_bolton"]["mail"], "michael_bolton@initech.com")
+        self.assertEqual(results["doesnotexist"], {})
+        # manager metadata was resolved as well, all served from cache from here on.
+        self.ldap_lookup.connection = None
+        to_addr = self.ldap_lookup.get_email_to_addrs_from_uid("peter", manager=True)
+        self.assertEqual(to_addr, ["peter@initech.com", "bill_lumberg@initech.com"])
+        self.assertEqual(
+            self.ldap_lookup.get_email_to_addrs_from_uid("doesnotexist"), [])
+
+    def test_negative_cache_ttl(self):
+        self.ldap_lookup.negative_ttl = -1
+        self.assertEqual(self.ldap_lookup.get_metadata_from_uid("doesnotexist"), {})
+        # an expired negative result is a cache miss
+        self.assertEqual(self.ldap_lookup.get_cached("doesnotexist"), None)
+        self.ldap_lookup.negative_ttl = 60
+        self.assertEqual(self.ldap_lookup.get_metadata_from_uid("doesnotexist"), {})
+        self.ldap_lookup.local_cache.clear()
+        self.assertEqual(self.ldap_lookup.get_cached("doesnotexist"), {})
+
+    def test_negative_cache_ttl_disabled(self):
+        self.ldap_lookup.negative_ttl = 0
+        self.assertEqual(self.ldap_lookup.get_metadata_from_uid("doesnotexist"), {})
+        # neither the local cache nor the cache engine hold the negative result
+        self.assertEqual(self.ldap_lookup.local_cache.get(
+            self.ldap_lookup.local_prefix + "doesnotexist"), None)
+        self.assertEqual(self.ldap_lookup.get_cached("doesnotexist"), None)
+
+    def test_local_cache_zero_ttl(self):
+        cache = LocalCache(ttl=3600)
+        cache.set("a", {}, 0)
+        self.assertEqual(cache.get("a"), None)
+        cache.set("b", {"mail": "b"})
+        self.assertEqual(cache.get("b"), {"mail": "b"})
@@ -3,6 +3,7 @@
 # -*- coding: utf-8 -*-
 
 import builtins
+import copy
 from datetime import datetime
 from importlib import reload
 import os
@@ -17,7 +18,7 @@ from c7n_mailer import utils
 from c7n_mailer.azure_mailer.azure_queue_processor import MailerAzureQueueProcessor
 from c7n_mailer.gcp_mailer.gcp_queue_processor import MailerGcpQueueProcessor
 from c7n_mailer.sqs_queue_processor import MailerSqsQueueProcessor
-from common import MAILER_CONFIG, SQS_MESSAGE_1, RESOURCE_1
+from common import MAILER_CONFIG, MAILER_CONFIG_AZURE, SQS_MESSAGE_1, RESOURCE_1
 
 
 class FormatStruct(unittest.TestCase):
@@ -370,6 +371,41 @@ class OtherTests(unittest.TestCase):
         )
         self.assertIsNotNone(body)
 
+    def test_get_jinja_env_cached(self):
+        env = utils.get_jinja_env(MAILER_CONFIG["templates_folders"])
+        self.assertIs(env, utils.get_jinja_env(list(MAILER_CONFIG["templates_folders"])))
+        self.assertIs(env.bytecode_cache, utils.template_bytecode_cache)
+        self.assertIsNot(env, utils.get_jinja_env(MAILER_CONFIG_AZURE["templates_folders"]))
+
+    def test_get_rendered_jinja_render_cache(self):
+        message = copy.deepcopy(SQS_MESSAGE_1)
+        message["action"]["template"] = "default"
+        resources = [RESOURCE_1]
+        logger = logging.getLogger("c7n_mailer.utils.email")
+        folders = MAILER_CONFIG_AZURE["templates_folders"]
+        render_cache = {}
+
+        # the default template doesn't reference the recipient, so a
+        # single render is shared by every target.
+        with patch.object(jinja2.Template, "render") as render:
+            render.return_value = "body"
+            for target in ("a@example.com", "b@example.com"):
+                self.assertEqual(
+                    utils.get_rendered_jinja(
+                        target, message, resources, logger,
+                        "template", "default", folders, render_cache),
+                    "body")
+            self.assertEqual(render.call_count, 1)
+
+            # recipient aware templates are rendered per target
+            message["action"]["template"] = os.path.abspath(
+                os.path.join(os.path.dirname(__file__), "example.jinja")).replace("\\", "/")
+            for target in ("a@example.com", "b@example.com", "a@example.com"):
+                utils.get_rendered_jinja(
+                    target, message, resources, logger,
+                    "template", "default", folders, render_cache)
+            self.assertEqual(render.call_count, 3)
+
     def test_get_date_age(self):
         now = datetime.utcnow().isoformat() + "Z"
         sleep(1.0)
@@ -383,6 +419,13 @@ class OtherTests(unittest.TestCase):
             SQS_MESSAGE_1["action"]["subject"].replace("{{ account }}", SQS_MESSAGE_1["account"]),
         )
 
+    def test_get_message_subject_compiled_once(self):
+        utils.get_subject_template.cache_clear()
+        utils.get_message_subject(SQS_MESSAGE_1)
+        utils.get_message_subject(SQS_MESSAGE_1)
+        info = utils.get_subject_template.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
     def test_kms_decrypt(self):
         config = {"test": {"secret": "mysecretpassword"}}
         session_mock = Mock()
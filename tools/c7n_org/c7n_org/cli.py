@@ -5,11 +5,14 @@
 
 import csv
 from collections import Counter
+from contextlib import contextmanager
+import json
 import logging
 import os
 import time
 import subprocess  # nosec
 import sys
+import tempfile
 from datetime import timedelta, datetime
 
 import multiprocessing
@@ -26,11 +29,14 @@ import jsonschema
 from c7n.credentials import assumed_session, SessionFactory
 from c7n.executor import MainThreadExecutor
 from c7n.config import Config
+from c7n.filters.related import related_index
 from c7n.policy import PolicyCollection
 from c7n.provider import get_resource_class
-from c7n.reports.csvout import Formatter, fs_record_set, record_set, strip_output_path
+from c7n.reports.csvout import (
+    Formatter, fs_record_set, iter_record_set, strip_output_path, write_json_records)
 from c7n.resources import load_available
-from c7n.utils import CONN_CACHE, dumps, filter_empty, format_string_values
+from c7n.resources.vpc import sg_usage_index
+from c7n.utils import CONN_CACHE, filter_empty, format_string_values
 
 from c7n_org.utils import environ, account_tags
 
@@ -327,7 +333,7 @@ def report_account(account, region, policies_config, output_path, cache_path, de
             delta = timedelta(days=1)
             begin_date = datetime.now() - delta
 
-            policy_records = record_set(
+            policy_records = iter_record_set(
                 p.session_factory,
                 p.ctx.output.config['netloc'],
                 strip_output_path(p.ctx.output.config['path'], p.name),
@@ -346,7 +352,7 @@ def report_account(account, region, policies_config, output_path, cache_path, de
                     if k in r:
                         k = 'tag:' + k
                     r[k] = v
-        records.extend(policy_records)
+            records.append(r)
     return records
 
 
@@ -384,7 +390,18 @@ def report(config, output, use, output_dir, accounts,
     elif not len(custodian_config['policies']) > 0:
         raise ValueError("no matching policies found")
 
-    records = []
+    prefix_fields = OrderedDict(
+        (('Account', 'account'), ('Region', 'region'), ('Policy', 'policy')))
+
+    factory = get_resource_class(list(resource_types)[0])
+    formatter = Formatter(
+        factory.resource_type,
+        extra_fields=field,
+        include_default_fields=not no_default_fields,
+        include_region=False,
+        include_policy=False,
+        fields=prefix_fields)
+
     with executor(max_workers=WORKER_COUNT) as w:
         futures = {}
         for a in accounts_config.get('accounts', ()):
@@ -397,42 +414,35 @@ def report(config, output, use, output_dir, accounts,
                     cache_path,
                     debug)] = (a, r)
 
-        for f in as_completed(futures):
-            a, r = futures[f]
-            if f.exception():
-                if debug:
-                    raise
-                log.warning(
-                    "Error running policy in %s @ %s exception: %s",
-                    a['name'], r, f.exception())
-            records.extend(f.result())
-
-    log.debug(
-        "Found %d records across %d accounts and %d policies",
-        len(records), len(accounts_config['accounts']),
-        len(custodian_config['policies']))
+        # account/region records are written out as they complete,
+        # rather than collected across the whole fleet.
+        records = iter_account_records(futures, debug)
 
-    if format == 'json':
-        dumps(records, output, indent=2)
-        return
+        if format == 'json':
+            for _ in write_json_records(records, output):
+                pass
+            return
 
-    prefix_fields = OrderedDict(
-        (('Account', 'account'), ('Region', 'region'), ('Policy', 'policy')))
-    config = Config.empty()
+        writer = csv.writer(output, formatter.headers(), quoting=csv.QUOTE_ALL)
+        writer.writerow(formatter.headers())
+        writer.writerows(formatter.iter_csv(records, unique=False))
 
-    factory = get_resource_class(list(resource_types)[0])
-    formatter = Formatter(
-        factory.resource_type,
-        extra_fields=field,
-        include_default_fields=not no_default_fields,
-        include_region=False,
-        include_policy=False,
-        fields=prefix_fields)
 
-    rows = formatter.to_csv(records, unique=False)
-    writer = csv.writer(output, formatter.headers(), quoting=csv.QUOTE_ALL)
-    writer.writerow(formatter.headers())
-    writer.writerows(rows)
+def iter_account_records(futures, debug):
+    count = 0
+    for f in as_completed(futures):
+        a, r = futures[f]
+        if f.exception():
+            if debug:
+                raise
+            log.warning(
+                "Error running policy in %s @ %s exception: %s",
+                a['name'], r, f.exception())
+            continue
+        for record in f.result():
+            count += 1
+            yield record
+    log.debug("Found %d records across %d account regions", count, len(futures))
 
 
 def _get_env_creds(account, session, region, env=None):
@@ -564,14 +574,50 @@ def accounts_iterator(config):
         yield d
 
 
+# set in worker processes started with init_worker
+WORKER_INITIALIZED = False
+
+
+@contextmanager
+def credential_cache():
+    """Share assumed role credentials between worker processes for a run.
+
+    Unless one is already configured, workers get a run scoped credential
+    cache directory, so each account's role is assumed once per run rather
+    than once per worker and region.
+    """
+    if os.environ.get('C7N_CREDENTIAL_CACHE'):
+        yield
+        return
+    with tempfile.TemporaryDirectory(prefix='c7n-org-') as cache_dir:
+        with environ(C7N_CREDENTIAL_CACHE=cache_dir):
+            yield
+
+
+def init_worker():
+    """Worker process initializer.
+
+    Loads providers and resource registries once per worker process,
+    instead of on every account/region task it runs.
+    """
+    global WORKER_INITIALIZED
+    logging.getLogger('custodian.output').setLevel(logging.ERROR + 1)
+    load_available()
+    WORKER_INITIALIZED = True
+
+
 def run_account(account, region, policies_config, output_path,
                 cache_period, cache_path, metrics, dryrun, debug):
     """Execute a set of policies on an account.
     """
-    logging.getLogger('custodian.output').setLevel(logging.ERROR + 1)
     CONN_CACHE.session = None
     CONN_CACHE.time = None
-    load_available()
+    # related resources of previous accounts aren't reused by this one
+    related_index.clear()
+    sg_usage_index.clear()
+    if not WORKER_INITIALIZED:
+        logging.getLogger('custodian.output').setLevel(logging.ERROR + 1)
+        load_available()
 
     # allow users to specify interpolated output paths
     if '{' not in output_path:
@@ -651,6 +697,64 @@ def run_account(account, region, policies_config, output_path,
     return policy_counts, success
 
 
+def get_policy_groups(policies_config):
+    """Split a policy file into groups of policies by resource type.
+
+    Policies on the same resource type share a resource cache, so are
+    kept together in a task.
+    """
+    groups = {}
+    for p in policies_config.get('policies', ()):
+        groups.setdefault(p.get('resource'), []).append(p)
+    return [{**policies_config, 'policies': g} for g in groups.values()]
+
+
+def get_policy_run_time(output_dir, account, region, policy_name):
+    """Policy execution time from a previous run's metadata, if available."""
+    # remote or interpolated output paths aren't read back.
+    if '://' in output_dir or '{' in output_dir:
+        return None
+    path = os.path.join(
+        output_dir, account['name'], region, policy_name, 'metadata.json')
+    try:
+        with open(path) as fh:
+            return json.load(fh)['execution']['duration']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def schedule_tasks(tasks, output_dir):
+    """Order (account, region, policies config) tasks, longest expected first.
+
+    Expected times are the sum of each policy's duration in the previous
+    run. Policies without history are estimated by their average duration
+    in other accounts, or else the average over all policies.
+    """
+    durations = {}
+    history = {}
+    for a, r, pconfig in tasks:
+        for p in pconfig['policies']:
+            t = get_policy_run_time(output_dir, a, r, p['name'])
+            durations[(a['name'], r, p['name'])] = t
+            if t is not None:
+                history.setdefault(p['name'], []).append(t)
+
+    averages = {name: sum(times) / len(times) for name, times in history.items()}
+    default = averages and sum(averages.values()) / len(averages) or 0
+
+    def expected_time(task):
+        a, r, pconfig = task
+        total = 0
+        for p in pconfig['policies']:
+            t = durations[(a['name'], r, p['name'])]
+            if t is None:
+                t = averages.get(p['name'], default)
+            total += t
+        return total
+
+    return sorted(tasks, key=expected_time, reverse=True)
+
+
 @cli.command(name='run')
 @click.option('-c', '--config', required=True, help="Accounts config file")
 @click.option("-u", "--use", required=True)
@@ -671,11 +775,14 @@ def run_account(account, region, policies_config, output_path,
 @click.option("--metrics", default=False, is_flag=True)
 @click.option("--metrics-uri", default=None, help="Configure provider metrics target")
 @click.option("--dryrun", default=False, is_flag=True)
+@click.option('--schedule', default='account', type=click.Choice(['account', 'policy-group']),
+              help="Task granularity, policy-group runs each resource type's policies "
+              "as a separate task, longest running first")
 @click.option('--debug', default=False, is_flag=True)
 @click.option('-v', '--verbose', default=False, help="Verbose", is_flag=True)
 def run(config, use, output_dir, accounts, tags, region,
         policy, policy_tags, cache_period, cache_path, metrics,
-        dryrun, debug, verbose, metrics_uri):
+        dryrun, debug, verbose, metrics_uri, schedule):
     """run a custodian policy across accounts"""
     accounts_config, custodian_config, executor = init(
         config, use, debug, verbose, accounts, tags, policy, policy_tags=policy_tags)
@@ -690,20 +797,40 @@ def run(config, use, output_dir, accounts, tags, region,
         if not os.path.exists(cache_path):
             os.makedirs(cache_path)
 
-    with executor(max_workers=WORKER_COUNT) as w:
+    policy_groups = [custodian_config]
+    if schedule == 'policy-group':
+        policy_groups = get_policy_groups(custodian_config)
+
+    tasks = []
+    for a in accounts_config['accounts']:
+        for r in resolve_regions(region or a.get('regions', ()), a):
+            for pconfig in policy_groups:
+                tasks.append((a, r, pconfig))
+
+    if schedule == 'policy-group':
+        # idle workers take the next task from the pool's queue, so
+        # starting the longest tasks first keeps them from being the tail.
+        tasks = schedule_tasks(tasks, output_dir)
+
+    with credential_cache(), executor(max_workers=WORKER_COUNT, initializer=init_worker) as w:
         futures = {}
-        for a in accounts_config['accounts']:
-            for r in resolve_regions(region or a.get('regions', ()), a):
-                futures[w.submit(
-                    run_account,
-                    a, r,
-                    custodian_config,
-                    output_dir,
-                    cache_period,
-                    cache_path,
-                    metrics,
-                    dryrun,
-                    debug)] = (a, r)
+        for a, r, pconfig in tasks:
+            group_cache_path = cache_path
+            if schedule == 'policy-group':
+                # groups of an account and region run concurrently, give
+                # each its own cache file rather than contend on one.
+                group_cache_path = os.path.join(
+                    cache_path, pconfig['policies'][0]['resource'])
+            futures[w.submit(
+                run_account,
+                a, r,
+                pconfig,
+                output_dir,
+                cache_period,
+                group_cache_path,
+                metrics,
+                dryrun,
+                debug)] = (a, r)
 
         for f in as_completed(futures):
             a, r = futures[f]
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import copy
+import json
 import mock
 import os
 
@@ -177,6 +178,54 @@ class OrgTest(TestUtils):
             log_output.getvalue().strip(),
             "Policy resource counts Counter({'compute': 96, 'serverless': 48})")
 
+    def test_cli_run_policy_group_schedule(self):
+        run_dir = self.setup_run_dir()
+        for name, duration in (('compute', 10), ('serverless', 1)):
+            path = os.path.join(run_dir, 'output', 'dev', 'us-east-1', name)
+            os.makedirs(path)
+            with open(os.path.join(path, 'metadata.json'), 'w') as fh:
+                json.dump({'execution': {'duration': duration}}, fh)
+
+        run_account = mock.MagicMock()
+        run_account.return_value = ({}, True)
+        self.patch(org, 'run_account', run_account)
+        self.change_cwd(run_dir)
+        runner = CliRunner()
+        result = runner.invoke(
+            org.cli,
+            ['run', '-c', 'accounts.yml', '-u', 'policies.yml',
+             '--debug', '-s', 'output', '--cache-path', 'cache',
+             '-r', 'us-east-1', '--schedule', 'policy-group'],
+            catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0)
+
+        tasks = [(c[0][0]['name'], [p['name'] for p in c[0][2]['policies']])
+                 for c in run_account.call_args_list]
+        # accounts without history are estimated from the others
+        self.assertEqual(tasks, [
+            ('dev', ['compute']), ('qa', ['compute']),
+            ('dev', ['serverless']), ('qa', ['serverless'])])
+        # each policy group has its own cache file
+        self.assertEqual(
+            [os.path.basename(c[0][5]) for c in run_account.call_args_list],
+            ['aws.ec2', 'aws.ec2', 'aws.lambda', 'aws.lambda'])
+
+    def test_init_worker(self):
+        load_available = mock.MagicMock()
+        self.patch(org, 'load_available', load_available)
+        self.patch(org, 'WORKER_INITIALIZED', False)
+        org.init_worker()
+        self.assertTrue(org.WORKER_INITIALIZED)
+
+        run_dir = self.setup_run_dir()
+        result = org.run_account(
+            {'name': 'dev', 'account_id': '112233445566', 'provider': 'aws',
+             'profile': 'dev'},
+            'us-east-1', {'policies': []}, os.path.join(run_dir, 'output'),
+            0, os.path.join(run_dir, 'cache'), False, True, False)
+        self.assertEqual(result, ({}, True))
+        self.assertEqual(load_available.call_count, 1)
+
     def test_filter_policies(self):
         d = {'policies': [
             {'name': 'find-ml',